@@ -1,17 +1,7 @@
 import math
 import cmath
-
-from calculations import (
-    STANDARD_SIZES,
-    lookup_iz_xlpe,
-    cable_impedance_NKT,
-    ik_min_stik,
-    ik_max_stik,
-    thermal_ok,
-    voltage_drop_ds,
-    fuse_trip_time_explain,
-)
-from fuse_curves import get_fuse_data
+import os
+from concurrent.futures import ThreadPoolExecutor
 
 # =========================================================
 # Hjælper til at vise Ik som beløb + vinkel
@@ -46,7 +36,7 @@ def format_current_with_angle(I) -> str:
 
 try:
     import tkinter as tk
-    from tkinter import ttk, messagebox
+    from tkinter import ttk, messagebox, filedialog
 
     TK_AVAILABLE = True
 except ModuleNotFoundError:
@@ -54,11 +44,31 @@ except ModuleNotFoundError:
     tk = None
     ttk = None
     messagebox = None
+    filedialog = None
 
 
 if TK_AVAILABLE:
     from segment_frame import SegmentFrame
     from group_frame import GroupFrame
+    from group_frame_base import saet_tekst
+    from group_calc import stik_context_from_gui
+    from group_engine import BeregningsFejl
+    from history import Historik, Projekt
+    from result_cache import (
+        cached_beregn_alle_grupper,
+        cached_beregn_stikledning,
+        get_default_cache,
+    )
+    from records import Material, Phase, StikFelter, StikInput
+    from report_export import export_project
+    from results_overview import ResultatOversigt
+
+    # Rapport-eksport kører i baggrunden, så vinduet ikke fryser
+    _report_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rapport")
+
+    # Ændringer i en gruppe samles til ét fortryd-trin, når der har været
+    # ro så længe (ms) – ikke ét trin pr. tastetryk
+    FORTRYD_DELAY_MS = 600
 
     def main():
         # ------------------------------------------------------------
@@ -68,6 +78,10 @@ if TK_AVAILABLE:
         root.title("Stikledning- og gruppeberegner – XLPE")
         root.geometry("1200x800")
 
+        # Værktøjslinje (Fortryd/Gentag – knapperne lægges i til sidst)
+        frame_historik = ttk.Frame(root)
+        frame_historik.pack(side="top", fill="x", padx=5, pady=(5, 0))
+
         # ------------------------------------------------------------
         # Notebook med faner
         # ------------------------------------------------------------
@@ -76,10 +90,12 @@ if TK_AVAILABLE:
 
         tab_stik = ttk.Frame(notebook)
         tab_groups = ttk.Frame(notebook)
+        tab_oversigt = ttk.Frame(notebook)
         tab_mellem = ttk.Frame(notebook)
 
         notebook.add(tab_stik, text="Stikledning")
         notebook.add(tab_groups, text="Grupper")
+        notebook.add(tab_oversigt, text="Oversigt")
         notebook.add(tab_mellem, text="Mellemregninger")
 
         # ------------------------------------------------------------
@@ -377,6 +393,15 @@ if TK_AVAILABLE:
         )
         lbl_sikring_tid.grid(row=7, column=0, sticky="w")
 
+        # Teksterne før første beregning (sættes tilbage ved fortryd)
+        stik_labels_tomme = {
+            lbl: lbl.cget("text")
+            for lbl in (
+                lbl_Iz_nod, lbl_sq_valgt, lbl_len_total, lbl_du, lbl_Ikmin,
+                lbl_Ikmax, lbl_E_kabel, lbl_sikring_tid,
+            )
+        }
+
         # logfunktion til stikledningen -> skriver i Mellemregninger
         def log(line: str = ""):
             log_mellem(line)
@@ -384,33 +409,59 @@ if TK_AVAILABLE:
         # --------------------------------------------------------
         # Data deles med grupperne
         # --------------------------------------------------------
-        stik_data = {
-            "U_v": None,
-            "sq": None,
-            "material": None,
-            "total_len": None,
-            "Ik_min_val": None,
-            "Ik_max_val": None,
-            "Z_w1_min": None,
-            "Z_w1_max": None,
-            "cos_load": None,
-            "phase": None,
-            "In": None,
-            "Kj_jord": None,
-            "du_stik": None,
-            "I_min_supply": None,
-            "In_source": None,
-            "src_txt": None,
-        }
+        # Grupperne læser stikledningens resultat (records.StikResult) herfra
+        stik_data = {"resultat": None, "input": None}
 
         # --------------------------------------------------------
         # Beregn stikledning
         # --------------------------------------------------------
-        def beregn_stik():
-            log("")
-            log("===== STIKLEDNING =====")
-            log("")
+        def stik_felter() -> StikFelter:
+            """Stikledningsfanens felter som de står (fortryd/gentag)."""
+            return StikFelter(
+                U_v=c_U.get(),
+                In=e_In.get(),
+                phase=c_phase.get(),
+                material=c_mat.get(),
+                cos_load=e_cos_load.get(),
+                Kj_jord=e_Kj.get(),
+                du_max=e_dU_max.get(),
+                auto_size=bool(auto_size_var.get()),
+                fuse_manu=c_fuse_manu.get(),
+                fuse_type=c_fuse_type.get(),
+                Ik_trafo=e_Ik_trafo.get(),
+                I_min_supply=e_Ik_min.get(),
+                cos_trafo=e_cos_trafo.get(),
+                k_val=e_k.get(),
+                segments=tuple(frame.felter() for frame in segment_frames),
+            )
 
+        def saet_stik_felter(f: StikFelter):
+            for widget, tekst in (
+                (c_U, f.U_v),
+                (e_In, f.In),
+                (c_phase, f.phase),
+                (c_mat, f.material),
+                (e_cos_load, f.cos_load),
+                (e_Kj, f.Kj_jord),
+                (e_dU_max, f.du_max),
+                (c_fuse_manu, f.fuse_manu),
+                (c_fuse_type, f.fuse_type),
+                (e_Ik_trafo, f.Ik_trafo),
+                (e_Ik_min, f.I_min_supply),
+                (e_cos_trafo, f.cos_trafo),
+                (e_k, f.k_val),
+            ):
+                saet_tekst(widget, tekst)
+            auto_size_var.set(f.auto_size)
+            while len(segment_frames) < len(f.segments):
+                add_segment()
+            while len(segment_frames) > len(f.segments):
+                remove_segment()
+            for frame, seg in zip(segment_frames, f.segments):
+                frame.saet_felter(seg)
+
+        def les_stik_input() -> StikInput:
+            """StikInput fra felterne; rejser BeregningsFejl ved ugyldige tal."""
             try:
                 In = float(e_In.get().replace(",", "."))
                 U_v = int(c_U.get())
@@ -424,16 +475,14 @@ if TK_AVAILABLE:
                 Ik_trafo = float(e_Ik_trafo.get().replace(",", "."))
                 I_min_supply = float(e_Ik_min.get().replace(",", "."))
             except ValueError:
-                messagebox.showerror("Fejl", "Tjek at alle tal er indtastet rigtigt.")
-                return
+                raise BeregningsFejl("Fejl", "Tjek at alle tal er indtastet rigtigt.")
 
             try:
                 cos_trafo = float(e_cos_trafo.get().replace(",", "."))
             except ValueError:
-                messagebox.showerror(
+                raise BeregningsFejl(
                     "Fejl", "cos φ trafo skal være et gyldigt decimaltal."
                 )
-                return
 
             try:
                 k_val = float(e_k.get().replace(",", "."))
@@ -443,260 +492,51 @@ if TK_AVAILABLE:
                 e_k.delete(0, "end")
                 e_k.insert(0, f"{k_val:g}")
 
-            auto_size = auto_size_var.get()
-
-            log("=== Overordnede input – stikledning ===")
-            log(f"In = {In:.2f} A")
-            log(f"U_n = {U_v} V, fasesystem = {phase}")
-            log(f"Materiale = {material} (XLPE)")
-            log(f"cos φ (last) = {cos_load:.3f}")
-            log(f"Kj jord (felt) = {Kj_jord:.3f}")
-            log(f"Maks. spændingsfald (stik) = {du_max_pct:.2f} %")
-            log(f"Automatisk tværsnit = {'JA' if auto_size else 'NEJ'}")
-            log(
-                f"Ik_min,forsyning = {I_min_supply:.1f} A; Ik_trafo = {Ik_trafo:.1f} A, cos φ trafo = {cos_trafo:.3f}"
-            )
-            log(f"k (k²S², XLPE auto) = {k_val:.1f}")
-            log("")
-
             # Segment-data
             segments = []
-            total_len = 0.0
             for frame in segment_frames:
                 try:
-                    data = frame.get_data()
+                    segments.append(frame.get_data())
                 except ValueError as exc:
-                    messagebox.showerror("Fejl i segmentdata", str(exc))
-                    return
-                segments.append(data)
-                total_len += data["length"]
-
-            if not segments:
-                messagebox.showerror(
-                    "Fejl", "Der skal være mindst ét segment i stikledningen."
-                )
-                return
-
-            log("=== Segmentdata (stikledning) ===")
-            for idx, seg in enumerate(segments, start=1):
-                log(
-                    f"Segment {idx}: L = {seg['length']:.1f} m, "
-                    f"Ref-metode = {seg['ref_method']}, "
-                    f"Belastede ledere = {seg['cores']}, "
-                    f"T_omg = {seg['temp']} °C, "
-                    f"s = {seg['area']} mm²"
-                )
-            log(f"Samlet længde stikledning = {total_len:.1f} m")
-            log("")
-
-            # Overbelastning / Iz
-            best_Iz_nod = 0.0
-            if phase == "1-faset" and material == "Cu":
-                candidate_sizes = [2.5, 4.0, 6.0, 10.0, 16.0, 25.0, 35.0]
-            else:
-                candidate_sizes = STANDARD_SIZES
-
-            sq = None
-            if auto_size:
-                log("=== Auto tværsnit (Iz + ΔU_total) – stikledning ===")
-                for S in candidate_sizes:
-                    ok_all = True
-                    worst_Iz_nod_S = 0.0
-                    log(f"Afprøver tværsnit S = {S:.1f} mm²:")
-
-                    for idx, seg in enumerate(segments, start=1):
-                        ref = seg["ref_method"]
-                        n_belastede = seg["cores"]
-                        Kt_seg = seg["Kt"]
-                        kgrp_seg = seg["kgrp"]
-
-                        Iz_tab = lookup_iz_xlpe(material, ref, n_belastede, S)
-                        if Iz_tab is None:
-                            log(
-                                f"  [ADVARSEL] Mangler Iz-data for {material}, "
-                                f"ref {ref}, {n_belastede} belastede, S={S:.1f} mm²."
-                            )
-                            ok_all = False
-                            break
-
-                        env_seg = "jord" if ref in ("D1", "D2") else "luft"
-                        if ref == "D2":
-                            Kj_seg = 1.5
-                        else:
-                            Kj_seg = Kj_jord if env_seg == "jord" else 1.0
-
-                        Iz_korr = Iz_tab * Kt_seg * Kj_seg * kgrp_seg
-                        Iz_nod = In / (Kt_seg * Kj_seg * kgrp_seg)
-
-                        log(
-                            f"  Segment {idx}: Iz,tabel={Iz_tab:.1f} A, "
-                            f"Kt={Kt_seg:.3f}, Kj={Kj_seg:.3f}, kgrp={kgrp_seg:.3f} "
-                            f"⇒ Iz,korr={Iz_korr:.1f} A, Iz,nød={Iz_nod:.1f} A"
-                        )
-
-                        if Iz_korr < Iz_nod:
-                            log(
-                                "    ⇒ Overbelastningsbeskyttelse IKKE OK i dette segment!"
-                            )
-                            ok_all = False
-                            break
-
-                        if Iz_nod > worst_Iz_nod_S:
-                            worst_Iz_nod_S = Iz_nod
-
-                    if ok_all:
-                        du_S, du_pct_S = voltage_drop_ds(
-                            U_v, In, material, S, total_len, phase, cos_load
-                        )
-                        log(
-                            f"  ΔU_stik for S = {S:.1f} mm²: "
-                            f"{du_S:.2f} V ({du_pct_S:.2f} %)"
-                        )
-                        if du_pct_S > du_max_pct:
-                            log(
-                                f"    ⇒ Spændingsfaldet ({du_pct_S:.2f} %) "
-                                f"overskrider grænsen på {du_max_pct:.2f} %."
-                            )
-                            ok_all = False
-                        else:
-                            log(
-                                f"    ⇒ Spændingsfaldet er OK ift. grænsen "
-                                f"på {du_max_pct:.2f} %."
-                            )
-
-                    if ok_all:
-                        log(f"⇒ Tværsnit S = {S:.1f} mm² er OK for alle segmenter.")
-                        sq = S
-                        best_Iz_nod = worst_Iz_nod_S
-                        break
-                    else:
-                        log(f"⇒ Tværsnit S = {S:.1f} mm² er IKKE OK – prøver større.")
-                        log("")
-
-                if sq is None:
-                    messagebox.showerror(
-                        "Overbelastning",
-                        "Kunne ikke finde et tværsnit, der opfylder Iz- og ΔU-betingelserne.",
-                    )
-                    return
-
-                log(f"Valgt tværsnit for stikledning: {sq:.1f} mm²")
-                log("")
-            else:
-                sq = segments[0]["area"]
-                log("Auto tværsnit er slået FRA.")
-                log(f"Bruger tværsnit fra første segment: S = {sq:.1f} mm²")
-                log("")
-
-            # Spændingsfald – DS-formel
-            log("=== Spændingsfald – stikledning ===")
-            try:
-                du, du_pct = voltage_drop_ds(
-                    U_v, In, material, sq, total_len, phase, cos_load
-                )
-            except KeyError:
-                messagebox.showerror(
-                    "Kabeldata",
-                    "Der mangler kabeldata (R/X) for det valgte tværsnit/materiale.",
-                )
-                return
-
-            log(
-                f"ΔU_stik = {du:.2f} V ({du_pct:.2f} %) for S = {sq:.1f} mm², L = {total_len:.1f} m"
-            )
-            if du_pct <= du_max_pct:
-                log(
-                    f"⇒ Spændingsfaldet er inden for grænsen på {du_max_pct:.2f} %."
-                )
-            else:
-                log(
-                    f"⇒ Spændingsfaldet overskrider grænsen på {du_max_pct:.2f} %!"
-                )
-            log("")
-
-            # Kortslutningsstrømme
-            log("=== Kortslutningsstrømme – Ik,min og Ik,max ===")
-            try:
-                Z_w1_min = cable_impedance_NKT(
-                    L_m=total_len,
-                    material=material,
-                    sq=sq,
-                    phase=phase,
-                    R_factor=1.5,
-                )
-                Z_w1_max = cable_impedance_NKT(
-                    L_m=total_len,
-                    material=material,
-                    sq=sq,
-                    phase=phase,
-                    R_factor=1.0,
-                )
-            except KeyError:
-                messagebox.showerror(
-                    "Kabeldata",
-                    "Der mangler kabeldata (R/X) for det valgte tværsnit/materiale.",
-                )
-                return
+                    raise BeregningsFejl("Fejl i segmentdata", str(exc))
 
-            Ik_min_val = ik_min_stik(U_v, I_min_supply, Z_w1_min)
-            Ik_max_val, Z_total_max = ik_max_stik(
+            return StikInput(
+                In=In,
                 U_v=U_v,
+                phase=Phase.parse(phase),
+                material=Material.parse(material),
+                cos_load=cos_load,
+                Kj_jord=Kj_jord,
+                du_max_pct=du_max_pct,
+                fuse_manu=fuse_manu,
+                fuse_type=fuse_type,
                 Ik_trafo=Ik_trafo,
+                I_min_supply=I_min_supply,
                 cos_trafo=cos_trafo,
-                Z_kabel_max=Z_w1_max,
-            )
-
-            log(
-                "  Z_w1,min = {:.5f} + j{:.5f} Ω (R_faktor=1,5)".format(
-                    Z_w1_min.real, Z_w1_min.imag
-                )
+                k_val=k_val,
+                auto_size=bool(auto_size_var.get()),
+                segments=tuple(segments),
             )
-            log(
-                "  Z_w1,max = {:.5f} + j{:.5f} Ω (R_faktor=1,0)".format(
-                    Z_w1_max.real, Z_w1_max.imag
-                )
-            )
-            log(f"  Ik,min = {abs(Ik_min_val):.1f} A (vinkel {math.degrees(cmath.phase(complex(Ik_min_val))):.1f}°)")
-            log(f"  Ik,max = {abs(Ik_max_val):.1f} A (vinkel {math.degrees(cmath.phase(complex(Ik_max_val))):.1f}°)")
-            log("")
-
-            # Termisk kontrol
-            log("=== Termisk – k²·S² vs I²·t (stikledning) ===")
-            Ik_for_fuse = abs(Ik_min_val)
 
-            try:
-                curve_points, In_curve, Imin_factor = get_fuse_data(
-                    fuse_manu, fuse_type, In
-                )
-            except KeyError:
-                messagebox.showerror(
-                    "Sikring",
-                    "Kunne ikke finde sikringsdata for den valgte type.",
-                )
+        def vis_stik_resultat(res):
+            """Resultat-labels for stikledningen (res=None: ikke beregnet)."""
+            if res is None:
+                for lbl, tekst in stik_labels_tomme.items():
+                    lbl.config(text=tekst)
                 return
 
-            t_trip, fuse_text = fuse_trip_time_explain(
-                In_curve, Ik_for_fuse, curve_points
-            )
-
-            termisk_ok, E_kabel, E_bryde = thermal_ok(
-                k_val, sq, Ik_for_fuse, t_trip
-            )
-
-            log(f"  Ik,min for termisk check = {Ik_for_fuse:.1f} A")
-            log(f"  t (fra sikringskurve) ≈ {t_trip:.4f} s")
-            log(f"  E_kabel = k²·S² = {E_kabel:.1f} A²·s")
-            log(f"  E_bryde = I²·t = {E_bryde:.1f} A²·s")
-            log(f"  Termisk OK? {'JA' if termisk_ok else 'NEJ'}")
-            log("  Detaljer fra sikringskurve:")
-            log(fuse_text)
-            log("")
+            sq = res.sq
+            du = res.du
+            du_pct = res.du_pct
+            Ik_for_fuse = res.Ik_for_fuse
 
             # Opdater resultater i stik-fanen
-            lbl_Iz_nod.config(text=f"Værste Iz,nød (segment): {best_Iz_nod:.1f} A")
+            lbl_Iz_nod.config(
+                text=f"Værste Iz,nød (segment): {res.best_Iz_nod:.1f} A"
+            )
             lbl_sq_valgt.config(text=f"Valgt kabeltværsnit: {sq:.1f} mm²")
             lbl_len_total.config(
-                text=f"Samlet længde stikledning: {total_len:.1f} m"
+                text=f"Samlet længde stikledning: {res.total_len:.1f} m"
             )
             lbl_du.config(
                 text=f"Spændingsfald (DS-formel): {du:.2f} V ({du_pct:.2f} %)"
@@ -706,41 +546,49 @@ if TK_AVAILABLE:
             lbl_Ikmin.config(
                 text=(
                     "Ik_min (ved tavle/måler): "
-                    f"{format_current_with_angle(Ik_min_val)}"
+                    f"{format_current_with_angle(res.Ik_min_val)}"
                 )
             )
             lbl_Ikmax.config(
-                text=f"Ik_max (tavle): {format_current_with_angle(Ik_max_val)}"
+                text=f"Ik_max (tavle): {format_current_with_angle(res.Ik_max_val)}"
             )
 
             lbl_E_kabel.config(
                 text=(
                     f"KB-termisk (k²S² vs. I²·t): "
-                    f"{'OK (k²S² > I²·t)' if termisk_ok else 'IKKE OK (k²S² ≤ I²·t)'}"
+                    f"{'OK (k²S² > I²·t)' if res.termisk_ok else 'IKKE OK (k²S² ≤ I²·t)'}"
                 )
             )
             lbl_sikring_tid.config(
-                text=f"Sikring tidsforløb: Sikring {In:.0f} A, m = Ik/In = "
-                f"{Ik_for_fuse / In:.1f}, t ≈ {t_trip:.4f} s"
+                text=f"Sikring tidsforløb: Sikring {res.In:.0f} A, m = Ik/In = "
+                f"{Ik_for_fuse / res.In:.1f}, t ≈ {res.t_trip:.4f} s"
             )
 
+        def beregn_stik():
+            log("")
+            log("===== STIKLEDNING =====")
+            log("")
+
+            try:
+                inp = les_stik_input()
+                res = cached_beregn_stikledning(get_default_cache(), inp, log)
+            except BeregningsFejl as exc:
+                messagebox.showerror(exc.titel, exc.besked)
+                return
+
+            vis_stik_resultat(res)
+
             # Gem stikdata til grupperne
-            stik_data["U_v"] = U_v
-            stik_data["sq"] = sq
-            stik_data["material"] = material
-            stik_data["total_len"] = total_len
-            stik_data["Ik_min_val"] = Ik_min_val
-            stik_data["Ik_max_val"] = Ik_max_val
-            stik_data["Z_w1_min"] = Z_w1_min
-            stik_data["Z_w1_max"] = Z_w1_max
-            stik_data["cos_load"] = cos_load
-            stik_data["phase"] = phase
-            stik_data["In"] = In
-            stik_data["Kj_jord"] = Kj_jord
-            stik_data["du_stik"] = du
-            stik_data["I_min_supply"] = I_min_supply
-            stik_data["In_source"] = I_min_supply / 5.0 if I_min_supply > 0 else In
-            stik_data["src_txt"] = "I_min,forsyning/5"
+            stik_data["resultat"] = res
+            stik_data["input"] = inp
+
+            # Nyt fortryd-trin: felterne og resultatet hører sammen
+            kontekst = stik_context_from_gui(stik_data, e_Kj, e_Ik_trafo, e_cos_trafo)
+            registrer()
+            udfoer(
+                historik.nu.med_stik(stik_felter()).med_stik_resultat(res, kontekst),
+                "Beregn stikledning",
+            )
 
         btn_beregn_stik = ttk.Button(
             frame_stik_bottom, text="Beregn stikledning", command=beregn_stik
@@ -784,7 +632,22 @@ if TK_AVAILABLE:
 
         group_frames = []
 
-        def add_group():
+        # ------------------------------------------------------------
+        # Fanen "Oversigt" – alle gruppers resultater i én tabel
+        # ------------------------------------------------------------
+        def vis_gruppe(gf):
+            """Dobbeltklik i oversigten: hop til gruppen i fanen 'Grupper'."""
+            if gf not in group_frames:
+                return
+            notebook.select(tab_groups)
+            inner_frame.update_idletasks()
+            height = max(inner_frame.winfo_height(), 1)
+            canvas.yview_moveto(gf.winfo_y() / height)
+
+        oversigt = ResultatOversigt(tab_oversigt, vis_gruppe=vis_gruppe)
+        oversigt.pack(fill="both", expand=True, padx=5, pady=5)
+
+        def _ny_gruppe():
             idx = len(group_frames) + 1
             gf = GroupFrame(
                 master=inner_frame,
@@ -799,17 +662,279 @@ if TK_AVAILABLE:
                 e_cos_load_main=e_cos_load,
                 text_mellem=text_mellem,  # grupper skriver direkte i Mellemregninger
             )
+            gf.on_result = gruppe_resultat
+            gf.on_edit = marker_aendret
             gf.pack(side="top", fill="x", pady=5)
             group_frames.append(gf)
             inner_frame.update_idletasks()
             canvas.configure(scrollregion=canvas.bbox("all"))
+            return gf
+
+        def _fjern_sidste_gruppe():
+            gf = group_frames.pop()
+            aendrede.discard(gf)
+            oversigt.fjern(gf)
+            gf.destroy()
+            inner_frame.update_idletasks()
+            canvas.configure(scrollregion=canvas.bbox("all"))
+
+        def add_group():
+            registrer()
+            gf = _ny_gruppe()
+            udfoer(historik.nu.med_gruppe(gf.felter()), "Tilføj gruppe")
 
         def remove_group():
             if group_frames:
-                gf = group_frames.pop()
-                gf.destroy()
-                inner_frame.update_idletasks()
-                canvas.configure(scrollregion=canvas.bbox("all"))
+                registrer()
+                _fjern_sidste_gruppe()
+                udfoer(historik.nu.uden_gruppe(-1), "Fjern gruppe")
+
+        def gruppe_resultat(gf, grp, res, err):
+            oversigt.opdater(gf, grp, res, err)
+            # Resultatet gemmes i det nuværende trin (det er afledt af
+            # inputtet), så fortryd kan give det tilbage uden genberegning
+            try:
+                kontekst = gf.stik_context()
+            except BeregningsFejl:
+                return
+            if kontekst is None or gf not in group_frames:
+                return
+            registrer()
+            i = group_frames.index(gf)
+            nu = historik.nu.med_gruppe_aendret(i, gf.felter())
+            historik.opdater(nu.med_resultat(i, kontekst, res, err))
+
+        # ------------------------------------------------------------
+        # Fortryd/gentag (history.Historik)
+        # ------------------------------------------------------------
+        aendrede = set()  # grupper med ændringer der ikke er et trin endnu
+        fortryd_data = {"ventende": None}
+
+        def marker_aendret(gf):
+            aendrede.add(gf)
+            if fortryd_data["ventende"] is not None:
+                root.after_cancel(fortryd_data["ventende"])
+            fortryd_data["ventende"] = root.after(FORTRYD_DELAY_MS, registrer)
+
+        def registrer():
+            """Gør ventende gruppe-ændringer til ét fortryd-trin."""
+            if fortryd_data["ventende"] is not None:
+                root.after_cancel(fortryd_data["ventende"])
+                fortryd_data["ventende"] = None
+            if not aendrede:
+                return
+            nu = historik.nu
+            navne = []
+            for i, gf in enumerate(group_frames):
+                if gf not in aendrede:
+                    continue
+                ny = nu.med_gruppe_aendret(i, gf.felter())
+                if ny is not nu:
+                    navne.append(gf.entry_name.get().strip() or f"W{i + 1}")
+                    nu = ny
+            aendrede.clear()
+            if navne:
+                udfoer(nu, "Ret " + ", ".join(navne))
+
+        def udfoer(projekt, tekst):
+            historik.udfoer(projekt, tekst)
+            opdater_knapper()
+
+        def gendan(projekt, forrige):
+            """Sætter felter og resultater tilbage fra et øjebliksbillede."""
+            # Stikledningen er kun et trin når den beregnes, så felter og
+            # resultat skiftes sammen
+            if projekt.stik is not forrige.stik and projekt.stik is not None:
+                saet_stik_felter(projekt.stik)
+                stik_res = projekt.stik_resultat
+                stik_inp = None
+                if stik_res is not None:
+                    try:
+                        stik_inp = les_stik_input()
+                    except BeregningsFejl:
+                        stik_res = None
+                stik_data["resultat"] = stik_res
+                stik_data["input"] = stik_inp
+                vis_stik_resultat(stik_res)
+
+            while len(group_frames) > len(projekt.grupper):
+                _fjern_sidste_gruppe()
+            while len(group_frames) < len(projekt.grupper):
+                _ny_gruppe()
+
+            samme_kontekst = projekt.stik_kontekst is forrige.stik_kontekst
+            n_forrige = len(forrige.grupper)
+            for i, (gf, felter) in enumerate(zip(group_frames, projekt.grupper)):
+                if (
+                    samme_kontekst
+                    and i < n_forrige
+                    and forrige.grupper[i] is felter
+                    and forrige.resultater[i] is projekt.resultater[i]
+                ):
+                    continue  # urørt gruppe (delt med forrige billede)
+                if gf.felter() != felter:
+                    gf.saet_felter(felter)
+                r = projekt.resultat(i)
+                if r is None:
+                    gf.nulstil_resultat()
+                    oversigt.fjern(gf)
+                    continue
+                res, err = r
+                if res is not None:
+                    gf.apply_result(res)
+                else:
+                    gf.nulstil_resultat()
+                try:
+                    oversigt.opdater(gf, gf.snapshot(), res, err)
+                except BeregningsFejl:
+                    oversigt.fjern(gf)
+
+        def fortryd(event=None):
+            registrer()
+            if historik.kan_fortryde:
+                forrige = historik.nu
+                gendan(historik.fortryd(), forrige)
+                opdater_knapper()
+            return "break"
+
+        def gentag(event=None):
+            registrer()
+            if historik.kan_gentage:
+                forrige = historik.nu
+                gendan(historik.gentag(), forrige)
+                opdater_knapper()
+            return "break"
+
+        def opdater_knapper():
+            if historik.kan_fortryde:
+                btn_fortryd.config(
+                    state="normal", text=f"Fortryd: {historik.fortryd_tekst()}"
+                )
+            else:
+                btn_fortryd.config(state="disabled", text="Fortryd")
+            if historik.kan_gentage:
+                btn_gentag.config(
+                    state="normal", text=f"Gentag: {historik.gentag_tekst()}"
+                )
+            else:
+                btn_gentag.config(state="disabled", text="Gentag")
+
+        def recalc_all_groups():
+            """Genberegner alle grupper parallelt mod den aktuelle stikledning."""
+            if stik_data["resultat"] is None:
+                messagebox.showerror(
+                    "Grupper – stikledning",
+                    "Beregn først stikledningen i hovedfanen, så grupperne kan bruge data.",
+                )
+                return
+            try:
+                stik = stik_context_from_gui(stik_data, e_Kj, e_Ik_trafo, e_cos_trafo)
+            except BeregningsFejl as exc:
+                messagebox.showerror(exc.titel, exc.besked)
+                return
+
+            errors = []
+            snapshots = []
+            for gf in group_frames:
+                try:
+                    snapshots.append((gf, gf.snapshot()))
+                except BeregningsFejl as exc:
+                    errors.append(f"{gf.cget('text')}: {exc.besked}")
+
+            root.config(cursor="watch")
+            root.update_idletasks()
+            try:
+                results = cached_beregn_alle_grupper(
+                    get_default_cache(), [g for _, g in snapshots], stik
+                )
+            finally:
+                root.config(cursor="")
+
+            log_parts = []
+            for (gf, grp), (res, err, trace) in zip(snapshots, results):
+                log_parts.extend(trace.lines())
+                if err is not None:
+                    errors.append(f"{grp.name}: {err[1]}")
+                else:
+                    gf.apply_result(res)
+                gf.meld_resultat(grp, res, err)
+            if log_parts:
+                text_mellem.insert("end", "\n".join(log_parts) + "\n")
+                text_mellem.see("end")
+
+            if errors:
+                messagebox.showwarning(
+                    "Grupper – fejl",
+                    f"{len(errors)} gruppe(r) kunne ikke beregnes:\n\n"
+                    + "\n".join(errors),
+                )
+
+        def export_report():
+            """Skriver stikledning + alle grupper til HTML og PDF i baggrunden."""
+            if stik_data["resultat"] is None:
+                messagebox.showerror(
+                    "Rapport – stikledning",
+                    "Beregn først stikledningen i hovedfanen, før der eksporteres.",
+                )
+                return
+            try:
+                stik = stik_context_from_gui(stik_data, e_Kj, e_Ik_trafo, e_cos_trafo)
+            except BeregningsFejl as exc:
+                messagebox.showerror(exc.titel, exc.besked)
+                return
+
+            groups = []
+            errors = []
+            for gf in group_frames:
+                try:
+                    groups.append(gf.snapshot())
+                except BeregningsFejl as exc:
+                    errors.append(f"{gf.cget('text')}: {exc.besked}")
+            if errors:
+                messagebox.showerror(
+                    "Rapport – gruppe-input",
+                    "Ret input i følgende grupper før eksport:\n\n" + "\n".join(errors),
+                )
+                return
+
+            html_path = filedialog.asksaveasfilename(
+                title="Eksportér rapport",
+                defaultextension=".html",
+                filetypes=[("HTML", "*.html")],
+            )
+            if not html_path:
+                return
+            base = os.path.splitext(html_path)[0]
+            pdf_path = base + ".pdf"
+            json_path = base + ".json"  # spor af mellemregningerne til revision
+
+            btn_export.config(state="disabled")
+            future = _report_executor.submit(
+                export_project, html_path, pdf_path, stik_data["input"], stik, groups,
+                json_path=json_path,
+            )
+            root.after(100, _poll_export, future)
+
+        def _poll_export(future):
+            if not future.done():
+                root.after(100, _poll_export, future)
+                return
+            btn_export.config(state="normal")
+            try:
+                info = future.result()
+            except BeregningsFejl as exc:
+                messagebox.showerror(exc.titel, exc.besked)
+                return
+            except OSError as exc:
+                messagebox.showerror("Rapport – fil", str(exc))
+                return
+            besked = (
+                f"{info['groups']} gruppe(r) eksporteret på {info['sekunder']:.1f} s:\n\n"
+                f"{info['html']}\n{info['pdf']}\n{info['json']}"
+            )
+            if info["fejl"]:
+                besked += f"\n\n{info['fejl']} gruppe(r) kunne ikke beregnes (se rapporten)."
+            messagebox.showinfo("Rapport", besked)
 
         btn_frame = ttk.Frame(frame_groups_main)
         btn_frame.pack(side="top", fill="x", pady=5)
@@ -820,8 +945,30 @@ if TK_AVAILABLE:
         ttk.Button(btn_frame, text="- Gruppe", command=remove_group).pack(
             side="left", padx=5
         )
+        ttk.Button(
+            btn_frame, text="Beregn alle grupper", command=recalc_all_groups
+        ).pack(side="left", padx=5)
+        btn_export = ttk.Button(
+            btn_frame, text="Eksportér rapport…", command=export_report
+        )
+        btn_export.pack(side="left", padx=5)
+
+        _ny_gruppe()  # første gruppe
+
+        # Startbilledet er ikke et trin i sig selv
+        historik = Historik(
+            Projekt.fra(stik_felter(), [gf.felter() for gf in group_frames])
+        )
+
+        btn_fortryd = ttk.Button(frame_historik, text="Fortryd", command=fortryd)
+        btn_fortryd.pack(side="left", padx=5)
+        btn_gentag = ttk.Button(frame_historik, text="Gentag", command=gentag)
+        btn_gentag.pack(side="left", padx=5)
+        opdater_knapper()
 
-        add_group()  # første gruppe
+        root.bind_all("<Control-z>", fortryd)
+        root.bind_all("<Control-y>", gentag)
+        root.bind_all("<Control-Shift-Z>", gentag)
 
         root.mainloop()
 
@@ -0,0 +1,86 @@
+"""
+Struktureret sporing af mellemregningerne.
+
+Beregningerne skriver ikke længere færdig tekst, men korte poster
+
+    (nøgle, værdier)
+
+fx ("gruppe.ovl_seg", (1, "C", 12.0, 3, 1.0, 1.0, 0.8, 16.0, 20.0, 27.0, 21.6)).
+Nøglen peger på en dansk tekstskabelon, som engine-modulerne registrerer
+med register(). Teksten dannes først når sporet vises (lines()), så en
+batch-kørsel kun betaler for at gemme tuples.
+
+Skabelonerne er enten str.format-tekster med positionelle felter (må
+indeholde flere linjer) eller funktioner værdier → tekst.
+
+Et spor kan gemmes som JSON (to_jsonable/from_jsonable, dumps/loads) –
+trin-nummer, nøgle og værdier – til dokumentation og revision.
+"""
+
+import codec
+
+# nøgle → skabelon (str eller funktion)
+TEMPLATES = {}
+
+
+def register(templates: dict):
+    """Registrerer tekstskabeloner (kaldes af engine-modulerne ved import)."""
+    TEMPLATES.update(templates)
+
+
+def render_entry(key: str, values) -> str:
+    tpl = TEMPLATES[key]
+    if callable(tpl):
+        return tpl(*values)
+    return tpl.format(*values)
+
+
+def no_trace(key: str, *values):
+    """Bruges når ingen vil se mellemregningerne."""
+
+
+class Trace:
+    """Liste af (nøgle, værdier) i beregningsrækkefølge."""
+
+    __slots__ = ("entries",)
+
+    def __init__(self, entries=None):
+        self.entries = [] if entries is None else entries
+
+    def add(self, key: str, *values):
+        self.entries.append((key, values))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lines(self, start: int = 0):
+        """Mellemregningerne som tekstlinjer (dannes her)."""
+        out = []
+        for key, values in self.entries[start:]:
+            out.extend(render_entry(key, values).split("\n"))
+        return out
+
+    def replay(self, log, start: int = 0):
+        """Sender de dannede linjer til log(linje)."""
+        for line in self.lines(start):
+            log(line)
+
+    # ------------------------------------------------------------------
+    # JSON
+    # ------------------------------------------------------------------
+    def to_jsonable(self):
+        return [
+            {"step": i, "key": key, "values": codec.to_jsonable(values)}
+            for i, (key, values) in enumerate(self.entries)
+        ]
+
+    @classmethod
+    def from_jsonable(cls, data):
+        return cls([(d["key"], tuple(d["values"])) for d in data])
+
+    def dumps(self) -> str:
+        return codec.dumps(self.to_jsonable())
+
+    @classmethod
+    def loads(cls, text: str):
+        return cls.from_jsonable(codec.loads(text))
@@ -1,5 +1,8 @@
 import math
 import cmath
+from array import array
+from bisect import bisect_left, bisect_right
+from operator import mul
 
 from Tabel import (
     KTEMP_LUFT,
@@ -78,9 +81,50 @@ INSTALL_METHODS = _build_install_methods()
 INSTALL_TEXTS = [t[2] for t in INSTALL_METHODS]
 
 # ---------------------------------------------------------------------------
-# Temperaturfaktor Kt ud fra KTEMP-tabeller
+# Korrektionsfaktorer – Kt (KTEMP-tabeller) og kgrp (KGRP-tabeller)
 # ---------------------------------------------------------------------------
 
+# Tabellerne kompileres én gang ved import:
+#   - KTEMP_LUFT/KTEMP_JORD -> sorterede temperatur- og faktor-arrays pr. miljø
+#   - KGRP[ref]             -> tæt array indekseret med ks (nærmeste lavere n
+#                              er slået op på forhånd)
+# Hver ref-metode får sit eget kgrp-array, så KGRP kan få forskellige
+# tabeller pr. metode (i dag er de kopier af KGRP_ROW).
+
+ENVIRONMENTS = ("luft", "jord")
+
+_KT_TABLES = {"luft": KTEMP_LUFT, "jord": KTEMP_JORD}
+
+
+def _compile_kt(table):
+    temps = sorted(table)
+    return array("d", temps), array("d", (table[t] for t in temps))
+
+
+KT_COMPILED = {env: _compile_kt(tab) for env, tab in _KT_TABLES.items()}
+
+
+def _compile_kgrp(table):
+    """ks -> kgrp for ks = 0..max(ks); under første n i tabellen er kgrp 1,0."""
+    if not table:
+        return array("d", [1.0])
+    ns = sorted(table)
+    dense = array("d", [1.0]) * (ns[-1] + 1)
+    for n_lo, n_hi in zip(ns, ns[1:] + [ns[-1] + 1]):
+        for n in range(n_lo, n_hi):
+            dense[n] = table[n_lo]
+    return dense
+
+
+KGRP_COMPILED = {ref: _compile_kgrp(tab) for ref, tab in KGRP.items()}
+_KGRP_NONE = array("d", [1.0])
+
+# Installationsnummer -> miljø ("luft"/"jord")
+ENV_BY_INSTALL_NR = {
+    nr: (data.get("miljo", "luft") if isinstance(data, dict) else "luft")
+    for nr, data in INSTALLATIONSMETODER.items()
+}
+
 
 def lookup_Kt(env: str, T_amb: float) -> float:
     """
@@ -91,62 +135,111 @@ def lookup_Kt(env: str, T_amb: float) -> float:
 
     Der interpoleres lineært mellem nærmeste punkter i KTEMP-tabellerne.
     """
-    if env == "luft":
-        table = KTEMP_LUFT
-    elif env == "jord":
-        table = KTEMP_JORD
-    else:
+    try:
+        temps, values = KT_COMPILED[env]
+    except KeyError:
         raise ValueError(f"Ugyldigt miljø for Kt: {env}")
 
-    temps = sorted(table.keys())
-
     # Hvis T_amb ligger udenfor tabellen, brug kanten
     if T_amb <= temps[0]:
-        return table[temps[0]]
+        return values[0]
     if T_amb >= temps[-1]:
-        return table[temps[-1]]
+        return values[-1]
+
+    # Interval t1 < T_amb <= t2
+    i = bisect_left(temps, T_amb) - 1
+    t1 = temps[i]
+    K1 = values[i]
+    ratio = (T_amb - t1) / (temps[i + 1] - t1)
+    return K1 + ratio * (values[i + 1] - K1)
+
+
+def lookup_kgrp(ref_method: str, n_samlet: int) -> float:
+    """
+    Samlefaktor kgrp for ref-metoden ved n_samlet kabler (nærmeste lavere
+    n i KGRP-tabellen). Ukendte ref-metoder og n < 1 giver 1,0.
+    """
+    dense = KGRP_COMPILED.get(ref_method or "C", _KGRP_NONE)
+    if n_samlet < 1:
+        return 1.0
+    if n_samlet >= len(dense):
+        return dense[-1]
+    return dense[n_samlet]
 
-    # Find interval
-    for t1, t2 in zip(temps[:-1], temps[1:]):
-        if t1 <= T_amb <= t2:
-            K1 = table[t1]
-            K2 = table[t2]
-            ratio = (T_amb - t1) / (t2 - t1)
-            return K1 + ratio * (K2 - K1)
 
-    # fallback (burde ikke ske)
+def kj_for_segment(ref_method: str, Kj_jord: float) -> float:
+    """
+    Jordtemperaturfaktor Kj for et segment: D2 (rør i jord) bruger fast
+    1,5, D1 bruger Kj_jord fra hovedfanen, og metoder i luft 1,0.
+    """
+    if ref_method == "D2":
+        return 1.5
+    if ref_method == "D1":
+        return Kj_jord
     return 1.0
 
 
+def derating_batch(envs, temps, refs, ns):
+    """
+    Kt·kgrp for mange segmenter på én gang.
+
+    envs:  "luft"/"jord" pr. segment
+    temps: omgivelsestemperatur [°C]
+    refs:  ref-metode ("C", "D1", ...)
+    ns:    antal kabler samlet (ks)
+
+    Returnerer et array('d').
+    """
+    return array(
+        "d", map(mul, map(lookup_Kt, envs, temps), map(lookup_kgrp, refs, ns))
+    )
+
+
 # ---------------------------------------------------------------------------
 # Iz-lookup for XLPE-kabler
 # ---------------------------------------------------------------------------
 
 
+def _compile_iz():
+    """
+    (materiale, ref, ledere) -> array over STANDARD_SIZES med Iz for
+    nærmeste lavere tværsnit i tabellen (NaN = ingen data).
+    """
+    compiled = {}
+    for material, table in (("Cu", IZ_TABLE), ("Al", IZ_TABLE_AL)):
+        for ref, by_cores in table.items():
+            for cores, core_data in by_cores.items():
+                sizes = sorted(core_data)
+                row = array("d", [math.nan]) * len(STANDARD_SIZES)
+                for i, sq in enumerate(STANDARD_SIZES):
+                    j = bisect_right(sizes, sq) - 1
+                    if j >= 0:
+                        row[i] = core_data[sizes[j]]
+                compiled[(material, ref, cores)] = row
+    return compiled
+
+
+IZ_COMPILED = _compile_iz()
+
+
 def lookup_iz_xlpe(material: str, ref_method: str, cores: int, sq: float) -> float:
     """
     Opslag af Iz (tilladelig strøm) for XLPE-kabel i tabellen IZ_TABLE / IZ_TABLE_AL.
     Returnerer None hvis der ikke er data.
-    """
-    table = IZ_TABLE if material == "Cu" else IZ_TABLE_AL
 
-    try:
-        core_data = table[ref_method][cores]
-    except KeyError:
+    Tværsnit der ikke står i tabellen bruger nærmeste lavere tværsnit.
+    Opslaget sker i IZ_COMPILED; heltal i tabellen returneres som int.
+    """
+    row = IZ_COMPILED.get(("Cu" if material == "Cu" else "Al", ref_method, cores))
+    if row is None:
         return None
-
-    # Direkte opslag
-    if sq in core_data:
-        return core_data[sq]
-
-    # Hvis ikke direkte i tabellen, brug nærmeste lavere tværsnit
-    sizes = sorted(core_data.keys())
-    lower = [s for s in sizes if s <= sq]
-    if not lower:
+    i = bisect_right(STANDARD_SIZES, sq) - 1
+    if i < 0:
         return None
-
-    sq_use = max(lower)
-    return core_data[sq_use]
+    iz = row[i]
+    if iz != iz:
+        return None
+    return int(iz) if iz.is_integer() else iz
 
 
 # ---------------------------------------------------------------------------
@@ -197,6 +290,104 @@ def _lookup_XL_km(material: str, sq: float, phase: str) -> float:
     return mat_data[sq]
 
 
+# ---------------------------------------------------------------------------
+# Forudberegnet impedansmatrix (bygges én gang ved import)
+# ---------------------------------------------------------------------------
+
+PHASES = ("1-faset", "3-faset")
+R_FACTORS = (1.0, 1.5)
+
+# Indeks i STANDARD_SIZES for hvert tværsnit – bruges af batch-API'et
+SIZE_INDEX = {s: i for i, s in enumerate(STANDARD_SIZES)}
+
+_Z_NAN = complex(math.nan, math.nan)
+
+
+def _build_RX_km():
+    """
+    (materiale, tværsnit, fasesystem) -> (R_km, XL_km)
+
+    Kombinationer uden data i NKT_R/NKT_XL kommer ikke med, så opslag
+    giver KeyError ligesom tidligere.
+    """
+    rx = {}
+    for material, r_tab in NKT_R.items():
+        for sq, R_km in r_tab.items():
+            for phase in PHASES:
+                try:
+                    XL_km = _lookup_XL_km(material, sq, phase)
+                except KeyError:
+                    continue
+                rx[(material, float(sq), phase)] = (R_km, XL_km)
+    return rx
+
+
+_RX_KM = _build_RX_km()
+
+
+def _compile_rx():
+    """
+    (materiale, fasesystem) -> (R-array, X-array) [Ω/km] over STANDARD_SIZES
+    (NaN = ingen data). Bruges af cable_impedance_NKT.
+    """
+    compiled = {}
+    for material in NKT_R:
+        for phase in PHASES:
+            R_row = array("d", [math.nan]) * len(STANDARD_SIZES)
+            X_row = array("d", [math.nan]) * len(STANDARD_SIZES)
+            for i, sq in enumerate(STANDARD_SIZES):
+                rx = _RX_KM.get((material, float(sq), phase))
+                if rx is not None:
+                    R_row[i], X_row[i] = rx
+            compiled[(material, phase)] = (R_row, X_row)
+    return compiled
+
+
+RX_COMPILED = _compile_rx()
+
+
+def _build_Z_km_matrix():
+    """
+    Z_KM_MATRIX[(materiale, fasesystem, R_factor)][size_idx] = R_factor·R + jX
+
+    Rækkerne følger STANDARD_SIZES; manglende data er NaN+NaNj.
+    """
+    matrix = {}
+    for material in NKT_R:
+        for phase in PHASES:
+            for R_factor in R_FACTORS:
+                row = []
+                for sq in STANDARD_SIZES:
+                    rx = _RX_KM.get((material, float(sq), phase))
+                    if rx is None:
+                        row.append(_Z_NAN)
+                    else:
+                        row.append(complex(R_factor * rx[0], rx[1]))
+                matrix[(material, phase, R_factor)] = tuple(row)
+    return matrix
+
+
+Z_KM_MATRIX = _build_Z_km_matrix()
+
+# Samme matrix pr. meter, så batch-kaldet kun skal gange med længden
+_Z_M_MATRIX = {
+    key: tuple(z / 1000.0 for z in row) for key, row in Z_KM_MATRIX.items()
+}
+
+
+def impedance_row_m(material: str, phase: str, R_factor: float = 1.5):
+    """
+    R_factor·R + jX [Ω/m] for hvert tværsnit i STANDARD_SIZES (NaN+NaNj
+    uden data). KeyError hvis der ikke er data for materiale/fasesystem.
+    """
+    row = _Z_M_MATRIX.get((material, phase, R_factor))
+    if row is None:
+        # R_factor uden forudberegnet række (fx i Monte Carlo)
+        base = _Z_M_MATRIX[(material, phase, 1.0)]
+        row = tuple(complex(R_factor * z.real, z.imag) for z in base)
+    return row
+
+
 def cable_impedance_NKT(
     L_m: float,
     material: str,
@@ -212,12 +403,36 @@ def cable_impedance_NKT(
 
     Returnerer kompleks impedans Z = R + jX [Ω].
     """
-    R_km = NKT_R[material][sq]
-    XL_km = _lookup_XL_km(material, sq, phase)
+    R_row, X_row = RX_COMPILED[(material, phase)]
+    i = SIZE_INDEX[sq]
+    R_km = R_row[i]
+    if R_km != R_km:
+        raise KeyError((material, sq, phase))
+    XL_km = X_row[i]
     z_per_km = R_factor * R_km + 1j * XL_km
     return (L_m / 1000.0) * z_per_km
 
 
+def cable_impedance_batch(
+    lengths,
+    size_idx,
+    material: str,
+    phase: str,
+    R_factor: float = 1.5,
+):
+    """
+    Kabelimpedanser for mange kabler på én gang.
+
+    lengths:  længder [m]
+    size_idx: indeks i STANDARD_SIZES (se SIZE_INDEX)
+
+    Returnerer en liste af komplekse impedanser [Ω]. Tværsnit uden
+    R/X-data giver NaN+NaNj.
+    """
+    row = impedance_row_m(material, phase, R_factor)
+    return list(map(mul, lengths, map(row.__getitem__, size_idx)))
+
+
 # ---------------------------------------------------------------------------
 # Ik,min – stikledning og grupper
 # ---------------------------------------------------------------------------
@@ -0,0 +1,46 @@
+"""
+JSON-kodning af beregningsinput og -resultater.
+
+Resultaterne indeholder komplekse tal (impedanser, Ik med vinkel), som
+json ikke kender. De kodes som {"__complex__": [re, im]} og genskabes
+af loads(). Records (dataclasses) skrives som dicts og enums som deres
+tekst; records.from_dict() bygger dem op igen. dumps() sorterer
+nøglerne, så samme indhold altid giver samme tekst – det bruges til
+cache-nøgler.
+"""
+
+import json
+from dataclasses import fields, is_dataclass
+from enum import Enum
+
+
+def to_jsonable(obj):
+    """Konverterer rekursivt til typer json kan skrive."""
+    if isinstance(obj, complex):
+        return {"__complex__": [obj.real, obj.imag]}
+    if isinstance(obj, Enum):
+        return str(obj)
+    if is_dataclass(obj):
+        return {f.name: to_jsonable(getattr(obj, f.name)) for f in fields(obj)}
+    if isinstance(obj, dict):
+        return {str(k): to_jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_jsonable(v) for v in obj]
+    return obj
+
+
+def _object_hook(d):
+    if len(d) == 1 and "__complex__" in d:
+        re, im = d["__complex__"]
+        return complex(re, im)
+    return d
+
+
+def dumps(obj) -> str:
+    return json.dumps(
+        to_jsonable(obj), sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    )
+
+
+def loads(text: str):
+    return json.loads(text, object_hook=_object_hook)
@@ -0,0 +1,190 @@
+"""
+Beregnings-dæmon på en Unix-socket.
+
+    python daemon.py [socket] [tråde]
+
+    python daemon_client.py kald metode [params.json]
+    python daemon_client.py stop
+
+Hvert kommandolinjekald betaler ellers opstart af Python, import af Tabel
+og kompilering af tabellerne før første beregning. Dæmonen holder alt
+det – plus en LRU-cache af svar – i hukommelsen, og klienten
+(daemon_client, som ikke importerer beregningerne) sender blot én linje
+over en lokal Unix-socket, så en enkelt gruppe svarer på få
+millisekunder.
+
+Protokollen er den samme som stdio_worker (NDJSON, metoder fra
+service_api), bortset fra at der ikke sendes nogen "klar"-linje: kan man
+forbinde, er dæmonen klar. Metoden "stop" lukker dæmonen.
+"""
+
+import os
+import socket
+import socketserver
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import codec
+import service_api
+from daemon_client import DEFAULT_SOCKET, DaemonFejl
+from stdio_worker import DEFAULT_THREADS, StdioWorker
+
+# Antal svar i LRU-cachen
+CACHE_STOERRELSE = 4096
+
+# Metoder hvis svar ikke caches
+_UCACHEDE = {"status"}
+
+
+# ---------------------------------------------------------------------------
+# Svar-cache
+# ---------------------------------------------------------------------------
+
+
+class SvarCache:
+    """LRU-cache (metode, params) → svar; nøglen er codec.dumps af begge."""
+
+    def __init__(self, stoerrelse: int = CACHE_STOERRELSE):
+        self.stoerrelse = stoerrelse
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def hent(self, method: str, params):
+        if method in _UCACHEDE or self.stoerrelse <= 0:
+            return service_api.handle(method, params)
+        key = codec.dumps([method, params])
+        with self._lock:
+            svar = self._data.get(key)
+            if svar is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return svar
+            self.misses += 1
+        svar = service_api.handle(method, params)
+        with self._lock:
+            self._data[key] = svar
+            if len(self._data) > self.stoerrelse:
+                self._data.popitem(last=False)
+        return svar
+
+
+# ---------------------------------------------------------------------------
+# Dæmon
+# ---------------------------------------------------------------------------
+
+
+class _Forbindelse(StdioWorker):
+    """Én klientforbindelse; delt trådpulje og cache fra dæmonen."""
+
+    def __init__(self, inp, out, daemon):
+        super().__init__(inp, out, pool=daemon.pool)
+        self.daemon = daemon
+
+    def _handle(self, method: str, params):
+        if method == "stop":
+            self.daemon.stop()
+            return {"stopper": True}
+        if method == "status":
+            svar = service_api.handle(method, params)
+            return dict(
+                svar,
+                pid=os.getpid(),
+                cache={"hits": self.daemon.cache.hits,
+                       "misses": self.daemon.cache.misses},
+            )
+        return self.daemon.cache.hent(method, params)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        _Forbindelse(self.rfile, self.wfile, self.server.daemon).run(hilsen=False)
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class CalcDaemon:
+    """Unix-socket-server der sender forespørgsler videre til service_api."""
+
+    def __init__(self, sti: str = DEFAULT_SOCKET, threads: int = DEFAULT_THREADS,
+                 cache: int = CACHE_STOERRELSE):
+        self.sti = sti
+        self.pool = ThreadPoolExecutor(
+            max_workers=max(1, threads), thread_name_prefix="daemon"
+        )
+        self.cache = SvarCache(cache)
+        self._socket_lock = threading.Lock()
+        self._socket_fjernet = False
+        _fjern_gammel_socket(sti)
+        self.server = _Server(sti, _Handler)
+        self.server.daemon = self
+        # tabeller og records importeres/kompileres før første forespørgsel
+        service_api.handle("status", {})
+
+    def serve_forever(self):
+        try:
+            self.server.serve_forever()
+        finally:
+            self.close()
+
+    def stop(self):
+        """
+        Fjerner socket-filen med det samme og lukker server-løkken i
+        baggrunden. Svaret på "stop" sendes først når filen er væk, så en
+        dæmon der startes lige efter, ikke afvises med "kører allerede".
+        """
+        self._fjern_socket()
+        threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+    def close(self):
+        self.server.server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self._fjern_socket()
+
+    def _fjern_socket(self):
+        # kun én gang: efter stop() kan en ny dæmon allerede have oprettet
+        # en socket på samme sti
+        with self._socket_lock:
+            if self._socket_fjernet:
+                return
+            self._socket_fjernet = True
+            try:
+                os.unlink(self.sti)
+            except OSError:
+                pass
+
+
+def _fjern_gammel_socket(sti: str):
+    """Sletter en efterladt socket-fil; rejser DaemonFejl hvis dæmonen kører."""
+    if not os.path.exists(sti):
+        return
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        s.connect(sti)
+    except OSError:
+        os.unlink(sti)
+        return
+    finally:
+        s.close()
+    raise DaemonFejl(f"Der kører allerede en dæmon på {sti}.")
+
+
+def main(sti: str = DEFAULT_SOCKET, threads: int = DEFAULT_THREADS):
+    d = CalcDaemon(sti, threads)
+    print(f"Beregningsdæmon kører på {sti}", flush=True)
+    try:
+        d.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main(
+        sys.argv[1] if len(sys.argv) > 1 else DEFAULT_SOCKET,
+        int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_THREADS,
+    )
@@ -0,0 +1,136 @@
+"""
+Tynd klient til beregnings-dæmonen (daemon.py).
+
+    python daemon_client.py kald metode [params.json]  (- = stdin)
+    python daemon_client.py stop [socket]
+
+Importerer kun standardbiblioteket og codec – ikke Tabel eller
+beregningerne – så et kald koster Python-opstart plus én tur over
+socketen. Svaret skrives som JSON på stdout. Socket-stien kan også
+angives med miljøvariablen KABEL_DAEMON_SOCKET.
+
+Kører dæmonen ikke, regner kald() selv i processen (lokal=True), så
+scripts virker med og uden dæmon.
+"""
+
+import os
+import socket
+import sys
+import tempfile
+
+import codec
+
+DEFAULT_SOCKET = os.environ.get("KABEL_DAEMON_SOCKET") or os.path.join(
+    tempfile.gettempdir(),
+    f"kabelberegning-{os.getuid() if hasattr(os, 'getuid') else 0}.sock",
+)
+
+
+class DaemonFejl(Exception):
+    """Dæmonen kører ikke, eller forbindelsen gik tabt."""
+
+
+class ForespoergselsFejl(ValueError):
+    """Dæmonen afviste forespørgslen (svarer til service_api.ApiFejl)."""
+
+
+class Klient:
+    """Forbindelse til dæmonen; kald() kan bruges mange gange."""
+
+    def __init__(self, sti: str = DEFAULT_SOCKET, timeout: float = None):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        try:
+            self.sock.connect(sti)
+        except OSError as exc:
+            self.sock.close()
+            raise DaemonFejl(f"Ingen dæmon på {sti}: {exc}")
+        self._rfile = self.sock.makefile("rb")
+        self._next_id = 0
+
+    def kald(self, method: str, params=None):
+        """
+        Svar fra dæmonen. Fejl i forespørgslen rejses som
+        ForespoergselsFejl, fejl på dæmonens side som DaemonFejl.
+        """
+        self._next_id += 1
+        req = {"id": self._next_id, "metode": method, "params": params or {}}
+        try:
+            self.sock.sendall((codec.dumps(req) + "\n").encode("utf-8"))
+            line = self._rfile.readline()
+        except OSError as exc:
+            raise DaemonFejl(f"Forbindelsen til dæmonen fejlede: {exc}")
+        if not line:
+            raise DaemonFejl("Dæmonen lukkede forbindelsen.")
+        svar = codec.loads(line.decode("utf-8"))
+        if svar.get("ok"):
+            return svar["svar"]
+        fejl = svar.get("fejl") or {}
+        if fejl.get("titel") == "Forespørgsel":
+            raise ForespoergselsFejl(fejl.get("besked", ""))
+        raise DaemonFejl(f"{fejl.get('titel')}: {fejl.get('besked')}")
+
+    def close(self):
+        self._rfile.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _lokalt(method: str, params):
+    import service_api  # først her – det er den tunge import
+
+    try:
+        return service_api.handle(method, params)
+    except service_api.ApiFejl as exc:
+        raise ForespoergselsFejl(str(exc))
+
+
+def kald(method: str, params=None, sti: str = DEFAULT_SOCKET, lokal: bool = True):
+    """Én forespørgsel via dæmonen; uden dæmon regnes lokalt hvis lokal=True."""
+    try:
+        klient = Klient(sti)
+    except DaemonFejl:
+        if not lokal:
+            raise
+        return _lokalt(method, params or {})
+    with klient:
+        return klient.kald(method, params)
+
+
+def _main(argv):
+    cmd = argv[1] if len(argv) > 1 else ""
+    if cmd == "stop":
+        sti = argv[2] if len(argv) > 2 else DEFAULT_SOCKET
+        try:
+            kald("stop", sti=sti, lokal=False)
+        except DaemonFejl as exc:
+            print(f"Fejl: {exc}", file=sys.stderr)
+            return 1
+        return 0
+    if cmd == "kald" and len(argv) > 2:
+        params = {}
+        if len(argv) > 3:
+            if argv[3] == "-":
+                text = sys.stdin.read()
+            else:
+                with open(argv[3], encoding="utf-8") as f:
+                    text = f.read()
+            params = codec.loads(text)
+        try:
+            svar = kald(argv[2], params)
+        except (ForespoergselsFejl, DaemonFejl) as exc:
+            print(f"Fejl: {exc}", file=sys.stderr)
+            return 2
+        print(codec.dumps(svar))
+        return 0
+    print("\n".join(__doc__.strip().splitlines()[2:4]), file=sys.stderr)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv))
@@ -0,0 +1,265 @@
+"""
+Billigste gyldige design for én gruppe (branch-and-bound).
+
+Auto-tværsnit i group_engine går kun tværsnittene igennem for et fast
+materiale og en fast installationsmetode. Her søges over
+
+    materiale (Cu/Al) × reference-metode (fra INSTALL_METHODS) × STANDARD_SIZES
+
+mod en pristabel (kabelpris pr. meter pr. tværsnit og montage pr. meter
+pr. metode), og det billigste design der består Iz, ΔU, Ik,min og den
+termiske kontrol returneres. Selve kontrollen er group_engine.beregn_gruppe
+med gruppen låst til det pågældende design, så reglerne er de samme som
+ellers.
+
+Beskæring (alle tjek før beregn_gruppe er rene tabelopslag):
+
+  - ΔU-minimum: ΔU falder med S, så det mindste tværsnit der kan klare
+    ΔU-kravet findes lukket (S ≥ b·q·L·cosφ·I / (ΔU_rest − b·λ·L·sinφ·I))
+    og alle mindre tværsnit springes over med bisect. Er der ingen
+    ΔU-rest, droppes materialet helt.
+  - Iz: tværsnit under det første der klarer In ≤ Iz,korr i alle
+    segmenter springes over (pr. metode).
+  - Pris: hver (materiale, metode) har en nedre grænse = prisen ved det
+    første mulige tværsnit; grene gennemgås billigste først og stoppes,
+    så snart grænsen ikke kan slå det bedste fundne. Inden for en gren er
+    det første gyldige tværsnit også det billigste.
+
+Prisen antages at stige med tværsnittet (som i DEFAULT_COSTS).
+
+Flyttes et segment til en anden metode, slås samlefaktoren op igen for
+den nye metode ved segmentets antal samlede kabler (n_samlet). Kendes
+antallet ikke, bruges det største antal der passer med segmentets kgrp
+for den oprindelige metode – så en anden metode aldrig får en højere
+kgrp end den kan have.
+"""
+
+from bisect import bisect_left
+from dataclasses import replace
+
+from calculations import (
+    INSTALL_METHODS,
+    KGRP_COMPILED,
+    LAMBDA_MATERIAL,
+    Q_MATERIAL,
+    STANDARD_SIZES,
+    lookup_iz_xlpe,
+    lookup_kgrp,
+    lookup_Kt,
+    voltage_drop_ds,
+)
+from group_engine import BeregningsFejl, beregn_gruppe, group_candidate_sizes, iz_ok
+from records import DesignChoice, GroupInput, Material, RefMethod, StikContext
+
+# Vejledende priser [kr/m] – erstattes af firmaets egne tal via costs=
+DEFAULT_COSTS = {
+    "kabel": {
+        "Cu": {S: round(6.0 + 2.4 * S, 2) for S in STANDARD_SIZES},
+        "Al": {S: round(14.0 + 0.9 * S, 2) for S in STANDARD_SIZES},
+    },
+    "montage": {
+        "A1": 65.0,
+        "A2": 60.0,
+        "B1": 45.0,
+        "B2": 45.0,
+        "C": 35.0,
+        "D1": 90.0,
+        "D2": 75.0,
+    },
+}
+
+MATERIALS = ("Cu", "Al")
+
+
+def _env(ref: str) -> str:
+    return "jord" if ref in ("D1", "D2") else "luft"
+
+
+def candidate_refs():
+    """Reference-metoder fra INSTALL_METHODS som der findes Iz-data for."""
+    refs = []
+    for _, ref, _ in INSTALL_METHODS:
+        if ref not in refs and lookup_iz_xlpe("Cu", ref, 2, 2.5) is not None:
+            refs.append(ref)
+    return refs
+
+
+def du_min_size(grp: GroupInput, stik: StikContext, material: str) -> float:
+    """
+    Mindste tværsnit der kan klare ΔU-kravet (lukket form af DS-formlen).
+
+    Returnerer 0 hvis ΔU ikke begrænser, og inf hvis intet tværsnit kan
+    (stikledningens andel + reaktansleddet bruger allerede hele budgettet).
+    """
+    U_v = stik.U_v
+    I = grp.In
+    phase = grp.phase.label
+    cosphi = grp.cos_load
+    L = sum(s.length for s in grp.segments)
+    b = 1.0 if phase == "3-faset" else 2.0
+    sinphi = max(0.0, 1.0 - cosphi**2) ** 0.5
+
+    du_stik, _ = voltage_drop_ds(
+        U_v, I, stik.material.label, stik.sq, stik.total_len, phase, cosphi
+    )
+    rest = grp.du_max_pct / 100.0 * U_v - du_stik
+    rest -= b * LAMBDA_MATERIAL[material] * L * sinphi * I
+    if rest <= 0:
+        return float("inf")
+    return b * Q_MATERIAL[material] * L * cosphi * I / rest
+
+
+# Største antal samlede kabler i KGRP-tabellerne
+_N_MAX = max(len(dense) for dense in KGRP_COMPILED.values()) - 1
+
+
+def _worst_n(s) -> int:
+    """Største n_samlet der giver segmentets kgrp for dets egen metode."""
+    ref = s.ref_method.label
+    for n in range(_N_MAX, 0, -1):
+        if lookup_kgrp(ref, n) == s.kgrp:
+            return n
+    return _N_MAX
+
+
+def bundle_sizes(grp: GroupInput, n_samlet=None):
+    """
+    n_samlet pr. segment: et tal for alle segmenter, ét pr. segment, eller
+    None (ukendt – se _worst_n).
+    """
+    if n_samlet is None:
+        return tuple(_worst_n(s) for s in grp.segments)
+    if isinstance(n_samlet, int):
+        return (n_samlet,) * len(grp.segments)
+    n_samlet = tuple(int(n) for n in n_samlet)
+    if len(n_samlet) != len(grp.segments):
+        raise ValueError("n_samlet skal have ét tal pr. segment.")
+    return n_samlet
+
+
+def _segments_for(grp: GroupInput, ref: str, S: float, ns):
+    """Gruppens segmenter lagt med ref-metoden og tværsnit S (ns: n_samlet)."""
+    method = RefMethod.parse(ref)
+    out = []
+    for s, n in zip(grp.segments, ns):
+        Kt = s.Kt
+        if _env(s.ref_method.label) != _env(ref):
+            Kt = lookup_Kt(_env(ref), s.temp)
+        kgrp = s.kgrp
+        if s.ref_method is not method:
+            kgrp = lookup_kgrp(ref, n)
+        out.append(replace(s, ref_method=method, area=S, Kt=Kt, kgrp=kgrp))
+    return tuple(out)
+
+
+def _cost(costs, material: str, ref: str, S: float, L: float) -> float:
+    kabel = costs["kabel"][material].get(S)
+    montage = costs["montage"].get(ref)
+    if kabel is None or montage is None:
+        return None
+    return (kabel + montage) * L
+
+
+def _check(grp: GroupInput, stik: StikContext):
+    """beregn_gruppe for et låst design → (GroupResult | None, årsag)."""
+    try:
+        res = beregn_gruppe(grp, stik)
+    except BeregningsFejl as exc:
+        return None, exc.titel
+    except KeyError:
+        return None, "mangler tabeldata"
+    if res.du_tot_pct > grp.du_max_pct:
+        return None, "ΔU"
+    if res.Ik_min.real < res.Imin_factor * grp.In:
+        return None, "Ik,min"
+    if not res.termisk_ok:
+        return None, "termisk"
+    return res, None
+
+
+def find_cheapest(grp: GroupInput, stik: StikContext, costs=None,
+                  materials=MATERIALS, refs=None, n_samlet=None):
+    """
+    Billigste design for gruppen.
+
+    costs: {"kabel": {materiale: {S: kr/m}}, "montage": {ref: kr/m}}
+    (standard DEFAULT_COSTS). refs: reference-metoder der må vælges
+    imellem (standard candidate_refs()). n_samlet: antal samlede kabler
+    (se bundle_sizes); kgrp slås op for hver metode ud fra det.
+
+    Returnerer (DesignChoice | None, statistik) hvor statistik tæller
+    grene, beregnede designs og beskårne tværsnit.
+    """
+    if stik is None:
+        raise BeregningsFejl(
+            "Gruppe – stikledning",
+            "Beregn først stikledningen i hovedfanen, så gruppen kan bruge data.",
+        )
+    if not grp.segments:
+        raise BeregningsFejl(
+            "Gruppe – segment-fejl",
+            "Angiv mindst ét segment med længde > 0 i gruppen.",
+        )
+    costs = costs or DEFAULT_COSTS
+    refs = list(refs) if refs is not None else candidate_refs()
+    ns = bundle_sizes(grp, n_samlet)
+    phase = grp.phase.label
+    L = sum(s.length for s in grp.segments)
+    stats = {"grene": 0, "beregnet": 0, "beskaaret_du": 0, "beskaaret_iz": 0,
+             "beskaaret_pris": 0}
+
+    # Grene (materiale, metode) med første mulige tværsnit og nedre prisgrænse
+    branches = []
+    for material in materials:
+        sizes = group_candidate_sizes(material, phase)
+        S_du = du_min_size(grp, stik, material)
+        start = bisect_left(sizes, S_du)
+        stats["beskaaret_du"] += start * len(refs)
+        for ref in refs:
+            stats["grene"] += 1
+            first = None
+            for i in range(start, len(sizes)):
+                segs = _segments_for(grp, ref, sizes[i], ns)
+                if iz_ok(grp.In, material, segs, sizes[i], stik.Kj_jord):
+                    first = i
+                    break
+                stats["beskaaret_iz"] += 1
+            if first is None:
+                continue
+            bound = _cost(costs, material, ref, sizes[first], L)
+            if bound is None:
+                continue
+            branches.append((bound, material, ref, sizes[first:]))
+
+    branches.sort(key=lambda b: b[0])
+
+    best = None
+    for i, (bound, material, ref, sizes) in enumerate(branches):
+        if best is not None and bound >= best.cost:
+            stats["beskaaret_pris"] += len(branches) - i
+            break
+        for S in sizes:
+            cost = _cost(costs, material, ref, S, L)
+            if cost is None:
+                continue
+            if best is not None and cost >= best.cost:
+                break
+            design = replace(
+                grp,
+                material=Material.parse(material),
+                auto_size=False,
+                segments=_segments_for(grp, ref, S, ns),
+            )
+            stats["beregnet"] += 1
+            res, _ = _check(design, stik)
+            if res is not None:
+                best = DesignChoice(
+                    material=Material.parse(material),
+                    ref_method=RefMethod.parse(ref),
+                    sq=S,
+                    cost=cost,
+                    result=res,
+                )
+                break
+
+    return best, stats
@@ -0,0 +1,193 @@
+"""
+Fælles ΔU-budget for stikledning og grupper.
+
+I dag vælger stikledningen sit tværsnit mod sin egen ΔU-grænse, og hver
+gruppe tjekker bagefter ΔU_stik + ΔU_gruppe mod sin grænse. Her vælges
+stikledningens tværsnit og alle gruppers tværsnit samlet, så det samlede
+ledervolumen (eller prisen) bliver mindst muligt, mens hver gruppes
+ΔU_total holdes under gruppens du_max_pct.
+
+Den eneste kobling mellem grupperne er stikledningens tværsnit S0: for et
+fast S0 er hver gruppes ΔU-rest kendt, og gruppens billigste tværsnit er
+det mindste der klarer både Iz og ΔU-resten. Problemet løses derfor
+eksakt ved at gennemgå de (højst 17) mulige S0 og for hver gruppe finde
+tværsnittet lukket:
+
+    ΔU_gruppe(S) = A/S + B          (DS-formlen, A = b·q·L·cosφ·I,
+                                      B = b·λ·L·sinφ·I)
+    S ≥ A / (ΔU_max − ΔU_stik(S0) − B)
+
+efterfulgt af bisect i kandidatlisten. Iz-grænsen afhænger ikke af S0 og
+slås op én gang pr. gruppe. Arbejdet er O(antal S0 × antal grupper), så
+hundredvis af grupper tager millisekunder.
+
+anvend() låser stikledning og grupper til planen, så de kan regnes med de
+almindelige beregninger (beregn_stikledning/beregn_alle_grupper) – Ik,min
+og den termiske kontrol tjekkes dér.
+"""
+
+from bisect import bisect_left
+from dataclasses import replace
+
+from calculations import LAMBDA_MATERIAL, Q_MATERIAL, voltage_drop_ds
+from group_engine import BeregningsFejl, group_candidate_sizes, iz_ok
+from records import DuBudgetPlan, StikInput
+from sizing_index import start_index
+from stik_engine import stik_candidate_sizes
+
+_INF = float("inf")
+
+
+# ---------------------------------------------------------------------------
+# Iz (kandidattværsnit og kontrol fra group_engine / stik_engine)
+# ---------------------------------------------------------------------------
+
+
+def _first_iz(In, material, segments, sizes, Kj_jord) -> int:
+    """Indeks for det mindste tværsnit der klarer Iz (len(sizes) hvis intet)."""
+    start = start_index(sizes, material, segments, In, Kj_jord)
+    for i in range(start, len(sizes)):
+        S = sizes[i]
+        if iz_ok(In, material, segments, S, Kj_jord):
+            return i
+    return len(sizes)
+
+
+# ---------------------------------------------------------------------------
+# Løser
+# ---------------------------------------------------------------------------
+
+
+def _unit_cost(costs, material: str, S: float) -> float:
+    """Pris pr. meter; uden pristabel ledervolumen S [mm²·m pr. m]."""
+    if costs is None:
+        return S
+    return costs[material].get(S, _INF)
+
+
+def solve(inp: StikInput, groups, costs=None, respect_stik_limit: bool = True):
+    """
+    Billigste samlede valg af stikledningens og gruppernes tværsnit.
+
+    costs: {materiale: {S: kr/m}} – uden pristabel minimeres ledervolumen
+    Σ L·S. respect_stik_limit: stikledningen skal også holde sin egen
+    du_max_pct (som i dag); med False bestemmes dens tværsnit alene af Iz
+    og gruppernes ΔU_total.
+
+    Returnerer (bedste DuBudgetPlan, [(S0, pris | None), ...]) – listen
+    viser prisen for hvert muligt stik-tværsnit (None = ingen løsning).
+    Rejser BeregningsFejl hvis intet S0 giver en løsning.
+    """
+    groups = list(groups)
+    if not inp.segments:
+        raise BeregningsFejl(
+            "Fejl", "Der skal være mindst ét segment i stikledningen."
+        )
+    for g in groups:
+        if not g.segments:
+            raise BeregningsFejl(
+                "Gruppe – segment-fejl",
+                f"Gruppen {g.name} har ingen segmenter med længde > 0.",
+            )
+
+    U_v = inp.U_v
+    mat_s = inp.material.label
+    phase_s = inp.phase.label
+    L_s = sum(seg.length for seg in inp.segments)
+
+    # Pr. gruppe: kandidater, Iz-grænse og ΔU-koefficienter (uafhængige af S0)
+    prep = []
+    for g in groups:
+        mat = g.material.label
+        phase = g.phase.label
+        sizes = group_candidate_sizes(mat, phase)
+        L = sum(s.length for s in g.segments)
+        b = 1.0 if phase == "3-faset" else 2.0
+        cosphi = g.cos_load
+        sinphi = max(0.0, 1.0 - cosphi**2) ** 0.5
+        A = b * Q_MATERIAL[mat] * L * cosphi * g.In
+        B = b * LAMBDA_MATERIAL[mat] * L * sinphi * g.In
+        i_iz = _first_iz(g.In, mat, g.segments, sizes, inp.Kj_jord)
+        prep.append((g, mat, phase, sizes, L, A, B, i_iz))
+
+    best = None
+    table = []
+    for S0 in stik_candidate_sizes(mat_s, phase_s):
+        if not iz_ok(inp.In, mat_s, inp.segments, S0, inp.Kj_jord):
+            table.append((S0, None))
+            continue
+        _, du_s_pct = voltage_drop_ds(
+            U_v, inp.In, mat_s, S0, L_s, phase_s, inp.cos_load
+        )
+        if respect_stik_limit and du_s_pct > inp.du_max_pct:
+            table.append((S0, None))
+            continue
+
+        cost = L_s * _unit_cost(costs, mat_s, S0)
+        chosen = []
+        du_tot_pct = []
+        for g, mat, phase, sizes, L, A, B, i_iz in prep:
+            # stikledningens andel regnes med gruppens strøm og fasesystem
+            du_stik_g, _ = voltage_drop_ds(
+                U_v, g.In, mat_s, S0, L_s, phase, g.cos_load
+            )
+            budget = g.du_max_pct / 100.0 * U_v
+            rest = budget - du_stik_g - B
+            if rest <= 0:
+                break
+            i = max(i_iz, bisect_left(sizes, A / rest))
+            # afrunding: tjek med DS-formlen præcis som group_engine
+            while i < len(sizes):
+                du_g, _ = voltage_drop_ds(
+                    U_v, g.In, mat, sizes[i], L, phase, g.cos_load
+                )
+                if (du_g + du_stik_g) / U_v * 100.0 <= g.du_max_pct:
+                    break
+                i += 1
+            if i >= len(sizes):
+                break
+            S = sizes[i]
+            cost += L * _unit_cost(costs, mat, S)
+            chosen.append(S)
+            du_tot_pct.append((du_g + du_stik_g) / U_v * 100.0)
+        else:
+            table.append((S0, cost if cost < _INF else None))
+            if cost < _INF and (best is None or cost < best.cost):
+                best = DuBudgetPlan(
+                    stik_sq=S0,
+                    group_sq=tuple(chosen),
+                    cost=cost,
+                    du_stik_pct=du_s_pct,
+                    du_tot_pct=tuple(du_tot_pct),
+                )
+            continue
+        table.append((S0, None))
+
+    if best is None:
+        raise BeregningsFejl(
+            "Spændingsfald",
+            "Ingen kombination af stikledning og gruppetværsnit overholder "
+            "ΔU- og Iz-kravene.",
+        )
+    return best, table
+
+
+def anvend(plan: DuBudgetPlan, inp: StikInput, groups):
+    """
+    Stik-input og grupper låst til planens tværsnit (auto_size slået fra),
+    klar til beregn_stikledning og beregn_alle_grupper.
+    """
+    stik_inp = replace(
+        inp,
+        auto_size=False,
+        segments=tuple(replace(s, area=plan.stik_sq) for s in inp.segments),
+    )
+    locked = [
+        replace(
+            g,
+            auto_size=False,
+            segments=tuple(replace(s, area=S) for s in g.segments),
+        )
+        for g, S in zip(groups, plan.group_sq)
+    ]
+    return stik_inp, locked
@@ -0,0 +1,279 @@
+"""
+Jordfejlsbeskyttelse (DS 183 §411) for grupperne.
+
+Python-udgaven af calculateEarthFaultLoopImpedance, calculateTouchVoltage
+og determineRCDRequirement fra src/lib/calculations.ts, men regnet på de
+samme impedanser som resten af Python-beregningen:
+
+  Zs = Z_forsyning + Z_stik,fase + Z_stik,PE + Z_gruppe,fase + Z_gruppe,PE
+
+  - Z_forsyning = U_v / I_min,forsyning (som Ik,min i group_engine)
+  - faseledere med 1,5·R + jX (varm leder, som Ik,min)
+  - PE-leder med 1,0·R + jX; stikledningens PE tages direkte fra
+    StikContext.Z_w1_max, gruppernes fra cable_impedance_batch
+  - reduceret PE (DS 183 tabel 54.2) skalerer R med S/S_PE
+
+Fejlstrømmen er Ia = U0 / |Zs| (TT: U0 / |Zs + Ra|), udkoblingstiden
+slås op på sikringskurven med fuse_trip_time_explain, og berørings-
+spændingen er Ub = Ia · |Z_PE| (som i TS-udgaven).
+
+beregn_jordfejl() regner alle grupper på én gang: stikledningens bidrag
+regnes én gang, sikringsdata slås op én gang pr. (fabrikat, type, In), og
+gruppernes impedanser summeres med cable_impedance_batch. rcd_grupper()
+giver navnene på de grupper der skal have fejlstrømsafbryder.
+"""
+
+from calculations import SIZE_INDEX, cable_impedance_batch, fuse_trip_time_explain
+from fuse_curves import get_fuse_data
+from records import EarthFaultResult, GroupInput, StikContext
+
+# Fase-jord-spænding [V]
+U0_DEFAULT = 230.0
+
+# Højeste tilladte berøringsspænding (DS 183 §411.3.2.2)
+UB_MAX = 50.0
+
+# Krævet udkoblingstid [s]: slutgrupper / fordelingsledninger (DS 183 §411.3.2)
+T_KRAV_SLUT = 0.4
+T_KRAV_FORDELING = 5.0
+
+SYSTEMS = ("TN", "TT")
+KREDSTYPER = ("stikkontakt", "fast", "fordeling", "belysning")
+PLACERINGER = ("inde", "bad", "ude")
+
+# (kredstype, placering) når en gruppe ikke er angivet i kredse
+DEFAULT_KREDS = ("fast", "inde")
+
+
+class JordfejlFejl(ValueError):
+    """Ugyldige indstillinger (system, kredstype, placering)."""
+
+
+# ---------------------------------------------------------------------------
+# DS 183-regler
+# ---------------------------------------------------------------------------
+
+
+def min_pe_area(S: float, flerleder: bool = True) -> float:
+    """
+    Mindste PE-tværsnit (DS 183 tabel 54.2).
+
+    I flerlederkabler er PE en del af kablet og har altid samme tværsnit
+    som faselederne. Separat PE: S ≤ 16 → S, S ≤ 35 → 16, ellers S/2.
+    """
+    if flerleder or S <= 16.0:
+        return S
+    if S <= 35.0:
+        return 16.0
+    return S / 2.0
+
+
+def rcd_krav(system: str, kredstype: str, In: float, placering: str,
+             zs_ok: bool):
+    """
+    Krav om fejlstrømsafbryder (DS 183 §411.3).
+
+    Returnerer (påkrævet, type, begrundelse) – type er "30mA", "300mA"
+    eller "ingen".
+    """
+    if system == "TT" and kredstype != "fordeling":
+        return (True, "30mA",
+                "TT-system – RCD påkrævet for alle slutgrupper (DS 183 §411.5.3)")
+    if kredstype == "stikkontakt" and In <= 20:
+        return True, "30mA", "Stikkontakt ≤20A (DS 183 §411.3.2)"
+    if placering == "bad":
+        return True, "30mA", "Badeværelsesgruppe (DS 183 §701.411.3.3)"
+    if placering == "ude":
+        return True, "30mA", "Udendørs gruppe (DS 183 §411.3.2)"
+    if not zs_ok:
+        return True, "30mA", "Zs for høj – sikringen kan ikke udkoble i tide"
+    if kredstype == "fordeling":
+        return False, "300mA", "Anbefalet som brandbeskyttelse (DS 183 §422.3.9)"
+    return False, "ingen", "Ingen RCD-krav for denne gruppe"
+
+
+def _check_kreds(kreds):
+    kredstype, placering = kreds
+    if kredstype not in KREDSTYPER:
+        raise JordfejlFejl(f"Ukendt kredstype: {kredstype!r}")
+    if placering not in PLACERINGER:
+        raise JordfejlFejl(f"Ukendt placering: {placering!r}")
+    return kredstype, placering
+
+
+# ---------------------------------------------------------------------------
+# Impedanser
+# ---------------------------------------------------------------------------
+
+
+def _pe_impedance(Z_cold: complex, S: float, flerleder: bool) -> complex:
+    """PE-impedans ud fra faselederens 1,0·R + jX (R skaleres ved reduceret PE)."""
+    S_pe = min_pe_area(S, flerleder)
+    if S_pe == S:
+        return Z_cold
+    return complex(Z_cold.real * S / S_pe, Z_cold.imag)
+
+
+def _group_impedances(grp: GroupInput, flerleder: bool):
+    """(Z_fase, Z_PE) for gruppens segmenter – KeyError hvis R/X mangler."""
+    mat = grp.material.label
+    phase = grp.phase.label
+    lengths = [s.length for s in grp.segments]
+    idx = [SIZE_INDEX[s.area] for s in grp.segments]
+    Z_hot = cable_impedance_batch(lengths, idx, mat, phase, 1.5)
+    Z_cold = cable_impedance_batch(lengths, idx, mat, phase, 1.0)
+    Z_phase = sum(Z_hot, 0j)
+    Z_pe = sum(
+        (_pe_impedance(z, s.area, flerleder) for z, s in zip(Z_cold, grp.segments)),
+        0j,
+    )
+    if Z_phase != Z_phase or Z_pe != Z_pe:  # NaN → tværsnit uden R/X-data
+        raise KeyError("R/X")
+    return Z_phase, Z_pe
+
+
+# ---------------------------------------------------------------------------
+# Batch
+# ---------------------------------------------------------------------------
+
+
+def beregn_jordfejl(groups, stik: StikContext, system: str = "TN",
+                    Ra: float = 0.0, U0: float = U0_DEFAULT, kredse=None,
+                    flerleder: bool = True):
+    """
+    Jordfejlsbeskyttelse for alle grupper mod samme stik-kontekst.
+
+    kredse: {gruppenavn: (kredstype, placering)} – grupper uden post får
+    DEFAULT_KREDS. Ra er jordelektrodens modstand [Ω] (kun TT).
+
+    Returnerer en liste (samme rækkefølge som groups) af
+    EarthFaultResult. Grupper der ikke kan beregnes (manglende R/X- eller
+    sikringsdata) giver stadig et resultat med RCD-krav og en advarsel.
+    """
+    if system not in SYSTEMS:
+        raise JordfejlFejl(f"Ukendt jordingssystem: {system!r}")
+    kredse = {name: _check_kreds(k) for name, k in (kredse or {}).items()}
+
+    # Fælles for alle grupper: forsyning og stikledning
+    I_min_supply = stik.I_min_supply
+    Z_stik = stik.Z_w1_min + _pe_impedance(stik.Z_w1_max, stik.sq, flerleder)
+    Z_extra = Ra if system == "TT" else 0.0
+
+    fuse_cache = {}
+    out = []
+    for grp in groups:
+        kredstype, placering = kredse.get(grp.name, DEFAULT_KREDS)
+        t_krav = T_KRAV_FORDELING if kredstype == "fordeling" else T_KRAV_SLUT
+        advarsler = []
+
+        # som group_engine: uden forsyningsdata bruges 5·In for gruppen
+        Z_sup = stik.U_v / (I_min_supply if I_min_supply else 5.0 * grp.In)
+
+        try:
+            Z_phase, Z_pe = _group_impedances(grp, flerleder)
+        except KeyError:
+            out.append(_uberegnet(grp, system, kredstype, placering, t_krav,
+                                  "Mangler R/X-data – kan ikke beregne Zs."))
+            continue
+
+        Zs = Z_sup + Z_stik + Z_phase + Z_pe
+        Ia = U0 / abs(Zs + Z_extra)
+        Ub = Ia * abs(Z_pe)
+
+        fuse_type = grp.fuse_type
+        if fuse_type == "MCB (auto B/C)":
+            # som group_engine: C-kurve hvis strømmen rækker til 10·In
+            fuse_type = "MCB C" if Ia > 10.0 * grp.In else "MCB B"
+        key = (grp.fuse_manu, fuse_type, grp.In)
+        fuse = fuse_cache.get(key)
+        if fuse is None:
+            try:
+                fuse = fuse_cache[key] = get_fuse_data(*key)
+            except KeyError:
+                out.append(_uberegnet(grp, system, kredstype, placering, t_krav,
+                                      "Kunne ikke finde sikringsdata."))
+                continue
+        curve_points, In_curve, _ = fuse
+        t_trip, _ = fuse_trip_time_explain(In_curve, Ia, curve_points)
+        zs_ok = t_trip <= t_krav
+
+        if system == "TT" and Ra > 100.0:
+            advarsler.append(
+                f"TT-system: høj jordmodstand Ra={Ra:.1f}Ω (typisk 10-100Ω)"
+            )
+        if Ub > UB_MAX:
+            advarsler.append(f"Berøringsspænding {Ub:.1f}V > {UB_MAX:.0f}V")
+        if not zs_ok:
+            advarsler.append(
+                f"Udkobling {t_trip:.2f}s > {t_krav:g}s ved Ia={Ia:.1f}A "
+                f"(Zs={abs(Zs):.4f}Ω)"
+            )
+
+        krav, rcd_type, begrundelse = rcd_krav(
+            system, kredstype, grp.In, placering, zs_ok
+        )
+        out.append(
+            EarthFaultResult(
+                name=grp.name,
+                system=system,
+                Zs=Zs,
+                Z_pe=Z_pe,
+                Ia=Ia,
+                fuse_type=fuse_type,
+                t_trip=t_trip,
+                t_krav=t_krav,
+                Ub=Ub,
+                zs_ok=zs_ok,
+                rcd_krav=krav,
+                rcd_type=rcd_type,
+                begrundelse=begrundelse,
+                advarsler=tuple(advarsler),
+            )
+        )
+    return out
+
+
+def _uberegnet(grp, system, kredstype, placering, t_krav, besked):
+    """Resultat for en gruppe hvor Zs ikke kan beregnes – regnes som ikke OK."""
+    krav, rcd_type, begrundelse = rcd_krav(system, kredstype, grp.In, placering, False)
+    nan = float("nan")
+    return EarthFaultResult(
+        name=grp.name,
+        system=system,
+        Zs=complex(nan, nan),
+        Z_pe=complex(nan, nan),
+        Ia=nan,
+        fuse_type=grp.fuse_type,
+        t_trip=nan,
+        t_krav=t_krav,
+        Ub=nan,
+        zs_ok=False,
+        rcd_krav=krav,
+        rcd_type=rcd_type,
+        begrundelse=begrundelse,
+        advarsler=(besked,),
+    )
+
+
+def rcd_grupper(results):
+    """Navnene på de grupper der kræver fejlstrømsafbryder."""
+    return [r.name for r in results if r.rcd_krav]
+
+
+def format_oversigt(results) -> str:
+    """Kort tekstoversigt (én linje pr. gruppe) til mellemregninger/rapport."""
+    lines = ["Jordfejlsbeskyttelse (DS 183 §411):"]
+    for r in results:
+        if r.rcd_krav:
+            rcd = f"RCD {r.rcd_type}"
+        elif r.rcd_type != "ingen":
+            rcd = f"RCD {r.rcd_type} anbefales"
+        else:
+            rcd = "ingen RCD-krav"
+        lines.append(
+            f"  {r.name}: Zs = {abs(r.Zs):.4f} Ω, Ia = {r.Ia:.1f} A, "
+            f"t = {r.t_trip:.3f} s (krav {r.t_krav:g} s), Ub = {r.Ub:.1f} V – {rcd}"
+        )
+        for a in r.advarsler:
+            lines.append(f"    ⚠ {a}")
+    return "\n".join(lines)
@@ -0,0 +1,770 @@
+"""
+Gruppeberegning uden GUI.
+
+beregn_gruppe() indeholder selve beregningen fra GroupCalcMixin.beregn,
+men arbejder på et øjebliksbillede af gruppens input (records.GroupInput)
+og en fælles stik-kontekst (records.StikContext) i stedet for widgets.
+Fejl rejses som BeregningsFejl (titel + besked), så GUI'en kan vise dem
+med messagebox, mens batch-kørsler kan samle dem op.
+
+beregn_alle_grupper() genberegner mange grupper på en procespulje. Stik-
+konteksten sendes kun én gang til hver worker (initializer), og
+resultaterne returneres i samme rækkefølge som input.
+
+Mellemregningerne registreres som et struktureret spor (calc_trace); den
+danske tekst dannes først, når sporet vises.
+
+Felterne i input, stik-kontekst og resultat (GroupResult) er beskrevet i
+records.py.
+"""
+
+import math
+import cmath
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+
+import calc_trace
+from calc_trace import Trace, no_trace
+from calculations import (
+    STANDARD_SIZES,
+    lookup_iz_xlpe,
+    cable_impedance_NKT,
+    ik_max_stik,
+    voltage_drop_ds,
+    fuse_trip_time_explain,
+    kj_for_segment,
+)
+from fuse_curves import get_fuse_data
+from records import GroupInput, GroupResult, StikContext
+from sizing_index import start_index
+
+# Under dette antal grupper kan det ikke betale sig at starte en procespulje
+# (én gruppe tager ~0,1 ms, opstart af puljen ~50 ms)
+POOL_MIN_GROUPS = 1000
+
+
+class BeregningsFejl(Exception):
+    """Fejl i en beregning – titel og besked svarer til messagebox.showerror."""
+
+    def __init__(self, titel: str, besked: str):
+        super().__init__(f"{titel}: {besked}")
+        self.titel = titel
+        self.besked = besked
+
+
+def format_current_with_angle(I) -> str:
+    """Formaterer (evt. kompleks) strøm som "|I| A / vinkel°"."""
+    try:
+        c = complex(I)
+    except Exception:
+        try:
+            c = complex(float(I), 0.0)
+        except Exception:
+            return f"{I} A"
+    mag = abs(c)
+    if mag == 0:
+        angle_deg = 0.0
+    else:
+        angle_deg = math.degrees(cmath.phase(c))
+    return f"{mag:.1f} A / {angle_deg:.1f}°"
+
+
+# Cu 1-faset: kun tværsnit der findes som 3-leder Cu
+_SIZES_1FASET_CU = [
+    s for s in (1.5, 2.5, 4.0, 6.0, 10.0, 16.0, 25.0, 35.0) if s in STANDARD_SIZES
+]
+_SIZES_AL = [s for s in STANDARD_SIZES if s >= 16.0]
+
+
+def group_candidate_sizes(material: str, phase: str):
+    """
+    Kandidattværsnit for auto-tværsnit af en gruppe (stigende). Listen
+    deles – kopiér den før den ændres.
+    """
+    if material == "Al":
+        return _SIZES_AL
+    if material == "Cu" and phase == "1-faset":
+        return _SIZES_1FASET_CU
+    return STANDARD_SIZES
+
+
+def iz_ok(In: float, material: str, segments, S: float, Kj_jord: float) -> bool:
+    """
+    Overbelastningskontrollen fra auto-tværsnit uden mellemregninger:
+    In ≤ Iz·Kt·Kj·kgrp i alle segmenter ved tværsnit S (False hvis der
+    mangler Iz-data).
+    """
+    for s in segments:
+        ref = s.ref_method.label
+        iz = lookup_iz_xlpe(material, ref, s.cores, S)
+        if iz is None:
+            return False
+        if In > iz * s.Kt * kj_for_segment(ref, Kj_jord) * s.kgrp:
+            return False
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Tekster til mellemregningerne (se calc_trace)
+# ---------------------------------------------------------------------------
+
+_SEG_IZ = (
+    "{p}Segment {{0}}:\n"
+    "{p}  Ref-metode = {{1}}, længde = {{2:.1f}} m, belastede ledere = {{3}}\n"
+    "{p}  Korrektionsfaktorer:\n"
+    "{p}    Kt = {{4:.3f}}, Kj = {{5:.3f}}, kgrp = {{6:.3f}}\n"
+    "{p}  Iz,nød = In / (Kt·Kj·kgrp)\n"
+    "{p}    = {{7:.1f}} / ({{4:.3f}}·{{5:.3f}}·{{6:.3f}}) = {{8:.2f}} A\n"
+    "{p}  Iz,korr = Iz,tabel · Kt · Kj · kgrp\n"
+    "{p}    = {{9:.1f}} · {{4:.3f}} · {{5:.3f}} · {{6:.3f}} = {{10:.2f}} A"
+)
+
+
+def _tekst_ikmin(src_txt, In_source, I_min_supply, U_v, Z_stik_min, Z_group_min,
+                 Z_sup_min, Z_kabel_min, Ik_min_g):
+    return (
+        "[FORMEL]\n"
+        "  Z_sup_min = U / (5·In_kilde)\n"
+        "  Z_kabel_min = Z_stik_min + Z_gruppe_min\n"
+        "  Z_total_min = Z_sup_min + 2·Z_kabel_min\n"
+        "  Ik,min = U / Z_total_min\n"
+        "\n"
+        "[MELLEMREGNINGER]\n"
+        f"  In_kilde ({src_txt}) = {In_source:.1f} A\n"
+        f"  I_min,supply = 5·In_kilde = 5·{In_source:.1f} = {I_min_supply:.1f} A\n"
+        f"  Z_sup_min = U / I_min,supply = {U_v} / {I_min_supply:.1f}\n"
+        "  Z_kabel_min = Z_stik_min + Z_gruppe_min = "
+        f"({Z_stik_min.real:.6f} + j{Z_stik_min.imag:.6f}) + "
+        f"({Z_group_min.real:.6f} + j{Z_group_min.imag:.6f})\n"
+        "  Z_total_min = Z_sup_min + 2·Z_kabel_min = "
+        f"{Z_sup_min:.6f} + 2·({Z_kabel_min.real:.6f} + j{Z_kabel_min.imag:.6f})\n"
+        f"  Ik,min = {U_v} / Z_total_min ≈ {format_current_with_angle(Ik_min_g)}\n"
+    )
+
+
+def _tekst_ikmax(Ik_max_g, Z_total_max):
+    return (
+        "[FORMEL]\n"
+        "  Ik,max,gruppe = U / (Z_trafo + Z_stik_max + Z_gruppe_max)\n"
+        "\n"
+        "[RESULTAT]\n"
+        f"  Ik,max,gruppe ≈ {format_current_with_angle(Ik_max_g)}, "
+        f"Z_total_max ≈ {Z_total_max.real:.5f} + j{Z_total_max.imag:.5f} Ω\n"
+    )
+
+
+def _tekst_termisk(t_trip_g, In_curve_g, fuse_type, fuse_text_g, k_val, areas_list,
+                   E_kabel_sum, Ik_for_fuse_g, E_bryde_g, termisk_ok):
+    areas_str = " + ".join(f"{a}^2" for a in areas_list)
+    if termisk_ok:
+        konklusion = "  ⇒ k²S²-betingelse er OPFYLDT (E_kabel_sum > E_bryde)."
+    else:
+        konklusion = "  ⇒ k²S²-betingelse er IKKE opfyldt (E_kabel_sum ≤ E_bryde)!"
+    return (
+        "[RESULTAT – termisk]\n"
+        f"  t_trip (fra sikringskurve) ≈ {t_trip_g:.3f} s for In = {In_curve_g} A "
+        f"({fuse_type})\n"
+        f"{fuse_text_g}\n"
+        "\n"
+        "[FORMEL – termisk energi]\n"
+        "  E_kabel_sum = Σ(k² · S_i²)\n"
+        "  E_bryde = Ik² · t\n"
+        "\n"
+        "[MELLEMREGNINGER – termisk]\n"
+        f"  k = {k_val:.1f}\n"
+        f"  S_i (segmenter) = {', '.join(f'{a:.1f}' for a in areas_list)} mm²\n"
+        f"  E_kabel_sum = {k_val}^2*({areas_str}) ≈ {E_kabel_sum:.1f}\n"
+        f"  E_bryde = Ik^2 · t = {Ik_for_fuse_g:.1f}^2 · {t_trip_g:.3f} "
+        f"≈ {E_bryde_g:.1f}\n"
+        f"{konklusion}\n"
+    )
+
+
+calc_trace.register({
+    "gruppe.start": (
+        "\n"
+        "===== GRUPPE {0} =====\n"
+        "\n"
+        "[OVERORDNEDE DATA – GRUPPE]\n"
+        "  In,gruppe = {1:.1f} A\n"
+        "  Fasesystem = {2}\n"
+        "  Materiale = {3}\n"
+        "  cos φ (gruppe) = {4:.3f}\n"
+        "  Maks ΔU_total (gruppe) = {5:.2f} %\n"
+        "  Auto tværsnit (Iz + ΔU_total) = {6}\n"
+    ),
+    "gruppe.stik": (
+        "[DATA FRA STIKLEDNING]\n"
+        "  U_n = {0} V\n"
+        "  Materiale stikledning = {1}\n"
+        "  Tværsnit stikledning = {2:.1f} mm²\n"
+        "  Samlet længde stikledning = {3:.1f} m\n"
+        "  Z_stik_min = {4.real:.5f} + j{4.imag:.5f} Ω\n"
+        "  Z_stik_max = {5.real:.5f} + j{5.imag:.5f} Ω\n"
+        "  Ik,min,stik = {6:.1f} A\n"
+        "  Ik_trafo = {7:.1f} A\n"
+        "  cos φ_trafo = {8:.3f}\n"
+    ),
+    "gruppe.tvaersnit": "=== Tværsnit – valg for gruppen ===",
+    "gruppe.auto_start": lambda sizes: (
+        "Auto tværsnit aktiveret – tester standardstørrelser i rækkefølge.\n"
+        f"  Kandidattværsnit = {', '.join(str(s) for s in sizes)}\n"
+    ),
+    "gruppe.auto_S": "Afprøver tværsnit S = {0:.1f} mm²:",
+    "gruppe.auto_mangler_iz": (
+        "  [ADVARSEL] Mangler Iz-data for {0}, ref {1}, {2} ledere, {3} mm² "
+        "– springer tværsnit over."
+    ),
+    "gruppe.auto_seg": _SEG_IZ.format(p="  "),
+    "gruppe.auto_seg_ikke_ok": "    ⇒ Overbelastningsbeskyttelse IKKE OK i dette segment!",
+    "gruppe.auto_seg_ok": "    ⇒ Overbelastningsbeskyttelse OK i dette segment.",
+    "gruppe.auto_iz_ikke_ok": (
+        "  ⇒ Tværsnit opfylder ikke overbelastningskravet – prøver næste.\n"
+    ),
+    "gruppe.auto_iz_ok": "  ⇒ Overbelastning OK for alle segmenter.\n",
+    "gruppe.auto_du": (
+        "  ΔU_gruppe,test ≈ {0:.2f} V, ΔU_stik,gruppe,test ≈ {1:.2f} V\n"
+        "  ΔU_total,test ≈ {2:.2f} V ({3:.2f} % af U_n)"
+    ),
+    "gruppe.auto_du_over": "  ⇒ ΔU_total,test overskrider grænsen på {0:.2f} %.\n",
+    "gruppe.auto_du_ok": "  ⇒ ΔU_total,test overholder grænsen på {0:.2f} %.\n",
+    "gruppe.auto_valgt": "Valgt tværsnit for alle segments i {0}: {1:.1f} mm²\n",
+    "gruppe.manuel": (
+        "Auto tværsnit er slået FRA.\n"
+        "  Fælles tværsnit i gruppen: {0:.1f} mm²\n"
+    ),
+    "gruppe.ovl_start": "=== Overbelastning – endelig kontrol ===",
+    "gruppe.ovl_seg": _SEG_IZ.format(p=""),
+    "gruppe.ovl_ikke_ok": "  ⇒ Overbelastningsbeskyttelse IKKE OK i dette segment!",
+    "gruppe.ovl_ok": "  ⇒ Overbelastningsbeskyttelse OK i dette segment.\n",
+    "gruppe.z_start": "=== Impedans for gruppen (kabel W2-Wn) ===",
+    "gruppe.z_seg": (
+        "Segment {0}: L = {1:.1f} m, S = {2:.1f} mm², "
+        "Z_min = {3.real:.5f} + j{3.imag:.5f} Ω, "
+        "Z_max = {4.real:.5f} + j{4.imag:.5f} Ω"
+    ),
+    "gruppe.z_sum": (
+        "\n"
+        "Samlet gruppe-impedans: Z_gruppe_min = {0.real:.5f} + j{0.imag:.5f} Ω\n"
+        "                      Z_gruppe_max = {1.real:.5f} + j{1.imag:.5f} Ω\n"
+    ),
+    "gruppe.ikmin_start": "=== Ik,min (gruppe) ===",
+    "gruppe.ikmin": _tekst_ikmin,
+    "gruppe.ikmax_start": "=== Ik,max (gruppe) ===",
+    "gruppe.ikmax": _tekst_ikmax,
+    "gruppe.du_start": "=== Spændingsfald – gruppe og total ===",
+    "gruppe.du": (
+        "[FORMEL]\n"
+        "  ΔU_gruppe = b · (q·l/S · cosφ + λ·l·sinφ) · I\n"
+        "  ΔU_total = ΔU_stikledning + ΔU_gruppe\n"
+        "\n"
+        "[RESULTATER]\n"
+        "  ΔU_gruppe ≈ {0:.2f} V ({1:.2f} % af U_n)\n"
+        "  ΔU_stik,gruppe ≈ {2:.2f} V → ΔU_total ≈ {3:.2f} V ({4:.2f} %)"
+    ),
+    "gruppe.du_over": "  ⇒ ΔU_total overskrider grænsen på {0:.2f} %!\n",
+    "gruppe.du_ok": "  ⇒ ΔU_total er indenfor grænsen på {0:.2f} %.\n",
+    "gruppe.termisk_start": "=== Termisk (k²S² vs I²t) – gruppe ===",
+    "gruppe.mcb": (
+        "[OB – MCB automatisk B/C]\n"
+        "  In,MCB = {0:.1f} A\n"
+        "  Ik,min,gruppe = {1:.1f} A\n"
+        "  B-kurve kræver Ik,min > 5·In = {2:.1f} A\n"
+        "  C-kurve kræver Ik,min > 10·In = {3:.1f} A"
+    ),
+    "gruppe.mcb_c": "  ⇒ Ik,min er høj nok til C-kurve – C vælges.",
+    "gruppe.mcb_b": "  ⇒ Ik,min er kun nok til B-kurve – B vælges.",
+    "gruppe.mcb_ingen": (
+        "  ⇒ Ik,min er for lav til både B- og C-kurve – MCB kan ikke "
+        "bruges som OB-sikring i denne gruppe."
+    ),
+    "gruppe.ikmin_advarsel": (
+        "  [ADVARSEL] Ik,min for gruppen er under {0}·In for sikringstypen."
+    ),
+    "gruppe.termisk": _tekst_termisk,
+})
+
+
+# ---------------------------------------------------------------------------
+# Én gruppe
+# ---------------------------------------------------------------------------
+
+
+def beregn_gruppe(grp: GroupInput, stik: StikContext, log=None,
+                  trace: Trace = None) -> GroupResult:
+    """
+    Beregner én gruppe. stik er None, hvis stikledningen ikke er beregnet endnu.
+
+    Mellemregningerne registreres i trace (calc_trace.Trace) hvis angivet;
+    log(linje) modtager dem som tekst – også når beregningen fejler
+    undervejs. Uden log og trace koster mellemregningerne stort set intet.
+    """
+    if log is not None and trace is None:
+        trace = Trace()
+    if trace is None:
+        return _beregn_gruppe(grp, stik, no_trace)
+
+    start = len(trace)
+    try:
+        return _beregn_gruppe(grp, stik, trace.add)
+    finally:
+        if log is not None:
+            trace.replay(log, start)
+
+
+def _beregn_gruppe(grp: GroupInput, stik: StikContext, t) -> GroupResult:
+    name = grp.name
+    In_g = grp.In
+    phase_g = grp.phase.label
+    mat_g = grp.material.label
+    cos_load_g = grp.cos_load
+    du_max_pct = grp.du_max_pct
+    auto_size = grp.auto_size
+
+    t(
+        "gruppe.start", name, In_g, phase_g, mat_g, cos_load_g, du_max_pct,
+        "JA" if auto_size else "NEJ",
+    )
+
+    # --------------------------------------------------------
+    # DATA FRA STIKLEDNING
+    # --------------------------------------------------------
+    if stik is None:
+        raise BeregningsFejl(
+            "Gruppe – stikledning",
+            "Beregn først stikledningen i hovedfanen, så gruppen kan bruge data.",
+        )
+
+    U_v = stik.U_v
+    S_stik = stik.sq
+    mat_stik = stik.material.label
+    L_stik = stik.total_len
+    Z_stik_min = stik.Z_w1_min
+    Z_stik_max = stik.Z_w1_max
+    Ik_min_stik = stik.Ik_min_val
+    Ik_trafo = stik.Ik_trafo
+    cos_trafo = stik.cos_trafo
+    Kj_jord = stik.Kj_jord
+
+    t(
+        "gruppe.stik", U_v, mat_stik, S_stik, L_stik, Z_stik_min, Z_stik_max,
+        Ik_min_stik, Ik_trafo, cos_trafo,
+    )
+
+    # --------------------------------------------------------
+    # SEGMENTER
+    # --------------------------------------------------------
+    segments = list(grp.segments)
+    if not segments:
+        raise BeregningsFejl(
+            "Gruppe – segment-fejl",
+            "Angiv mindst ét segment med længde > 0 i gruppen.",
+        )
+
+    total_len_group = sum(s.length for s in segments)
+
+    # --------------------------------------------------------
+    # AUTO TVÆRSNIT ELLER MANUELT?
+    # --------------------------------------------------------
+    t("gruppe.tvaersnit")
+
+    if auto_size:
+        candidate_sizes = group_candidate_sizes(mat_g, phase_g)
+
+        t("gruppe.auto_start", candidate_sizes)
+
+        if t is no_trace:
+            # Uden mellemregninger: spring de tværsnit over som Iz-indekset
+            # udelukker (loggen viser ellers alle afprøvede tværsnit)
+            candidate_sizes = candidate_sizes[
+                start_index(candidate_sizes, mat_g, segments, In_g, Kj_jord):
+            ]
+
+        chosen_sq = None
+
+        for S_test in candidate_sizes:
+            t("gruppe.auto_S", S_test)
+
+            ok_all_segments = True
+            worst_Iznod = 0.0
+
+            for s in segments:
+                ref = s.ref_method.label
+                cores = s.cores
+                length = s.length
+                Kt_seg = s.Kt
+                kgrp_seg = s.kgrp
+
+                iz_tab = lookup_iz_xlpe(mat_g, ref, cores, S_test)
+                if iz_tab is None:
+                    t("gruppe.auto_mangler_iz", mat_g, ref, cores, S_test)
+                    ok_all_segments = False
+                    break
+
+                Kj_seg = kj_for_segment(ref, Kj_jord)
+
+                Iz_corr_seg = iz_tab * Kt_seg * Kj_seg * kgrp_seg
+                Iz_nod_seg = In_g / (Kt_seg * Kj_seg * kgrp_seg)
+                worst_Iznod = max(worst_Iznod, Iz_nod_seg)
+
+                t(
+                    "gruppe.auto_seg", s.nr, ref, length, cores, Kt_seg, Kj_seg,
+                    kgrp_seg, In_g, Iz_nod_seg, iz_tab, Iz_corr_seg,
+                )
+
+                if In_g > Iz_corr_seg:
+                    t("gruppe.auto_seg_ikke_ok")
+                    ok_all_segments = False
+                    break
+                else:
+                    t("gruppe.auto_seg_ok")
+
+            if not ok_all_segments:
+                t("gruppe.auto_iz_ikke_ok")
+                continue
+
+            t("gruppe.auto_iz_ok")
+
+            try:
+                du_grp_test, _ = voltage_drop_ds(
+                    U_v, In_g, mat_g, S_test, total_len_group, phase_g, cos_load_g
+                )
+                du_stik_grp_test, _ = voltage_drop_ds(
+                    U_v, In_g, mat_stik, S_stik, L_stik, phase_g, cos_load_g
+                )
+            except KeyError:
+                raise BeregningsFejl(
+                    "Gruppe – spændingsfald",
+                    "Mangler R/X-data for dette tværsnit – kan ikke beregne ΔU.",
+                )
+
+            du_tot_test = du_grp_test + du_stik_grp_test
+            du_tot_pct_test = du_tot_test / U_v * 100.0
+
+            t(
+                "gruppe.auto_du", du_grp_test, du_stik_grp_test, du_tot_test,
+                du_tot_pct_test,
+            )
+
+            if du_tot_pct_test > du_max_pct:
+                t("gruppe.auto_du_over", du_max_pct)
+                continue
+            else:
+                t("gruppe.auto_du_ok", du_max_pct)
+                chosen_sq = S_test
+                break
+
+        if chosen_sq is None:
+            raise BeregningsFejl(
+                "Gruppe – tværsnit",
+                "Ingen standardtværsnit opfylder både Iz og ΔU_total-kravet.",
+            )
+
+        if mat_g == "Al":
+            sq_corr = max(chosen_sq, 16.0)
+        else:
+            sq_corr = chosen_sq
+
+        t("gruppe.auto_valgt", name, sq_corr)
+    else:
+        areas = {s.area for s in segments}
+        if len(areas) != 1:
+            raise BeregningsFejl(
+                "Gruppe – tværsnit",
+                "Når automatisk tværsnit er slået FRA, skal alle segmenter "
+                "have samme tværsnit i gruppen.",
+            )
+        sq_corr = list(areas)[0]
+        if mat_g == "Al":
+            sq_corr = max(sq_corr, 16.0)
+        t("gruppe.manuel", sq_corr)
+
+    # Alle segmenter får det valgte tværsnit (som area-felterne i GUI'en)
+    segments = [replace(s, area=sq_corr) for s in segments]
+
+    # --------------------------------------------------------
+    # OVERBELASTNING – ENDGILTIGT MED VALGT TVÆRSNIT
+    # --------------------------------------------------------
+    t("gruppe.ovl_start")
+
+    worst_Iznod = 0.0
+    for s in segments:
+        ref = s.ref_method.label
+        cores = s.cores
+        length = s.length
+        Kt_seg = s.Kt
+        kgrp_seg = s.kgrp
+        area = sq_corr
+
+        iz_tab = lookup_iz_xlpe(mat_g, ref, cores, area)
+        if iz_tab is None:
+            raise BeregningsFejl(
+                "Gruppe – overbelastning",
+                f"Mangler Iz-data for {mat_g}, ref {ref}, {cores} ledere, {area} mm².",
+            )
+
+        Kj_seg = kj_for_segment(ref, Kj_jord)
+
+        Iz_corr = iz_tab * Kt_seg * Kj_seg * kgrp_seg
+        Iz_nod_seg = In_g / (Kt_seg * Kj_seg * kgrp_seg)
+        worst_Iznod = max(worst_Iznod, Iz_nod_seg)
+
+        t(
+            "gruppe.ovl_seg", s.nr, ref, length, cores, Kt_seg, Kj_seg, kgrp_seg,
+            In_g, Iz_nod_seg, iz_tab, Iz_corr,
+        )
+
+        if In_g > Iz_corr:
+            t("gruppe.ovl_ikke_ok")
+            raise BeregningsFejl(
+                "Gruppe – overbelastning",
+                f"Overbelastningsbeskyttelse IKKE OK i segment {s.nr} "
+                f"for gruppen {name}.\nIn = {In_g:.1f} A > Iz,korr = {Iz_corr:.1f} A.",
+            )
+        else:
+            t("gruppe.ovl_ok")
+
+    # --------------------------------------------------------
+    # SAMLET IMPEDANS FOR GRUPPEN
+    # --------------------------------------------------------
+    t("gruppe.z_start")
+    Z_group_min = 0 + 0j
+    Z_group_max = 0 + 0j
+
+    for s in segments:
+        length = s.length
+        area = s.area
+
+        try:
+            Z_min_seg = cable_impedance_NKT(length, mat_g, area, phase_g, R_factor=1.5)
+            Z_max_seg = cable_impedance_NKT(length, mat_g, area, phase_g, R_factor=1.0)
+        except KeyError:
+            raise BeregningsFejl(
+                "Gruppe – impedans",
+                "Mangler R/X-data for dette tværsnit – kan ikke beregne impedans.",
+            )
+
+        t("gruppe.z_seg", s.nr, length, area, Z_min_seg, Z_max_seg)
+
+        Z_group_min += Z_min_seg
+        Z_group_max += Z_max_seg
+
+    t("gruppe.z_sum", Z_group_min, Z_group_max)
+
+    # --------------------------------------------------------
+    # IK,MIN FOR GRUPPEN
+    # --------------------------------------------------------
+    t("gruppe.ikmin_start")
+
+    In_source = stik.In_source
+    src_txt = stik.src_txt or "In,stik"
+    I_min_supply = stik.I_min_supply
+
+    if I_min_supply is None or In_source is None:
+        # fallback – brug gruppens egen In
+        I_min_supply = 5.0 * In_g
+        In_source = In_g
+        src_txt = "In,gruppe"
+
+    Z_sup_min = U_v / I_min_supply
+    Z_kabel_min = Z_stik_min + Z_group_min
+    Z_total_min = Z_sup_min + 2 * Z_kabel_min
+
+    Ik_min_g = U_v / Z_total_min
+
+    t(
+        "gruppe.ikmin", src_txt, In_source, I_min_supply, U_v, Z_stik_min,
+        Z_group_min, Z_sup_min, Z_kabel_min, Ik_min_g,
+    )
+
+    # --------------------------------------------------------
+    # IK,MAX FOR GRUPPEN
+    # --------------------------------------------------------
+    t("gruppe.ikmax_start")
+
+    Z_for_max = Z_stik_max + Z_group_max
+    Ik_max_g, Z_total_max = ik_max_stik(U_v, Ik_trafo, cos_trafo, Z_for_max)
+
+    t("gruppe.ikmax", Ik_max_g, Z_total_max)
+
+    # --------------------------------------------------------
+    # SPÆNDINGSFALD – GRUPPE + STIK
+    # --------------------------------------------------------
+    t("gruppe.du_start")
+    try:
+        du_grp, _ = voltage_drop_ds(
+            U_v, In_g, mat_g, sq_corr, total_len_group, phase_g, cos_load_g
+        )
+    except KeyError:
+        raise BeregningsFejl(
+            "Gruppe – spændingsfald",
+            "Mangler R/X-data for dette tværsnit – kan ikke beregne ΔU.",
+        )
+
+    du_grp_pct = du_grp / U_v * 100.0
+
+    du_stik_grp, _ = voltage_drop_ds(
+        U_v, In_g, mat_stik, S_stik, L_stik, phase_g, cos_load_g
+    )
+    du_tot = du_grp + du_stik_grp
+    du_tot_pct = du_tot / U_v * 100.0
+
+    t("gruppe.du", du_grp, du_grp_pct, du_stik_grp, du_tot, du_tot_pct)
+    if du_tot_pct > du_max_pct:
+        t("gruppe.du_over", du_max_pct)
+    else:
+        t("gruppe.du_ok", du_max_pct)
+
+    # --------------------------------------------------------
+    # TERMISK (k²S² vs I²t)
+    # --------------------------------------------------------
+    t("gruppe.termisk_start")
+
+    Ik_for_fuse_g = abs(Ik_min_g)
+
+    fuse_manu = grp.fuse_manu
+    fuse_ui_type = grp.fuse_type
+    mcb_curve = None
+
+    # Automatisk valg mellem MCB B og C ud fra Ik,min
+    if fuse_ui_type == "MCB (auto B/C)":
+        I5_B = 5.0 * In_g
+        I5_C = 10.0 * In_g
+
+        t("gruppe.mcb", In_g, Ik_for_fuse_g, I5_B, I5_C)
+
+        if Ik_for_fuse_g > I5_C:
+            fuse_type = "MCB C"
+            mcb_curve = "C"
+            t("gruppe.mcb_c")
+        elif Ik_for_fuse_g > I5_B:
+            fuse_type = "MCB B"
+            mcb_curve = "B"
+            t("gruppe.mcb_b")
+        else:
+            t("gruppe.mcb_ingen")
+            raise BeregningsFejl(
+                "Gruppe – MCB",
+                "Ik,min er for lav til både B- og C-kurve.\n"
+                "Vælg en anden gruppesikring (fx Diazed) eller ændr installationen.",
+            )
+    else:
+        fuse_type = fuse_ui_type
+
+    try:
+        curve_points_g, In_curve_g, Imin_factor_g = get_fuse_data(
+            fuse_manu, fuse_type, In_g
+        )
+    except KeyError:
+        raise BeregningsFejl(
+            "Gruppe – sikring",
+            "Kunne ikke finde sikringsdata for den valgte type.",
+        )
+
+    Ik_for_fuse_g = Ik_min_g.real if isinstance(Ik_min_g, complex) else Ik_min_g
+    if Ik_for_fuse_g < Imin_factor_g * In_g:
+        t("gruppe.ikmin_advarsel", Imin_factor_g)
+
+    t_trip_g, fuse_text_g = fuse_trip_time_explain(
+        In_curve_g, Ik_for_fuse_g, curve_points_g
+    )
+
+    k_val = 143.0 if mat_g == "Cu" else 94.0
+    E_kabel_sum = 0.0
+    for s in segments:
+        S_i = s.area
+        E_kabel_sum += k_val**2 * S_i**2
+
+    E_bryde_g = Ik_for_fuse_g**2 * t_trip_g
+    termisk_ok = E_kabel_sum > E_bryde_g
+
+    t(
+        "gruppe.termisk", t_trip_g, In_curve_g, fuse_type, fuse_text_g, k_val,
+        [s.area for s in segments], E_kabel_sum, Ik_for_fuse_g, E_bryde_g,
+        termisk_ok,
+    )
+
+    return GroupResult(
+        name=name,
+        sq=sq_corr,
+        Ik_min=Ik_min_g,
+        Ik_max=Ik_max_g,
+        du_grp=du_grp,
+        du_grp_pct=du_grp_pct,
+        du_tot=du_tot,
+        du_tot_pct=du_tot_pct,
+        termisk_ok=termisk_ok,
+        fuse_type=fuse_type,
+        mcb_curve=mcb_curve,
+        t_trip=t_trip_g,
+        Imin_factor=Imin_factor_g,
+        worst_Iznod=worst_Iznod,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Mange grupper – procespulje
+# ---------------------------------------------------------------------------
+
+_WORKER_STIK = None
+
+
+def _init_worker(stik: StikContext):
+    """Initializer: stik-konteksten sendes én gang pr. worker."""
+    global _WORKER_STIK
+    _WORKER_STIK = stik
+
+
+def _beregn_en(grp: GroupInput, stik: StikContext = None, with_log: bool = True):
+    """
+    Beregner én gruppe og fanger fejl.
+
+    Returnerer (resultat | None, (titel, besked) | None, spor). Sporet
+    (calc_trace.Trace) er tomt når with_log er False.
+    """
+    trace = Trace()
+    try:
+        res = beregn_gruppe(
+            grp, stik if stik is not None else _WORKER_STIK,
+            trace=trace if with_log else None,
+        )
+        return res, None, trace
+    except BeregningsFejl as exc:
+        return None, (exc.titel, exc.besked), trace
+    except Exception as exc:  # uventet fejl i én gruppe må ikke stoppe resten
+        return None, ("Gruppe – fejl", f"{type(exc).__name__}: {exc}"), trace
+
+
+def _beregn_en_worker(grp: GroupInput, with_log: bool):
+    return _beregn_en(grp, None, with_log)
+
+
+def beregn_alle_grupper(groups, stik: StikContext, workers: int = None,
+                        with_log: bool = True):
+    """
+    Beregner alle grupper mod samme stik-kontekst.
+
+    Returnerer en liste (samme rækkefølge som groups) af tuples
+        (resultat | None, (titel, besked) | None, spor)
+    Fejl i en gruppe samles op i stedet for at afbryde kørslen.
+    """
+    groups = list(groups)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1 or len(groups) < POOL_MIN_GROUPS:
+        return [_beregn_en(g, stik, with_log) for g in groups]
+
+    chunksize = max(1, len(groups) // (workers * 4))
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(stik,)
+    ) as pool:
+        return list(
+            pool.map(
+                _beregn_en_worker,
+                groups,
+                [with_log] * len(groups),
+                chunksize=chunksize,
+            )
+        )
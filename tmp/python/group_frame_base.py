@@ -1,9 +1,19 @@
 import tkinter as tk
 from tkinter import ttk
 
+from records import GruppeFelter
 from segment_frame import SegmentFrame
 
 
+def saet_tekst(widget, tekst: str):
+    """Sætter teksten i et Entry eller en (readonly) Combobox."""
+    if isinstance(widget, ttk.Combobox):
+        widget.set(tekst)
+    else:
+        widget.delete(0, tk.END)
+        widget.insert(0, tekst)
+
+
 class GroupFrameBase(ttk.LabelFrame):
     """Grund-GUI for én gruppe (MODEL A).
 
@@ -136,6 +146,16 @@ class GroupFrameBase(ttk.LabelFrame):
         )
         self.chk_auto_size.grid(row=row, column=2, columnspan=3, sticky="w")
 
+        # Live-beregning: resultaterne opdateres mens der tastes
+        # (mellemregninger skrives kun ved "Beregn gruppe")
+        self.live_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            self,
+            text="Live",
+            variable=self.live_var,
+            command=self.on_input_change,
+        ).grid(row=row, column=5, sticky="w")
+
         row += 1
 
         # --------------------------------------------------------
@@ -192,6 +212,9 @@ class GroupFrameBase(ttk.LabelFrame):
         self.lbl_termisk = ttk.Label(res, text="-")
         self.lbl_termisk.grid(row=2, column=1, sticky="w")
 
+        self.lbl_live = ttk.Label(res, text="")
+        self.lbl_live.grid(row=2, column=2, columnspan=2, sticky="w")
+
         # Gør så resultatsfelt kan fylde ekstra vandret
         for c in range(4):
             res.columnconfigure(c, weight=1)
@@ -199,6 +222,16 @@ class GroupFrameBase(ttk.LabelFrame):
         # Sørg for at faseskift initialt sætter In + belastede ledere korrekt
         self.on_phase_change()
 
+        # Gruppens egne felter udløser også live-beregning
+        # (on_input_change ligger i GroupCalcMixin)
+        for entry in (
+            self.entry_name, self.entry_In, self.entry_cos, self.entry_du_max
+        ):
+            entry.bind("<KeyRelease>", self.on_input_change, add="+")
+        for combo in (self.c_phase, self.c_mat, self.c_fuse_type):
+            combo.bind("<<ComboboxSelected>>", self.on_input_change, add="+")
+        self.chk_auto_size.configure(command=self.on_input_change)
+
     # ------------------------------------------------------------------
     # Hjælpefunktioner til segmenter og mellemregninger
     # ------------------------------------------------------------------
@@ -210,8 +243,10 @@ class GroupFrameBase(ttk.LabelFrame):
 
         # Sæt belastede ledere efter gruppens fasesystem
         frame.set_cores_for_phase(self.c_phase.get())
+        frame.add_change_callback(self.on_input_change)
 
         self.segment_frames.append(frame)
+        self.on_input_change()
 
     def remove_segment(self):
         """Fjern sidste segment (men behold mindst ét)."""
@@ -219,6 +254,7 @@ class GroupFrameBase(ttk.LabelFrame):
             return
         frame = self.segment_frames.pop()
         frame.destroy()
+        self.on_input_change()
 
     def log_mellem(self, text_line: str):
         """Skriv én linje i fælles Mellemregninger-tekstfeltet."""
@@ -227,6 +263,46 @@ class GroupFrameBase(ttk.LabelFrame):
         self.text_mellem.insert(tk.END, text_line + "\n")
         self.text_mellem.see(tk.END)
 
+    # ------------------------------------------------------------------
+    # Feltværdier (fortryd/gentag)
+    # ------------------------------------------------------------------
+    def felter(self) -> GruppeFelter:
+        """Gruppens felter som de står (se records.GruppeFelter)."""
+        return GruppeFelter(
+            name=self.entry_name.get(),
+            In=self.entry_In.get(),
+            phase=self.c_phase.get(),
+            material=self.c_mat.get(),
+            cos=self.entry_cos.get(),
+            fuse_manu=self.c_fuse_manu.get(),
+            fuse_type=self.c_fuse_type.get(),
+            du_max=self.entry_du_max.get(),
+            auto_size=bool(self.auto_size_var.get()),
+            segments=tuple(s.felter() for s in self.segment_frames),
+        )
+
+    def saet_felter(self, f: GruppeFelter):
+        """Sætter felterne tilbage uden live-beregning undervejs."""
+        self._applying = True
+        try:
+            saet_tekst(self.entry_name, f.name)
+            saet_tekst(self.entry_In, f.In)
+            saet_tekst(self.c_phase, f.phase)
+            saet_tekst(self.c_mat, f.material)
+            saet_tekst(self.entry_cos, f.cos)
+            saet_tekst(self.c_fuse_manu, f.fuse_manu)
+            saet_tekst(self.c_fuse_type, f.fuse_type)
+            saet_tekst(self.entry_du_max, f.du_max)
+            self.auto_size_var.set(f.auto_size)
+            while len(self.segment_frames) < len(f.segments):
+                self.add_segment()
+            while len(self.segment_frames) > len(f.segments):
+                self.remove_segment()
+            for frame, seg in zip(self.segment_frames, f.segments):
+                frame.saet_felter(seg)
+        finally:
+            self._applying = False
+
     # ------------------------------------------------------------------
     # Reaktion på skift mellem 1-faset / 3-faset
     # ------------------------------------------------------------------
@@ -0,0 +1,328 @@
+"""
+Fortryd/gentag over projektmodellen med delte øjebliksbilleder.
+
+Et øjebliksbillede (Projekt) er uforanderligt: stikledningens felter og
+resultat samt gruppernes felter og deres resultater. Felterne gemmes som
+de står i GUI'en (records.StikFelter/GruppeFelter), så et fortryd-trin
+også kan sætte ufærdige tal tilbage. Records er allerede frosne
+(records.py), så kun listerne skal deles. Grupperne ligger derfor i en
+persistent vektor (PVector) – et 32-vejs træ hvor en ændring kun kopierer
+stien fra roden til bladet (log32(n) knuder á højst 32 pointere). Et
+fortryd-trin koster altså hukommelse svarende til ændringen, ikke til
+projektet: for 5000 grupper er det tre små knuder.
+
+Resultaterne gemmes i billedet sammen med inputtet. Fortryd giver derfor
+de tidligere resultater tilbage uden genberegning. Et gruppe-resultat
+gemmes med den stik-kontekst det er regnet mod og gælder kun, når
+konteksten er den samme som billedets – så en ny stikledning ugyldiggør
+alle gruppe-resultater i O(1) uden at røre vektoren.
+
+I Main.py er et trin en beregning af stikledningen, tilføj/fjern gruppe
+eller en ændring i en gruppes felter (samlet til ét trin efter en kort
+pause i tastningen). Resultater gemmes med opdater(). Fortryd/Gentag
+findes som knapper og som Ctrl+Z / Ctrl+Y.
+
+    h = Historik(Projekt.tomt())
+    h.udfoer(h.nu.med_gruppe(gf.felter()), "Tilføj gruppe")
+    h.opdater(h.nu.med_resultat(0, stik, res, None))  # intet nyt trin
+    h.fortryd(); h.gentag()
+"""
+
+from dataclasses import dataclass, replace
+from typing import Optional
+
+from records import GruppeFelter, StikContext, StikFelter, StikResult
+
+_BITS = 5
+_WIDTH = 1 << _BITS
+_MASK = _WIDTH - 1
+
+# Standard antal fortryd-trin der gemmes
+MAX_TRIN = 500
+
+
+# ---------------------------------------------------------------------------
+# Persistent vektor
+# ---------------------------------------------------------------------------
+
+
+class PVector:
+    """
+    Uforanderlig liste med strukturel deling (32-vejs træ, stikopiering).
+
+    set/append/pop returnerer en ny vektor og deler alle urørte knuder
+    med den gamle. Knuder er tuples; bladene holder elementerne.
+    """
+
+    __slots__ = ("_n", "_shift", "_root")
+
+    def __init__(self, n=0, shift=_BITS, root=()):
+        self._n = n
+        self._shift = shift
+        self._root = root
+
+    @classmethod
+    def from_iterable(cls, items):
+        v = cls()
+        for x in items:
+            v = v.append(x)
+        return v
+
+    def __len__(self):
+        return self._n
+
+    def _leaf(self, i):
+        node = self._root
+        shift = self._shift
+        while shift > 0:
+            node = node[(i >> shift) & _MASK]
+            shift -= _BITS
+        return node
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._n))]
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError("PVector-indeks uden for området")
+        return self._leaf(i)[i & _MASK]
+
+    def __iter__(self):
+        for start in range(0, self._n, _WIDTH):
+            leaf = self._leaf(start)
+            yield from leaf[: min(_WIDTH, self._n - start)]
+
+    def __eq__(self, other):
+        if not isinstance(other, PVector):
+            return NotImplemented
+        if self._root is other._root and self._n == other._n:
+            return True
+        return self._n == other._n and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self):
+        return f"PVector({list(self)!r})"
+
+    # ------------------------------------------------------------------
+    def set(self, i, value):
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError("PVector-indeks uden for området")
+        return PVector(self._n, self._shift, _set(self._root, self._shift, i, value))
+
+    def append(self, value):
+        n = self._n
+        if n == (1 << (self._shift + _BITS)):
+            # Træet er fuldt – ny rod med det gamle træ som første barn
+            root = (self._root, _path(self._shift, value))
+            return PVector(n + 1, self._shift + _BITS, root)
+        return PVector(n + 1, self._shift, _push(self._root, self._shift, n, value))
+
+    def pop(self):
+        """Vektoren uden sidste element."""
+        if self._n == 0:
+            raise IndexError("pop fra tom PVector")
+        n = self._n - 1
+        if n == 0:
+            return PVector()
+        root = _trim(self._root, self._shift, n)
+        shift = self._shift
+        while shift > _BITS and len(root) == 1:
+            root = root[0]
+            shift -= _BITS
+        return PVector(n, shift, root)
+
+    def delete(self, i):
+        """Vektoren uden element i (kopierer elementerne efter i)."""
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError("PVector-indeks uden for området")
+        tail = [self[j] for j in range(i + 1, self._n)]
+        v = self
+        for _ in range(self._n - i):
+            v = v.pop()
+        for x in tail:
+            v = v.append(x)
+        return v
+
+
+def _set(node, shift, i, value):
+    idx = (i >> shift) & _MASK
+    if shift == 0:
+        return node[:idx] + (value,) + node[idx + 1:]
+    child = _set(node[idx], shift - _BITS, i, value)
+    return node[:idx] + (child,) + node[idx + 1:]
+
+
+def _path(shift, value):
+    node = (value,)
+    while shift > 0:
+        node = (node,)
+        shift -= _BITS
+    return node
+
+
+def _push(node, shift, i, value):
+    if shift == 0:
+        return node + (value,)
+    idx = (i >> shift) & _MASK
+    if idx < len(node):
+        return node[:idx] + (_push(node[idx], shift - _BITS, i, value),)
+    return node + (_path(shift - _BITS, value),)
+
+
+def _trim(node, shift, n):
+    """Fjerner element n (det sidste) og tomme knuder på vejen."""
+    if shift == 0:
+        return node[:-1]
+    idx = (n >> shift) & _MASK
+    child = _trim(node[idx], shift - _BITS, n)
+    if child:
+        return node[:idx] + (child,)
+    return node[:idx]
+
+
+# ---------------------------------------------------------------------------
+# Projektmodel
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True, slots=True)
+class Projekt:
+    """Ét øjebliksbillede af projektet (input + resultater)."""
+
+    stik: Optional[StikFelter]
+    stik_resultat: Optional[StikResult]
+    stik_kontekst: Optional[StikContext]
+    grupper: PVector
+    # pr. gruppe: None eller (stik-kontekst, resultat | None, (titel, besked) | None)
+    resultater: PVector
+
+    @classmethod
+    def tomt(cls):
+        return cls(None, None, None, PVector(), PVector())
+
+    @classmethod
+    def fra(cls, stik: StikFelter = None, grupper=()):
+        grupper = PVector.from_iterable(grupper)
+        return cls(stik, None, None, grupper, PVector.from_iterable([None] * len(grupper)))
+
+    # ---------------- ændringer (giver nyt billede) ----------------
+    def med_stik(self, felter: StikFelter):
+        """Nyt stik-input; stik-resultatet og dermed gruppe-resultaterne udløber."""
+        return replace(self, stik=felter, stik_resultat=None, stik_kontekst=None)
+
+    def med_stik_resultat(self, res: StikResult, kontekst: StikContext):
+        return replace(self, stik_resultat=res, stik_kontekst=kontekst)
+
+    def med_gruppe(self, grp: GruppeFelter):
+        return replace(
+            self,
+            grupper=self.grupper.append(grp),
+            resultater=self.resultater.append(None),
+        )
+
+    def med_gruppe_aendret(self, i: int, grp: GruppeFelter):
+        if self.grupper[i] == grp:
+            return self
+        return replace(
+            self,
+            grupper=self.grupper.set(i, grp),
+            resultater=self.resultater.set(i, None),
+        )
+
+    def uden_gruppe(self, i: int):
+        if i == len(self.grupper) - 1 or i == -1:
+            return replace(
+                self, grupper=self.grupper.pop(), resultater=self.resultater.pop()
+            )
+        return replace(
+            self,
+            grupper=self.grupper.delete(i),
+            resultater=self.resultater.delete(i),
+        )
+
+    def med_resultat(self, i: int, kontekst: StikContext, res, err=None):
+        return replace(self, resultater=self.resultater.set(i, (kontekst, res, err)))
+
+    # ---------------- opslag ----------------
+    def resultat(self, i: int):
+        """
+        (resultat, fejl) for gruppe i hvis det er regnet mod billedets
+        nuværende stik-kontekst, ellers None (skal regnes).
+        """
+        entry = self.resultater[i]
+        if entry is None or self.stik_kontekst is None:
+            return None
+        kontekst, res, err = entry
+        if kontekst != self.stik_kontekst:
+            return None
+        return res, err
+
+    def mangler_beregning(self):
+        """Indeks for grupper uden gyldigt resultat."""
+        return [i for i in range(len(self.grupper)) if self.resultat(i) is None]
+
+
+# ---------------------------------------------------------------------------
+# Historik
+# ---------------------------------------------------------------------------
+
+
+class Historik:
+    """Fortryd/gentag-stakke af Projekt-billeder."""
+
+    def __init__(self, start: Projekt = None, max_trin: int = MAX_TRIN):
+        self.nu = start if start is not None else Projekt.tomt()
+        self.max_trin = max_trin
+        self._fortryd = []  # (billede, tekst)
+        self._gentag = []
+
+    def udfoer(self, projekt: Projekt, tekst: str = ""):
+        """Nyt trin. Et billede magen til det nuværende giver intet trin."""
+        if projekt is self.nu:
+            return
+        self._fortryd.append((self.nu, tekst))
+        if len(self._fortryd) > self.max_trin:
+            del self._fortryd[0]
+        self._gentag.clear()
+        self.nu = projekt
+
+    def opdater(self, projekt: Projekt):
+        """
+        Erstatter det nuværende billede uden nyt trin – til resultater, som
+        er afledt af inputtet og ikke skal kunne fortrydes for sig.
+        """
+        self.nu = projekt
+
+    @property
+    def kan_fortryde(self) -> bool:
+        return bool(self._fortryd)
+
+    @property
+    def kan_gentage(self) -> bool:
+        return bool(self._gentag)
+
+    def fortryd_tekst(self) -> str:
+        return self._fortryd[-1][1] if self._fortryd else ""
+
+    def gentag_tekst(self) -> str:
+        return self._gentag[-1][1] if self._gentag else ""
+
+    def fortryd(self) -> Projekt:
+        if not self._fortryd:
+            return self.nu
+        forrige, tekst = self._fortryd.pop()
+        self._gentag.append((self.nu, tekst))
+        self.nu = forrige
+        return self.nu
+
+    def gentag(self) -> Projekt:
+        if not self._gentag:
+            return self.nu
+        naeste, tekst = self._gentag.pop()
+        self._fortryd.append((self.nu, tekst))
+        self.nu = naeste
+        return self.nu
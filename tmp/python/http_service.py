@@ -0,0 +1,242 @@
+"""
+Lokal HTTP/JSON-service for beregningerne (kun standardbiblioteket).
+
+    python http_service.py [port] [workers]
+
+Starter en asyncio-server på 127.0.0.1 (standard port 8765). Endpoints
+svarer til metoderne i service_api:
+
+    POST /gruppe       én gruppe
+    POST /grupper      mange grupper mod samme stik-kontekst
+    POST /stikledning  stikledningen
+    POST /projekt      stikledning + alle grupper
+    POST /jordfejl     jordfejlsbeskyttelse og RCD-krav for grupper
+    POST /parallel     parallelle kabler i stikledningen
+    POST /billigst     billigste gyldige design for en gruppe
+    POST /iz           Iz-opslag
+    POST /sikring      udløsningstid for en sikring
+    GET  /status
+
+Body og svar er JSON (UTF-8). Forbindelser holdes åbne (HTTP/1.1
+keep-alive), og flere forespørgsler kan sendes efter hinanden på samme
+forbindelse; svarene kommer i samme rækkefølge.
+
+Selve beregningen – inkl. JSON-parsing – sker på en procespulje, så
+event-løkken kun læser og skriver sockets. Med workers = 0 regnes der i
+en tråd i stedet (nyttigt til fejlsøgning). Hver worker har sine egne
+opslagstabeller: de fylder kun få KB og er importeret på et par ms, så
+der er intet at vinde ved at dele dem mellem processerne.
+"""
+
+import asyncio
+import os
+import signal
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+
+import service_api
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Største body vi tager imod (et projekt med tusindvis af grupper er ~ få MB)
+MAX_BODY = 64 * 1024 * 1024
+# Lukker forbindelser der har været stille så længe
+IDLE_TIMEOUT_S = 60.0
+
+
+class _HttpFejl(Exception):
+    def __init__(self, status: int, besked: str):
+        super().__init__(besked)
+        self.status = status
+        self.besked = besked
+
+
+def _warm_up():
+    """Initializer: tabeller og records er importeret før første forespørgsel."""
+    service_api.handle("status", {})
+
+
+# ---------------------------------------------------------------------------
+# HTTP
+# ---------------------------------------------------------------------------
+
+
+async def _read_request(reader):
+    """(metode, sti, keep_alive, body) eller None hvis forbindelsen er lukket."""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, version = line.decode("latin-1").split()
+    except ValueError:
+        raise _HttpFejl(400, "Ugyldig request-linje.")
+
+    headers = {}
+    while True:
+        h = await reader.readline()
+        if h in (b"\r\n", b"\n", b""):
+            break
+        name, sep, value = h.decode("latin-1").partition(":")
+        if not sep:
+            raise _HttpFejl(400, "Ugyldig header.")
+        headers[name.strip().lower()] = value.strip()
+
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        raise _HttpFejl(411, "Angiv Content-Length (chunked understøttes ikke).")
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise _HttpFejl(400, "Ugyldig Content-Length.")
+    if length < 0 or length > MAX_BODY:
+        raise _HttpFejl(413, "Forespørgslen er for stor.")
+    body = await reader.readexactly(length) if length else b""
+
+    conn = headers.get("connection", "").lower()
+    if version == "HTTP/1.1":
+        keep_alive = conn != "close"
+    else:
+        keep_alive = conn == "keep-alive"
+    return method, target, keep_alive, body
+
+
+def _response(status: int, body: bytes, keep_alive: bool) -> bytes:
+    head = (
+        f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+        "\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+class CalcServer:
+    """asyncio-server der sender forespørgsler videre til service_api."""
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 workers: int = None):
+        self.host = host
+        self.port = port
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers <= 0:
+            self.pool = ThreadPoolExecutor(max_workers=1)
+        else:
+            self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_warm_up)
+        self.server = None
+        self._conns = {}  # task → writer for åbne forbindelser
+
+    async def _dispatch(self, method: str, target: str, body: bytes):
+        path = target.split("?", 1)[0].strip("/")
+        if path not in service_api.METHODS:
+            raise _HttpFejl(404, f"Ukendt endpoint: /{path}")
+        if path == "status":
+            if method not in ("GET", "POST"):
+                raise _HttpFejl(405, "Brug GET eller POST.")
+        elif method != "POST":
+            raise _HttpFejl(405, "Brug POST.")
+        try:
+            text = body.decode("utf-8")
+        except UnicodeDecodeError:
+            raise _HttpFejl(400, "Body skal være UTF-8.")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.pool, service_api.handle_json, path, text
+        )
+
+    async def _handle_conn(self, reader, writer):
+        task = asyncio.current_task()
+        self._conns[task] = writer
+        try:
+            while True:
+                try:
+                    req = await asyncio.wait_for(
+                        _read_request(reader), IDLE_TIMEOUT_S
+                    )
+                except _HttpFejl as exc:
+                    body = service_api.fejl_json("HTTP", exc.besked)
+                    writer.write(_response(exc.status, body.encode("utf-8"), False))
+                    await writer.drain()
+                    break
+                if req is None:
+                    break
+                method, target, keep_alive, body = req
+                try:
+                    status, text = await self._dispatch(method, target, body)
+                except _HttpFejl as exc:
+                    status = exc.status
+                    text = service_api.fejl_json("HTTP", exc.besked)
+                writer.write(_response(status, text.encode("utf-8"), keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError,
+                ConnectionError):
+            pass
+        finally:
+            self._conns.pop(task, None)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def start(self):
+        self.server = await asyncio.start_server(
+            self._handle_conn, self.host, self.port
+        )
+        # port 0 → OS vælger en ledig port
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.server
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def aclose(self):
+        """Stopper med at tage imod og lukker åbne keep-alive-forbindelser."""
+        if self.server is not None:
+            self.server.close()
+        for writer in list(self._conns.values()):
+            writer.close()
+        await asyncio.gather(*self._conns, return_exceptions=True)
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, workers: int = None):
+    srv = CalcServer(host, port, workers)
+
+    async def _run():
+        await srv.start()
+        print(f"Beregningsservice kører på http://{srv.host}:{srv.port}/", flush=True)
+        # Stop pænt ved SIGINT/SIGTERM, så procespuljen også lukkes
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):  # Windows
+                pass
+        await stop.wait()
+        await srv.aclose()
+
+    try:
+        asyncio.run(_run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.close()
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    serve(DEFAULT_HOST, port, workers)
@@ -0,0 +1,288 @@
+"""
+Tabeller over maksimal tilladelig kabellængde for grupper.
+
+For hver kombination af (materiale, tværsnit, fasesystem, sikringstype, In,
+I_min,forsyning) løses direkte for den største længde L, hvor
+
+  - realdelen af Ik,min i gruppeudtaget (formlen fra ik_min_group) stadig
+    er mindst Imin_factor·In for sikringen, som group_engine kræver, og
+  - spændingsfaldet (DS-formlen fra voltage_drop_ds) ikke overskrider
+    den tilladte grænse.
+
+Begge betingelser er lukkede udtryk i L, så en hel tabel beregnes i ét
+gennemløb uden iteration. Færdige tabeller gemmes som JSON på disken og
+genbruges, så længe parametre og kabel-/sikringsdata er uændrede.
+"""
+
+import csv
+import hashlib
+import json
+import math
+import os
+
+from calculations import (
+    Q_MATERIAL,
+    LAMBDA_MATERIAL,
+    STANDARD_SIZES,
+    cable_impedance_NKT,
+    ik_min_group,
+    voltage_drop_ds,
+)
+from fuse_curves import FUSE_DB
+from Tabel import NKT_R, NKT_XL
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+
+TABLE_COLUMNS = (
+    "material",
+    "sq",
+    "phase",
+    "fuse_type",
+    "In",
+    "I_min_supply",
+    "L_max_ik",
+    "L_max_du",
+    "L_max",
+)
+
+# Tælles op når selve udregningen ændres, så gamle cache-filer ikke genbruges
+# (version 2: Ik,min-kravet regnes på realdelen som i group_engine).
+FORMULA_VERSION = 2
+
+
+# ---------------------------------------------------------------------------
+# Lukkede udtryk for maksimal længde
+# ---------------------------------------------------------------------------
+
+
+def _max_length_ik(U_v, I_min_supply, Z_stik_min, z_min_m, Ik_req):
+    """
+    Største længde L [m] hvor Re(Ik,min) ≥ Ik_req – samme kontrol som
+    group_engine (realdelen af Ik,min mod Imin_factor·In).
+
+    Fra ik_min_group:
+        Ik,min = U / (Z_sup + 2·(Z_stik + L·z))
+
+    Med A = Z_sup + 2·Z_stik og B = 2·z er Re(U / (A + L·B)) =
+    U·Re(A + L·B) / |A + L·B|², så kravet giver en 2.-gradsulighed i L:
+
+        Ik_req·|B|²·L² + (2·Ik_req·Re(A·conj(B)) − U·Re(B))·L
+            + Ik_req·|A|² − U·Re(A) ≤ 0
+
+    Returnerer 0.0 hvis kravet ikke engang er opfyldt ved L = 0.
+    """
+    Z_sup_min = U_v / I_min_supply
+    A = Z_sup_min + 2 * Z_stik_min
+    B = 2 * z_min_m
+
+    c = Ik_req * abs(A) ** 2 - U_v * A.real
+    if c >= 0:
+        return 0.0
+
+    a = Ik_req * abs(B) ** 2
+    b = 2 * Ik_req * (A * B.conjugate()).real - U_v * B.real
+    disc = b * b - 4 * a * c
+    return (-b + math.sqrt(disc)) / (2 * a)
+
+
+def _du_per_metre(U_v, In, material, sq, phase, cosphi):
+    """ΔU [V] pr. meter kabel – voltage_drop_ds er lineær i længden."""
+    du_1m, _ = voltage_drop_ds(U_v, In, material, sq, 1.0, phase, cosphi)
+    return du_1m
+
+
+# ---------------------------------------------------------------------------
+# Tabelgenerator
+# ---------------------------------------------------------------------------
+
+
+def _sizes_for(material):
+    """Standardtværsnit der findes i NKT-tabellerne for materialet."""
+    return [s for s in STANDARD_SIZES if s in NKT_R[material]]
+
+
+def generate_table(
+    U_v=230,
+    materials=("Cu", "Al"),
+    phases=("1-faset", "3-faset"),
+    fuse_types=None,
+    I_min_supply_values=(175.0,),
+    Z_stik_min=0j,
+    du_max_pct=5.0,
+    cosphi=1.0,
+    fuse_manu="Standard",
+):
+    """
+    Beregner hele tabellen over maksimale længder.
+
+    Returnerer en liste af dicts med nøglerne i TABLE_COLUMNS. L_max er den
+    mindste af L_max_ik (Ik,min-kravet) og L_max_du (spændingsfaldskravet).
+    """
+    if fuse_types is None:
+        fuse_types = [t for (m, t) in FUSE_DB if m == fuse_manu]
+
+    rows = []
+    for material in materials:
+        for phase in phases:
+            for sq in _sizes_for(material):
+                # Impedans og ΔU pr. meter er uafhængige af sikring og forsyning
+                try:
+                    z_min_m = cable_impedance_NKT(
+                        1.0, material, sq, phase, R_factor=1.5
+                    )
+                except KeyError:
+                    # Mangler R/X-data for kombinationen (fx Al 3-leder)
+                    continue
+
+                for fuse_type in fuse_types:
+                    data = FUSE_DB[(fuse_manu, fuse_type)]
+                    Imin_factor = data.get("Imin_factor", 5.0)
+
+                    for In in sorted(data["curves"].keys()):
+                        du_m = _du_per_metre(U_v, In, material, sq, phase, cosphi)
+                        if du_m > 0:
+                            L_du = (du_max_pct / 100.0 * U_v) / du_m
+                        else:
+                            L_du = math.inf
+                        Ik_req = Imin_factor * In
+
+                        for I_min_supply in I_min_supply_values:
+                            L_ik = _max_length_ik(
+                                U_v, I_min_supply, Z_stik_min, z_min_m, Ik_req
+                            )
+                            rows.append(
+                                {
+                                    "material": material,
+                                    "sq": sq,
+                                    "phase": phase,
+                                    "fuse_type": fuse_type,
+                                    "In": float(In),
+                                    "I_min_supply": float(I_min_supply),
+                                    "L_max_ik": L_ik,
+                                    "L_max_du": L_du,
+                                    "L_max": min(L_ik, L_du),
+                                }
+                            )
+    return rows
+
+
+def check_row(row, U_v=230, Z_stik_min=0j, cosphi=1.0, fuse_manu="Standard"):
+    """
+    Kontrol af én tabelrække med de almindelige formler:
+    returnerer (Re(Ik,min), ΔU[%]) ved L = L_max.
+    """
+    L = row["L_max"]
+    Z_group_min = cable_impedance_NKT(
+        L, row["material"], row["sq"], row["phase"], R_factor=1.5
+    )
+    Ik_min = ik_min_group(U_v, row["I_min_supply"], Z_stik_min, Z_group_min)
+    _, du_pct = voltage_drop_ds(
+        U_v, row["In"], row["material"], row["sq"], L, row["phase"], cosphi
+    )
+    return Ik_min.real, du_pct
+
+
+# ---------------------------------------------------------------------------
+# Cache på disk
+# ---------------------------------------------------------------------------
+
+
+def table_fingerprint():
+    """Fingeraftryk af de kabel- og sikringsdata som tabellerne bygger på."""
+    payload = {
+        "NKT_R": NKT_R,
+        "NKT_XL": NKT_XL,
+        "Q": Q_MATERIAL,
+        "LAMBDA": LAMBDA_MATERIAL,
+        "fuses": {
+            f"{m}|{t}": [d.get("Imin_factor", 5.0), sorted(d["curves"].keys())]
+            for (m, t), d in FUSE_DB.items()
+        },
+    }
+    raw = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def cached_table(cache_dir=CACHE_DIR, **params):
+    """
+    Som generate_table, men gemmer/henter resultatet i cache_dir.
+
+    Cache-nøglen er parametrene + table_fingerprint() + FORMULA_VERSION,
+    så en ændring i Tabel.py, fuse_curves.py eller formlerne automatisk
+    giver en ny tabel.
+    """
+    key_data = dict(params)
+    if "Z_stik_min" in key_data:
+        z = complex(key_data["Z_stik_min"])
+        key_data["Z_stik_min"] = [z.real, z.imag]
+    key_data["_tables"] = table_fingerprint()
+    key_data["_formula"] = FORMULA_VERSION
+    key = hashlib.sha256(
+        json.dumps(key_data, sort_keys=True, default=list).encode("utf-8")
+    ).hexdigest()[:24]
+
+    path = os.path.join(cache_dir, f"maxlaengde_{key}.json")
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    rows = generate_table(**params)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(rows, f)
+    os.replace(tmp_path, path)
+    return rows
+
+
+def max_length(
+    material,
+    sq,
+    phase,
+    fuse_type,
+    In,
+    I_min_supply,
+    U_v=230,
+    Z_stik_min=0j,
+    du_max_pct=5.0,
+    cosphi=1.0,
+    fuse_manu="Standard",
+):
+    """
+    Opslag for én kombination – fx 2,5 mm² Cu på 13 A Neozed gG.
+    Returnerer rækken (dict) fra tabellen.
+    """
+    rows = generate_table(
+        U_v=U_v,
+        materials=(material,),
+        phases=(phase,),
+        fuse_types=(fuse_type,),
+        I_min_supply_values=(I_min_supply,),
+        Z_stik_min=Z_stik_min,
+        du_max_pct=du_max_pct,
+        cosphi=cosphi,
+        fuse_manu=fuse_manu,
+    )
+    for row in rows:
+        if row["sq"] == sq and row["In"] == float(In):
+            return row
+    raise KeyError(f"Ingen data for {material} {sq} mm², {fuse_type} {In} A")
+
+
+def write_csv(rows, path):
+    """Skriver tabellen som CSV (semikolon-separeret, som Excel forventer)."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=TABLE_COLUMNS, delimiter=";")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({k: row[k] for k in TABLE_COLUMNS})
+
+
+if __name__ == "__main__":
+    import sys
+
+    out = sys.argv[1] if len(sys.argv) > 1 else "maks_laengder.csv"
+    table = cached_table()
+    write_csv(table, out)
+    print(f"{len(table)} rækker skrevet til {out}")
@@ -0,0 +1,281 @@
+"""
+Belastning fra mange boliger/enheder – Velander og samtidighed.
+
+Python-udgaven af calculateVelanderPower, calculatePowerFromArea og
+wattsToAmps fra src/lib/apartmentCalculations.ts og af opsummeringen
+(inkl. calculateTotalPowerWithDiversity) pr. fælles
+stikledning i ApartmentsTab, så stikledningens In kan udledes af de
+enheder den forsyner i stedet for at blive tastet ind.
+
+Enhederne gives kolonnevis (Enheder: én liste pr. felt), og effekten pr.
+enhed regnes i ét gennemløb. Summerne pr. stigestreng og pr. stikledning
+samles i samme gennemløb (dict pr. niveau), så tusindvis af enheder tager
+millisekunder. Samtidighed lægges på pr. niveau over de enheder der
+ligger under det:
+
+  sum         ΣI (strømmene lægges direkte sammen, som "sum" i TS)
+  diversitet  ΣP · df
+  velander    ΣP · √n / n (som "velander" for fælles stikledninger i TS)
+
+Effekt pr. enhed (metode):
+
+  manuel    værdi = strøm [A]     P = √3·U·I·cosφ (3-faset) / U·I·cosφ
+  areal     værdi = areal [m²]    P = areal · LOAD_TYPES[type]
+  velander  værdi = W [W]         P = (k1·W + k2·√W) for én bolig (kW)
+
+plus ekstra_pct. stik_input_for() sætter stikledningens In til den
+mindste sikringsstørrelse der dækker den samlede strøm.
+"""
+
+import math
+from array import array
+from dataclasses import dataclass, field, fields, replace
+from typing import List
+
+from fuse_curves import FUSE_DB
+from records import LoadResult, StikInput
+
+# Belastningstyper [W/m²]
+LOAD_TYPES = {
+    "bolig": 30.0,
+    "supermarked": 110.0,
+    "detailhandel": 70.0,
+    "kontor": 40.0,
+    "lager": 10.0,
+}
+
+LOAD_TYPE_LABELS = {
+    "bolig": "Bolig/lejlighed",
+    "supermarked": "Supermarked",
+    "detailhandel": "Detailhandel og håndværk",
+    "kontor": "Kontor",
+    "lager": "Lager",
+}
+
+# Velander for helårshuse uden elvarme
+K1 = 0.24
+K2 = 2.31
+
+METODER = ("manuel", "areal", "velander")
+AGGREGERING = ("sum", "diversitet", "velander")
+
+DEFAULT_DF = 0.7
+DEFAULT_U = 400.0
+_SQRT3 = math.sqrt(3.0)
+
+
+class BelastningsFejl(ValueError):
+    """Ugyldige enhedsdata (ukendt metode/belastningstype, forkerte længder)."""
+
+
+# ---------------------------------------------------------------------------
+# Enkeltformler (som i TS)
+# ---------------------------------------------------------------------------
+
+
+def velander_power(W_watts: float, n_units: int = 1) -> float:
+    """P_B = k1·W·n + k2·√(W·n) med W i kW; returnerer W."""
+    W_kw = W_watts / 1000.0
+    return (K1 * W_kw * n_units + K2 * math.sqrt(W_kw * n_units)) * 1000.0
+
+
+def power_from_area(area_m2: float, load_type: str) -> float:
+    return area_m2 * LOAD_TYPES[load_type]
+
+
+def watts_to_amps(P: float, U: float, phase: str, cosphi: float = 1.0) -> float:
+    if phase == "3-faset":
+        return P / (_SQRT3 * U * cosphi)
+    return P / (U * cosphi)
+
+
+# ---------------------------------------------------------------------------
+# Kolonnevise enheder
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class Enheder:
+    """
+    Enhederne kolonnevis – én liste pr. felt, samme længde.
+
+    stigestreng/stikledning er id'er (tekst); None = ikke på en fælles
+    stigestreng/stikledning.
+    """
+
+    navn: List[str] = field(default_factory=list)
+    metode: List[str] = field(default_factory=list)
+    vaerdi: List[float] = field(default_factory=list)
+    belastning: List[str] = field(default_factory=list)
+    cos: List[float] = field(default_factory=list)
+    ekstra_pct: List[float] = field(default_factory=list)
+    U: List[float] = field(default_factory=list)
+    fase: List[str] = field(default_factory=list)
+    stigestreng: List[str] = field(default_factory=list)
+    stikledning: List[str] = field(default_factory=list)
+
+    def add(self, navn, metode, vaerdi, belastning="bolig", cos=1.0,
+            ekstra_pct=0.0, U=DEFAULT_U, fase="3-faset", stigestreng=None,
+            stikledning=None):
+        self.navn.append(navn)
+        self.metode.append(metode)
+        self.vaerdi.append(float(vaerdi))
+        self.belastning.append(belastning)
+        self.cos.append(float(cos))
+        self.ekstra_pct.append(float(ekstra_pct))
+        self.U.append(float(U))
+        self.fase.append(fase)
+        self.stigestreng.append(stigestreng)
+        self.stikledning.append(stikledning)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Fra en liste af dicts med felterne som nøgler (se add)."""
+        e = cls()
+        for r in rows:
+            e.add(**r)
+        return e
+
+    def __len__(self):
+        return len(self.navn)
+
+
+def _tjek_laengder(e: Enheder):
+    n = len(e)
+    for f in fields(e):
+        if len(getattr(e, f.name)) != n:
+            raise BelastningsFejl(f"Kolonnen '{f.name}' har forkert længde.")
+
+
+def unit_powers(e: Enheder) -> array:
+    """
+    Effekt [W] pr. enhed som array('d'), inkl. ekstra_pct. Enheder uden
+    gyldig værdi (≤ 0) får NaN og tæller ikke med (som null i TS).
+    """
+    _tjek_laengder(e)
+    n = len(e)
+
+    nan = math.nan
+    out = array("d", bytes(8 * n))
+    for i, (m, v, lt, cos, extra, U, ph) in enumerate(
+        zip(e.metode, e.vaerdi, e.belastning, e.cos, e.ekstra_pct, e.U, e.fase)
+    ):
+        if v <= 0:
+            out[i] = nan
+            continue
+        if m == "manuel":
+            P = (_SQRT3 if ph == "3-faset" else 1.0) * U * v * cos
+        elif m == "areal":
+            try:
+                P = power_from_area(v, lt)
+            except KeyError:
+                raise BelastningsFejl(f"Ukendt belastningstype: {lt!r}")
+        elif m == "velander":
+            P = velander_power(v)
+        else:
+            raise BelastningsFejl(f"Ukendt metode: {m!r}")
+        out[i] = P * (1.0 + extra / 100.0)
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Summering pr. niveau
+# ---------------------------------------------------------------------------
+
+
+def _result(acc, metode: str, df: float, U: float) -> LoadResult:
+    n, P_sum, I_sum, cos_sum = acc
+    cos = cos_sum / n
+    if metode == "sum":
+        I = I_sum
+        P = I * U * _SQRT3 * cos
+    else:
+        if metode == "diversitet":
+            P = P_sum * df
+        else:  # velander
+            P = P_sum * math.sqrt(n) / n
+        I = watts_to_amps(P, U, "3-faset", cos)
+    return LoadResult(n=n, P_sum=P_sum, P=P, I=I, cos=cos)
+
+
+def aggregate(e: Enheder, metode: str = "diversitet", df: float = DEFAULT_DF,
+              U: float = DEFAULT_U, powers=None):
+    """
+    Samlet belastning pr. stigestreng og pr. stikledning.
+
+    Returnerer {"stigestreng": {id: LoadResult}, "stikledning": {id:
+    LoadResult}, "individuelle": LoadResult | None}; "individuelle" er
+    enhederne uden fælles stikledning (summeret uden samtidighed, som i
+    TS). Strømmene er 3-fasede ved U (standard 400 V).
+    """
+    if metode not in AGGREGERING:
+        raise BelastningsFejl(f"Ukendt summeringsmetode: {metode!r}")
+    if powers is None:
+        powers = unit_powers(e)
+    else:
+        _tjek_laengder(e)
+        if len(powers) != len(e):
+            raise BelastningsFejl("powers har forkert længde.")
+
+    risers = {}
+    cables = {}
+    indiv = [0, 0.0, 0.0, 0.0]
+    for navn, P, cos, r_id, c_id in zip(e.navn, powers, e.cos, e.stigestreng,
+                                        e.stikledning):
+        if P != P:  # NaN – ingen gyldig værdi
+            continue
+        if cos <= 0:
+            raise BelastningsFejl(f"{navn}: cosφ skal være større end 0.")
+        I = watts_to_amps(P, U, "3-faset", cos)
+        for level, key in ((risers, r_id), (cables, c_id)):
+            if key is None:
+                continue
+            acc = level.get(key)
+            if acc is None:
+                level[key] = [1, P, I, cos]
+            else:
+                acc[0] += 1
+                acc[1] += P
+                acc[2] += I
+                acc[3] += cos
+        if c_id is None:
+            indiv[0] += 1
+            indiv[1] += P
+            indiv[2] += I
+            indiv[3] += cos
+
+    individuelle = None
+    if indiv[0]:
+        n, P_sum, I_sum, cos_sum = indiv
+        individuelle = LoadResult(n=n, P_sum=P_sum, P=P_sum, I=I_sum, cos=cos_sum / n)
+
+    return {
+        "stigestreng": {k: _result(a, metode, df, U) for k, a in risers.items()},
+        "stikledning": {k: _result(a, metode, df, U) for k, a in cables.items()},
+        "individuelle": individuelle,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Til stikledningsberegningen
+# ---------------------------------------------------------------------------
+
+
+def fuse_size_for(I: float, fuse_manu: str, fuse_type: str) -> float:
+    """Mindste sikringsstørrelse ≥ I for typen (ValueError hvis ingen)."""
+    try:
+        sizes = sorted(FUSE_DB[(fuse_manu, fuse_type)]["curves"])
+    except KeyError:
+        raise BelastningsFejl(f"Ukendt sikring: {fuse_manu} {fuse_type}")
+    for In in sizes:
+        if In >= I:
+            return float(In)
+    raise BelastningsFejl(
+        f"Belastningen {I:.1f} A er større end største {fuse_type} ({sizes[-1]} A)."
+    )
+
+
+def stik_input_for(inp: StikInput, load: LoadResult) -> StikInput:
+    """StikInput med In = mindste sikring der dækker belastningen."""
+    In = fuse_size_for(load.I, inp.fuse_manu, inp.fuse_type)
+    return replace(inp, In=In, cos_load=load.cos)
@@ -0,0 +1,297 @@
+"""
+Monte Carlo-toleranceanalyse af Ik,min og ΔU for én gruppe.
+
+Usikre inputs trækkes fra fordelinger:
+
+  - I_min_supply  (forsyningens mindste kortslutningsstrøm)
+  - R_factor      (modstandsfaktoren, fast 1,5 i cable_impedance_NKT)
+  - L_group / L_stik (længder)
+  - T_amb         (omgivelsestemperatur → Kt)
+  - cosphi        (lastens cos φ)
+
+Hver sample evalueres med samme formler som gruppe- og stikberegningen
+(ik_min_group, voltage_drop_ds, Iz·Kt·Kj·kgrp). Ik,min er realdelen af
+den komplekse strøm, som i group_engines kontrol mod Imin_factor·In.
+Kabeldata pr. km slås op én gang, så selve samplingen kun er aritmetik.
+Store antal samples fordeles på en procespulje i bidder med hver sin
+seed, så resultatet er reproducerbart.
+
+Fordelinger angives som tuples:
+    ("fixed", v)
+    ("normal", middel, spredning)
+    ("uniform", min, maks)
+    ("triangular", min, maks, typisk)
+"""
+
+import math
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from calculations import (
+    lookup_Kt,
+    lookup_kgrp,
+    lookup_iz_xlpe,
+    cable_impedance_NKT,
+    ik_min_group,
+    kj_for_segment,
+    voltage_drop_ds,
+)
+from fuse_curves import FUSE_DB
+
+PERCENTILES = (1, 5, 50, 95, 99)
+
+# Trukne værdier af I_min_supply holdes over denne grænse [A], så en bred
+# fordeling ikke giver Z_forsyning = U/0 (eller negativ impedans)
+I_MIN_SUPPLY_MIN = 1.0
+
+# Over dette antal samples bruges procespuljen
+POOL_THRESHOLD = 200_000
+CHUNK_SIZE = 100_000
+
+DEFAULT_CASE = {
+    "U_v": 230,
+    "In": 16.0,
+    "material": "Cu",
+    "sq": 2.5,
+    "phase": "3-faset",
+    "ref_method": "C",
+    "cores": 3,
+    "n_samlet": 1,
+    "Kj_jord": 1.0,
+    "du_max_pct": 5.0,
+    "fuse_manu": "Standard",
+    "fuse_type": "Diazed gG",
+    "mat_stik": "Cu",
+    "S_stik": 10.0,
+    "dist": {
+        "I_min_supply": ("normal", 175.0, 15.0),
+        "R_factor": ("uniform", 1.3, 1.6),
+        "L_group": ("normal", 25.0, 1.0),
+        "L_stik": ("normal", 20.0, 1.0),
+        "T_amb": ("triangular", 20.0, 40.0, 30.0),
+        "cosphi": ("fixed", 1.0),
+    },
+}
+
+
+# ---------------------------------------------------------------------------
+# Fordelinger
+# ---------------------------------------------------------------------------
+
+
+def _sampler(rng: random.Random, spec):
+    """Returnerer en funktion uden argumenter der trækker én værdi."""
+    kind = spec[0]
+    if kind == "fixed":
+        v = float(spec[1])
+        return lambda: v
+    if kind == "normal":
+        mu, sigma = float(spec[1]), float(spec[2])
+        return lambda: rng.gauss(mu, sigma)
+    if kind == "uniform":
+        a, b = float(spec[1]), float(spec[2])
+        return lambda: rng.uniform(a, b)
+    if kind == "triangular":
+        low, high, mode = float(spec[1]), float(spec[2]), float(spec[3])
+        return lambda: rng.triangular(low, high, mode)
+    raise ValueError(f"Ukendt fordeling: {kind}")
+
+
+# ---------------------------------------------------------------------------
+# Case, bidder og opsummering (deles med sweep_store)
+# ---------------------------------------------------------------------------
+
+
+def merge_case(case: dict = None) -> dict:
+    """DEFAULT_CASE flettet med case ("dist" flettes nøgle for nøgle)."""
+    c = dict(DEFAULT_CASE)
+    c["dist"] = dict(DEFAULT_CASE["dist"])
+    if case:
+        for k, v in case.items():
+            if k == "dist":
+                c["dist"].update(v)
+            else:
+                c[k] = v
+    return c
+
+
+def chunk_plan(n_samples: int, seed: int = 0):
+    """
+    Bidderne som n_samples deles i: liste af (antal, seed) med højst
+    CHUNK_SIZE samples pr. bid. Hver bid har sin egen seed, så resultatet
+    er det samme med og uden procespulje.
+    """
+    return [
+        (min(CHUNK_SIZE, n_samples - start), seed * 1_000_003 + i)
+        for i, start in enumerate(range(0, n_samples, CHUNK_SIZE))
+    ]
+
+
+def summary(case: dict, n_samples: int, percentiles: dict,
+            fail_ik: int, fail_du: int, fail_iz: int) -> dict:
+    """Resultat-dict'en fra run_monte_carlo ud fra de samlede tællinger."""
+    Imin_factor = FUSE_DB[(case["fuse_manu"], case["fuse_type"])].get(
+        "Imin_factor", 5.0
+    )
+    n = max(1, n_samples)
+    return {
+        "n_samples": n_samples,
+        "Ik_req": Imin_factor * case["In"],
+        "Ik_min_percentiles": percentiles,
+        "P_fail_disconnection": fail_ik / n,
+        "P_fail_du": fail_du / n,
+        "P_fail_overload": fail_iz / n,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Evaluering af én bid samples
+# ---------------------------------------------------------------------------
+
+
+def run_chunk(case: dict, n: int, seed: int):
+    """
+    Evaluerer n samples for en flettet case (se merge_case). Returnerer
+    (Ik_min-liste, antal_fejl_udkobling, antal_fejl_du,
+    antal_fejl_overbelastning).
+    """
+    rng = random.Random(seed)
+    dist = case["dist"]
+    draw = {k: _sampler(rng, dist[k]) for k in DEFAULT_CASE["dist"]}
+
+    U_v = case["U_v"]
+    In = case["In"]
+    mat = case["material"]
+    sq = case["sq"]
+    phase = case["phase"]
+    ref = case["ref_method"]
+    env = "jord" if ref in ("D1", "D2") else "luft"
+
+    # R og X pr. meter (R_factor = 1) – R_factor trækkes pr. sample
+    z_grp = cable_impedance_NKT(1.0, mat, sq, phase, R_factor=1.0)
+    z_stik = cable_impedance_NKT(
+        1.0, case["mat_stik"], case["S_stik"], phase, R_factor=1.0
+    )
+
+    iz_tab = lookup_iz_xlpe(mat, ref, case["cores"], sq)
+    if iz_tab is None:
+        raise ValueError(f"Mangler Iz-data for {mat}, ref {ref}, {sq} mm²")
+    iz_base = iz_tab * kj_for_segment(ref, case["Kj_jord"]) * lookup_kgrp(
+        ref, case["n_samlet"]
+    )
+
+    Ik_req = FUSE_DB[(case["fuse_manu"], case["fuse_type"])].get(
+        "Imin_factor", 5.0
+    ) * In
+    du_lim = case["du_max_pct"]
+
+    # ΔU-faktorer afhænger kun af cosφ – genbruges når cosφ er fast
+    cos_fixed = dist["cosphi"][0] == "fixed"
+    du_cache = {}
+
+    ik_values = []
+    fail_ik = fail_du = fail_iz = 0
+    for _ in range(n):
+        I_sup = max(I_MIN_SUPPLY_MIN, draw["I_min_supply"]())
+        Rf = draw["R_factor"]()
+        L_g = max(0.0, draw["L_group"]())
+        L_s = max(0.0, draw["L_stik"]())
+        T = draw["T_amb"]()
+        cos = min(1.0, max(0.0, draw["cosphi"]()))
+
+        Z_stik_min = L_s * complex(Rf * z_stik.real, z_stik.imag)
+        Z_grp_min = L_g * complex(Rf * z_grp.real, z_grp.imag)
+        # realdelen, som i udkoblingskontrollen i group_engine
+        Ik_min = ik_min_group(U_v, I_sup, Z_stik_min, Z_grp_min).real
+        ik_values.append(Ik_min)
+        if Ik_min < Ik_req:
+            fail_ik += 1
+
+        key = cos if cos_fixed else None
+        k = du_cache.get(key)
+        if k is None:
+            k = (
+                voltage_drop_ds(U_v, In, mat, sq, 1.0, phase, cos)[1],
+                voltage_drop_ds(
+                    U_v, In, case["mat_stik"], case["S_stik"], 1.0, phase, cos
+                )[1],
+            )
+            if cos_fixed:
+                du_cache[key] = k
+        if L_g * k[0] + L_s * k[1] > du_lim:
+            fail_du += 1
+
+        if In > iz_base * lookup_Kt(env, T):
+            fail_iz += 1
+
+    return ik_values, fail_ik, fail_du, fail_iz
+
+
+def _percentile(sorted_values, p):
+    """Lineært interpoleret percentil af en sorteret liste."""
+    if not sorted_values:
+        return math.nan
+    pos = (len(sorted_values) - 1) * p / 100.0
+    lo = int(math.floor(pos))
+    hi = min(lo + 1, len(sorted_values) - 1)
+    frac = pos - lo
+    return sorted_values[lo] + frac * (sorted_values[hi] - sorted_values[lo])
+
+
+# ---------------------------------------------------------------------------
+# Offentlig funktion
+# ---------------------------------------------------------------------------
+
+
+def run_monte_carlo(case: dict = None, n_samples: int = 10_000, seed: int = 0,
+                    workers: int = None) -> dict:
+    """
+    Kører Monte Carlo-analysen.
+
+    case: overskrivninger af DEFAULT_CASE ("dist" flettes nøgle for nøgle)
+
+    Returnerer en dict med percentiler af Ik,min, kravet Imin_factor·In og
+    sandsynligheden for fejl på udkobling (Ik,min < krav), ΔU_total og
+    overbelastning (In > Iz,korr).
+    """
+    c = merge_case(case)
+    chunks = chunk_plan(n_samples, seed)
+
+    if n_samples > POOL_THRESHOLD and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(
+                pool.map(
+                    run_chunk,
+                    [c] * len(chunks),
+                    [n for n, _ in chunks],
+                    [s for _, s in chunks],
+                )
+            )
+    else:
+        parts = [run_chunk(c, n, s) for n, s in chunks]
+
+    ik_all = []
+    fail_ik = fail_du = fail_iz = 0
+    for ik_values, f_ik, f_du, f_iz in parts:
+        ik_all.extend(ik_values)
+        fail_ik += f_ik
+        fail_du += f_du
+        fail_iz += f_iz
+    ik_all.sort()
+
+    percentiles = {p: _percentile(ik_all, p) for p in PERCENTILES}
+    return summary(c, n_samples, percentiles, fail_ik, fail_du, fail_iz)
+
+
+def format_report(res: dict) -> str:
+    """Kort tekstrapport til Mellemregninger-fanen."""
+    lines = [
+        f"Monte Carlo – {res['n_samples']} samples",
+        f"  Krav: Ik,min ≥ Imin_factor·In = {res['Ik_req']:.1f} A",
+    ]
+    for p, v in res["Ik_min_percentiles"].items():
+        lines.append(f"  Ik,min P{p:<2} = {v:.1f} A ({v / res['Ik_req']:.2f}·krav)")
+    lines.append(f"  P(udkobling fejler)      = {res['P_fail_disconnection'] * 100:.2f} %")
+    lines.append(f"  P(ΔU_total overskredet)  = {res['P_fail_du'] * 100:.2f} %")
+    lines.append(f"  P(overbelastning)        = {res['P_fail_overload'] * 100:.2f} %")
+    return "\n".join(lines)
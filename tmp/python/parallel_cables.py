@@ -0,0 +1,329 @@
+"""
+Parallelforbundne kabler i stikledningen (2–4 kabler pr. fase).
+
+Hvert kabel får sin egen komplekse impedans fra NKT-tabellerne (længderne
+må være forskellige), og strømfordelingen findes som et lille komplekst
+lineært ligningssystem:
+
+    Z · I = U·1      (samme spændingsfald over alle kabler)
+    Σ I_k = I_total
+
+Z er diagonal (kablernes egenimpedans) plus en evt. gensidig reaktans
+X_m [Ω/km] mellem alle par af kabler. Løsningen er I = I_total · x / Σx
+med Z·x = 1 (Gauss-elimination med pivotering – n ≤ 4, så standard-
+biblioteket er rigeligt). Uden gensidig reaktans er x blot admittanserne
+1/Z_k, og der regnes ikke noget system.
+
+dimensioner() gennemgår alle kombinationer n × S på én gang: impedanserne
+for alle tværsnit og kabler bygges med cable_impedance_batch pr. n, og
+hvert kabel kontrolleres mod Iz med nedsættelsesfaktorer (kgrp mindst som
+for n kabler samlet) og mod ΔU. beregn_parallel_stikledning() giver et
+almindeligt StikResult for et valgt design, og parallel_context() den
+stik-kontekst grupperne regnes videre med.
+"""
+
+from dataclasses import replace
+
+from calculations import (
+    SIZE_INDEX,
+    cable_impedance_batch,
+    fuse_trip_time_explain,
+    ik_max_stik,
+    ik_min_stik,
+    kj_for_segment,
+    lookup_iz_xlpe,
+    lookup_kgrp,
+    thermal_ok,
+    voltage_drop_ds,
+)
+from fuse_curves import get_fuse_data
+from group_engine import BeregningsFejl
+from records import ParallelDesign, StikContext, StikInput, StikResult
+from stik_engine import stik_candidate_sizes
+
+N_MAX_DEFAULT = 4
+
+# DS 183 anbefaler ca. lige fordeling; advar over denne afvigelse [%-point]
+UBALANCE_MAX_PCT = 10.0
+
+
+# ---------------------------------------------------------------------------
+# Strømfordeling
+# ---------------------------------------------------------------------------
+
+
+def solve_complex(A, b):
+    """Løser A·x = b (kompleks, lille n) med Gauss-elimination og pivotering."""
+    n = len(b)
+    M = [list(row) + [bi] for row, bi in zip(A, b)]
+    for col in range(n):
+        piv = max(range(col, n), key=lambda r: abs(M[r][col]))
+        if M[piv][col] == 0:
+            raise ValueError("Singulært ligningssystem.")
+        M[col], M[piv] = M[piv], M[col]
+        p = M[col][col]
+        for r in range(col + 1, n):
+            f = M[r][col] / p
+            if f:
+                row_r, row_c = M[r], M[col]
+                for c in range(col, n + 1):
+                    row_r[c] -= f * row_c[c]
+    x = [0j] * n
+    for r in range(n - 1, -1, -1):
+        s = M[r][n] - sum(M[r][c] * x[c] for c in range(r + 1, n))
+        x[r] = s / M[r][r]
+    return x
+
+
+def _mutual_matrix(Z, lengths, X_mutual: float):
+    """Impedansmatrix med egenimpedans i diagonalen og j·X_m·L mellem par."""
+    n = len(Z)
+    A = [[0j] * n for _ in range(n)]
+    for i in range(n):
+        A[i][i] = Z[i]
+        for j in range(i + 1, n):
+            zm = 1j * X_mutual * min(lengths[i], lengths[j]) / 1000.0
+            A[i][j] = A[j][i] = zm
+    return A
+
+
+def current_split(Z, I_total, lengths=None, X_mutual: float = 0.0):
+    """
+    Strømmen i hvert parallelt kabel.
+
+    Z: kablernes (komplekse) impedanser [Ω]; lengths [m] bruges kun til
+    den gensidige reaktans X_mutual [Ω/km]. Returnerer en liste af
+    komplekse strømme, der summerer til I_total.
+    """
+    if X_mutual and len(Z) > 1:
+        x = solve_complex(_mutual_matrix(Z, lengths, X_mutual), [1 + 0j] * len(Z))
+    else:
+        x = [1 / z for z in Z]
+    s = sum(x)
+    return [I_total * xk / s for xk in x]
+
+
+def split_batch(Z_rows, I_total, lengths=None, X_mutual: float = 0.0):
+    """current_split for mange konfigurationer (én række Z pr. konfiguration)."""
+    if not X_mutual:
+        out = []
+        for Z in Z_rows:
+            y = [1 / z for z in Z]
+            k = I_total / sum(y)
+            out.append([k * yk for yk in y])
+        return out
+    return [current_split(Z, I_total, lengths, X_mutual) for Z in Z_rows]
+
+
+def equivalent_impedance(Z, lengths=None, X_mutual: float = 0.0) -> complex:
+    """Samlet impedans for kablerne i parallel (U/I for I_total = 1 A)."""
+    I = current_split(Z, 1.0, lengths, X_mutual)
+    if X_mutual and len(Z) > 1:
+        A = _mutual_matrix(Z, lengths, X_mutual)
+        return sum(A[0][j] * I[j] for j in range(len(Z)))
+    return Z[0] * I[0]
+
+
+def ubalance_pct(I_branch) -> float:
+    """Største afvigelse fra lige fordeling i %-point (som i TS-udgaven)."""
+    total = abs(sum(I_branch))
+    if total == 0:
+        return 0.0
+    lige = 100.0 / len(I_branch)
+    return max(abs(abs(i) / total * 100.0 - lige) for i in I_branch)
+
+
+# ---------------------------------------------------------------------------
+# Dimensionering
+# ---------------------------------------------------------------------------
+
+
+def _iz_cable(inp: StikInput, S: float, n: int):
+    """Korrigeret Iz for ét af n parallelle kabler (mindste over segmenterne)."""
+    material = inp.material.label
+    Iz_min = None
+    for seg in inp.segments:
+        ref = seg.ref_method.label
+        Iz_tab = lookup_iz_xlpe(material, ref, seg.cores, S)
+        if Iz_tab is None:
+            return None
+        # de n kabler ligger mindst sammen med hinanden
+        kgrp = min(seg.kgrp, lookup_kgrp(ref, n)) if n > 1 else seg.kgrp
+        Iz = Iz_tab * seg.Kt * kj_for_segment(ref, inp.Kj_jord) * kgrp
+        if Iz_min is None or Iz < Iz_min:
+            Iz_min = Iz
+    return Iz_min
+
+
+def dimensioner(inp: StikInput, n_max: int = N_MAX_DEFAULT, lengths=None,
+                X_mutual: float = 0.0):
+    """
+    Alle gyldige kombinationer af n parallelle kabler (1..n_max) og tværsnit.
+
+    lengths: længden af hvert kabel [m] (mindst n_max værdier); standard
+    er stikledningens samlede længde for alle kabler. Returnerer en liste
+    af ParallelDesign sorteret efter samlet ledertværsnit n·S (derefter n),
+    så første element er det billigste design. Rejser BeregningsFejl hvis
+    ingen kombination opfylder Iz og ΔU.
+    """
+    if not inp.segments:
+        raise BeregningsFejl(
+            "Fejl", "Der skal være mindst ét segment i stikledningen."
+        )
+    material = inp.material.label
+    phase = inp.phase.label
+    total_len = sum(seg.length for seg in inp.segments)
+    if lengths is None:
+        lengths = [total_len] * n_max
+    elif len(lengths) < n_max:
+        raise BeregningsFejl(
+            "Parallelle kabler", f"Angiv længden af alle {n_max} kabler."
+        )
+
+    sizes = [S for S in stik_candidate_sizes(material, phase) if S in SIZE_INDEX]
+    designs = []
+    for n in range(1, n_max + 1):
+        L = list(lengths[:n])
+        # Alle tværsnit for dette n i ét batch-kald: række r = tværsnit r
+        Z_flat = cable_impedance_batch(
+            L * len(sizes),
+            [SIZE_INDEX[S] for S in sizes for _ in L],
+            material,
+            phase,
+            1.0,
+        )
+        Z_rows = [Z_flat[r * n:(r + 1) * n] for r in range(len(sizes))]
+        usable = [
+            (S, Z) for S, Z in zip(sizes, Z_rows) if all(z == z for z in Z)
+        ]
+        splits = split_batch([Z for _, Z in usable], inp.In, L, X_mutual)
+
+        for (S, _), I_branch in zip(usable, splits):
+            Iz = _iz_cable(inp, S, n)
+            if Iz is None or max(abs(i) for i in I_branch) > Iz:
+                continue
+            du = max(
+                voltage_drop_ds(
+                    inp.U_v, abs(i), material, S, Lk, phase, inp.cos_load
+                )[0]
+                for i, Lk in zip(I_branch, L)
+            )
+            du_pct = du / inp.U_v * 100.0
+            if du_pct > inp.du_max_pct:
+                continue
+            designs.append(
+                ParallelDesign(
+                    n=n,
+                    sq=S,
+                    lengths=tuple(L),
+                    I_branch=tuple(I_branch),
+                    Iz_cable=Iz,
+                    du=du,
+                    du_pct=du_pct,
+                    ubalance_pct=ubalance_pct(I_branch),
+                )
+            )
+            # større tværsnit med samme n er kun dyrere
+            break
+
+    if not designs:
+        raise BeregningsFejl(
+            "Overbelastning",
+            f"Ingen kombination af 1–{n_max} parallelle kabler opfylder "
+            "Iz- og ΔU-betingelserne.",
+        )
+    designs.sort(key=lambda d: (d.n * d.sq, d.n))
+    return designs
+
+
+# ---------------------------------------------------------------------------
+# Stikledning med parallelle kabler
+# ---------------------------------------------------------------------------
+
+
+def beregn_parallel_stikledning(inp: StikInput, design: ParallelDesign,
+                                X_mutual: float = 0.0):
+    """
+    StikResult for stikledningen lagt som design.n parallelle kabler.
+
+    Z_w1_min/Z_w1_max er den samlede impedans af kablerne i parallel, så
+    StikResult.context() og gruppeberegningen kan bruges uændret. Den
+    termiske kontrol regnes for det kabel der får den største andel af
+    kortslutningsstrømmen. Returnerer (resultat, advarsler).
+    """
+    material = inp.material.label
+    phase = inp.phase.label
+    L = list(design.lengths)
+    idx = [SIZE_INDEX[design.sq]] * design.n
+
+    Z_min = cable_impedance_batch(L, idx, material, phase, 1.5)
+    Z_max = cable_impedance_batch(L, idx, material, phase, 1.0)
+    if not all(z == z for z in Z_min):
+        raise BeregningsFejl(
+            "Kabeldata",
+            "Der mangler kabeldata (R/X) for det valgte tværsnit/materiale.",
+        )
+    Z_w1_min = equivalent_impedance(Z_min, L, X_mutual)
+    Z_w1_max = equivalent_impedance(Z_max, L, X_mutual)
+
+    Ik_min_val = ik_min_stik(inp.U_v, inp.I_min_supply, Z_w1_min)
+    Ik_max_val, _ = ik_max_stik(inp.U_v, inp.Ik_trafo, inp.cos_trafo, Z_w1_max)
+    Ik_for_fuse = abs(Ik_min_val)
+
+    try:
+        curve_points, In_curve, _ = get_fuse_data(inp.fuse_manu, inp.fuse_type, inp.In)
+    except KeyError:
+        raise BeregningsFejl(
+            "Sikring", "Kunne ikke finde sikringsdata for den valgte type."
+        )
+    t_trip, _ = fuse_trip_time_explain(In_curve, Ik_for_fuse, curve_points)
+
+    Ik_branch = current_split(Z_min, Ik_for_fuse, L, X_mutual)
+    termisk, E_kabel, E_bryde = thermal_ok(
+        inp.k_val, design.sq, max(abs(i) for i in Ik_branch), t_trip
+    )
+
+    advarsler = []
+    if design.ubalance_pct > UBALANCE_MAX_PCT:
+        andele = " / ".join(
+            f"{abs(i) / inp.In * 100.0:.1f}%" for i in design.I_branch
+        )
+        advarsler.append(
+            f"Uligevægtig strømfordeling {andele} "
+            f"(afvigelse {design.ubalance_pct:.1f}%-point)"
+        )
+
+    res = StikResult(
+        In=inp.In,
+        U_v=inp.U_v,
+        phase=inp.phase,
+        material=inp.material,
+        cos_load=inp.cos_load,
+        Kj_jord=inp.Kj_jord,
+        I_min_supply=inp.I_min_supply,
+        sq=design.sq,
+        total_len=max(L),
+        best_Iz_nod=design.Iz_cable,
+        du=design.du,
+        du_pct=design.du_pct,
+        Z_w1_min=Z_w1_min,
+        Z_w1_max=Z_w1_max,
+        Ik_min_val=Ik_min_val,
+        Ik_max_val=Ik_max_val,
+        Ik_for_fuse=Ik_for_fuse,
+        t_trip=t_trip,
+        termisk_ok=termisk,
+        E_kabel=E_kabel,
+        E_bryde=E_bryde,
+    )
+    return res, advarsler
+
+
+def parallel_context(res: StikResult, design: ParallelDesign, Ik_trafo: float,
+                     cos_trafo: float, Kj_jord: float) -> StikContext:
+    """
+    Stik-kontekst til grupperne. sq sættes til det samlede tværsnit n·S,
+    så gruppernes ΔU-andel fra stikledningen regnes for alle kablerne.
+    """
+    ctx = res.context(Ik_trafo, cos_trafo, Kj_jord)
+    return replace(ctx, sq=design.n * design.sq)
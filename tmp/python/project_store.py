@@ -0,0 +1,338 @@
+"""
+Kolonnebaseret lager for alle grupper og segmenter i et projekt.
+
+Til kontrol af store projekter (tusindvis af grupper) holdes segmenterne
+ikke som objekter, men i kolonner (array):
+
+    segmenter:  group_id, length, ref, cores, size, Kt, kgrp
+    grupper:    In, material, phase, cos_load, du_max_pct, Imin_factor,
+                start (første segment; segmenterne for en gruppe ligger
+                samlet)
+
+evaluate() regner alle grupper mod samme stik-kontekst på én gang:
+per-segment-størrelser (impedans, korrektionsfaktor, L/S) regnes som én
+kolonne ad gangen over segment-kolonnerne, og per-gruppe-summer/-minima
+tages som segmenterede reduktioner over udsnit (fsum/min af
+col[start:slut]) – samme idé som reduceat. Opslag i Iz- og R/X-tabeller
+sker i flade arrays, så der ikke laves objekter pr. segment.
+
+Evalueringen svarer til beregn_gruppe med fast tværsnit (Ik,min, Ik,max,
+ΔU, overbelastning), men uden sikringskurve/termisk kontrol og uden log.
+Den er tænkt som screening; grupper der fejler, kan derefter regnes
+enkeltvis med group_engine for at få mellemregningerne.
+"""
+
+import math
+from array import array
+from itertools import repeat
+
+from calculations import (
+    PHASES,
+    STANDARD_SIZES,
+    SIZE_INDEX,
+    Q_MATERIAL,
+    LAMBDA_MATERIAL,
+    impedance_row_m,
+    kj_for_segment,
+    lookup_iz_xlpe,
+)
+from fuse_curves import FUSE_DB
+from records import GroupInput, Material, RefMethod, StikContext
+
+_NS = len(STANDARD_SIZES)
+_NC = 5  # belastede ledere 0..4
+_NREF = len(RefMethod)
+_MATERIALS = tuple(Material)
+
+# b i DS-formlen for ΔU, i PHASES-rækkefølge (1-faset, 3-faset)
+_B_FASE = (2.0, 1.0)
+
+# Tværsnit uden Iz-data får Iz = -1, så Iz,korr bliver negativ og
+# overbelastningskontrollen fejler
+_IZ_MANGLER = -1.0
+
+
+# ---------------------------------------------------------------------------
+# Kompilerede opslagstabeller (flade arrays)
+# ---------------------------------------------------------------------------
+
+
+def _z_code_base(material: Material, phase_idx: int) -> int:
+    return (int(material) * len(PHASES) + phase_idx) * _NS
+
+
+def _build_z_tables():
+    """R og X pr. meter, indeks = (materiale·2 + fase)·NS + tværsnit."""
+    n = len(_MATERIALS) * len(PHASES) * _NS
+    R_min = array("d", [math.nan]) * n
+    R_max = array("d", [math.nan]) * n
+    X = array("d", [math.nan]) * n
+    for mat in _MATERIALS:
+        for p_idx, phase in enumerate(PHASES):
+            base = _z_code_base(mat, p_idx)
+            try:
+                row15 = impedance_row_m(mat.label, phase, 1.5)
+                row10 = impedance_row_m(mat.label, phase, 1.0)
+            except KeyError:
+                continue
+            for i in range(_NS):
+                R_min[base + i] = row15[i].real
+                R_max[base + i] = row10[i].real
+                X[base + i] = row10[i].imag
+    return R_min, R_max, X
+
+
+def _build_iz_table():
+    """Iz,tabel, indeks = ((materiale·NREF + ref)·NC + ledere)·NS + tværsnit."""
+    n = len(_MATERIALS) * _NREF * _NC * _NS
+    iz = array("d", [_IZ_MANGLER]) * n
+    for mat in _MATERIALS:
+        for ref in RefMethod:
+            for cores in range(_NC):
+                base = ((int(mat) * _NREF + int(ref)) * _NC + cores) * _NS
+                for i, S in enumerate(STANDARD_SIZES):
+                    v = lookup_iz_xlpe(mat.label, ref.label, cores, S)
+                    if v is not None:
+                        iz[base + i] = v
+    return iz
+
+
+_R_MIN_M, _R_MAX_M, _X_M = _build_z_tables()
+_IZ_FLAT = _build_iz_table()
+
+
+def _imin_factor(fuse_manu: str, fuse_type: str) -> float:
+    if fuse_type == "MCB (auto B/C)":
+        # Auto-valget kræver mindst B-kurvens 5·In
+        return 5.0
+    return FUSE_DB[(fuse_manu, fuse_type)].get("Imin_factor", 5.0)
+
+
+def _segment_sums(col, bounds):
+    """Σ col[start:slut] pr. gruppe."""
+    return array("d", [math.fsum(col[b]) for b in bounds])
+
+
+def _segment_mins(col, bounds):
+    return array("d", [min(col[b]) for b in bounds])
+
+
+# ---------------------------------------------------------------------------
+# Lageret
+# ---------------------------------------------------------------------------
+
+
+class ProjectStore:
+    """Alle gruppers segmenter i kolonner. Grupper tilføjes i rækkefølge."""
+
+    def __init__(self):
+        # Grupper
+        self.names = []
+        self.In = array("d")
+        self.material = array("b")
+        self.phase = array("b")  # indeks i calculations.PHASES
+        self.cos_load = array("d")
+        self.du_max_pct = array("d")
+        self.Imin_factor = array("d")
+        self.start = array("l", [0])  # len = antal grupper + 1
+
+        # Segmenter
+        self.group_id = array("l")
+        self.length = array("d")
+        self.ref = array("b")
+        self.cores = array("b")
+        self.size = array("b")  # indeks i STANDARD_SIZES
+        self.Kt = array("d")
+        self.kgrp = array("d")
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def n_segments(self) -> int:
+        return len(self.length)
+
+    # ------------------------------------------------------------------
+    # Opbygning
+    # ------------------------------------------------------------------
+    def add_group(self, grp: GroupInput, sq: float = None) -> int:
+        """
+        Tilføjer en gruppe. sq er gruppens tværsnit; udelades det, bruges
+        segmenternes fælles tværsnit (som beregn_gruppe uden auto-tværsnit).
+        Rejser ValueError ved forskellige tværsnit, ukendt tværsnit eller
+        et antal belastede ledere uden for Iz-tabellen (0..4).
+        """
+        if not grp.segments:
+            raise ValueError(f"{grp.name}: Gruppen har ingen segmenter.")
+        if sq is None:
+            areas = {s.area for s in grp.segments}
+            if len(areas) != 1:
+                raise ValueError(
+                    f"{grp.name}: Segmenterne har forskellige tværsnit – angiv sq."
+                )
+            sq = areas.pop()
+        if grp.material == Material.Al:
+            sq = max(sq, 16.0)
+        try:
+            size = SIZE_INDEX[float(sq)]
+        except KeyError:
+            raise ValueError(f"{grp.name}: {sq} mm² er ikke et standardtværsnit.")
+        for s in grp.segments:
+            if not 0 <= s.cores < _NC:
+                raise ValueError(
+                    f"{grp.name}: Segment {s.nr} har {s.cores} belastede ledere "
+                    f"– Iz-tabellen dækker 0..{_NC - 1}."
+                )
+
+        gid = len(self.names)
+        self.names.append(grp.name)
+        self.In.append(grp.In)
+        self.material.append(int(grp.material))
+        self.phase.append(PHASES.index(grp.phase.label))
+        self.cos_load.append(grp.cos_load)
+        self.du_max_pct.append(grp.du_max_pct)
+        self.Imin_factor.append(_imin_factor(grp.fuse_manu, grp.fuse_type))
+
+        n = len(grp.segments)
+        self.group_id.extend(repeat(gid, n))
+        self.length.extend(s.length for s in grp.segments)
+        self.ref.extend(int(s.ref_method) for s in grp.segments)
+        self.cores.extend(s.cores for s in grp.segments)
+        self.size.extend(repeat(size, n))
+        self.Kt.extend(s.Kt for s in grp.segments)
+        self.kgrp.extend(s.kgrp for s in grp.segments)
+        self.start.append(len(self.length))
+        return gid
+
+    @classmethod
+    def from_groups(cls, groups, sizes=None):
+        """Lager fra en række GroupInput (sizes: tværsnit pr. gruppe)."""
+        store = cls()
+        if sizes is None:
+            sizes = repeat(None)
+        for grp, sq in zip(groups, sizes):
+            store.add_group(grp, sq)
+        return store
+
+    # ------------------------------------------------------------------
+    # Evaluering
+    # ------------------------------------------------------------------
+    def evaluate(self, stik: StikContext) -> dict:
+        """
+        Regner alle grupper mod stik-konteksten. Returnerer kolonner (én
+        værdi pr. gruppe):
+
+            name, L_total, Z_min, Z_max, Ik_min, Ik_max, du_grp_pct,
+            du_tot_pct, worst_Iz_nod, Iz_korr_min, overload_ok, du_ok, ik_ok
+
+        Z_*/Ik_* er lister af komplekse tal, *_ok er lister af bool.
+        Iz_korr_min < 0 betyder at der mangler Iz-data for et segment.
+        """
+        U_v = stik.U_v
+        n_groups = len(self.names)
+        bounds = [slice(a, b) for a, b in zip(self.start[:-1], self.start[1:])]
+        gid = self.group_id
+        length = self.length
+        size = self.size
+
+        # --- Impedans: Z = Σ L·(R + jX) pr. gruppe (R×1,5 for Ik,min) ---
+        # segmentets indeks i de flade R/X-tabeller
+        z_base = [_z_code_base(m, p) for m, p in zip(self.material, self.phase)]
+        z_code = [z_base[g] + s for g, s in zip(gid, size)]
+        R_min = _segment_sums(
+            array("d", [L * _R_MIN_M[c] for L, c in zip(length, z_code)]), bounds
+        )
+        R_max = _segment_sums(
+            array("d", [L * _R_MAX_M[c] for L, c in zip(length, z_code)]), bounds
+        )
+        X = _segment_sums(
+            array("d", [L * _X_M[c] for L, c in zip(length, z_code)]), bounds
+        )
+        Z_min = [complex(r, x) for r, x in zip(R_min, X)]
+        Z_max = [complex(r, x) for r, x in zip(R_max, X)]
+
+        # --- Ik,min = U / (Z_forsyning + 2·(Z_stik,min + Z_gruppe,min)) ---
+        if stik.I_min_supply is None or stik.In_source is None:
+            # som beregn_gruppe: fald tilbage til 5·In for gruppen
+            Z_sup = [U_v / (5.0 * In) for In in self.In]
+        else:
+            Z_sup = [U_v / stik.I_min_supply] * n_groups
+        Ik_min = [
+            U_v / (Z_s + 2 * (stik.Z_w1_min + Z_g)) for Z_s, Z_g in zip(Z_sup, Z_min)
+        ]
+
+        # --- Ik,max = U / (Z_trafo + Z_stik,max + Z_gruppe,max) ---
+        sin_t = math.sqrt(max(0.0, 1.0 - stik.cos_trafo**2))
+        Z_trafo = U_v / stik.Ik_trafo * complex(stik.cos_trafo, -sin_t)
+        Z_net_max = Z_trafo + stik.Z_w1_max
+        Ik_max = [U_v / (Z_net_max + Z_g) for Z_g in Z_max]
+
+        # --- Overbelastning: In ≤ Iz·Kt·Kj·kgrp i alle segmenter ---
+        kj_by_ref = [kj_for_segment(r.label, stik.Kj_jord) for r in RefMethod]
+        derate = array(
+            "d",
+            [Kt * kj_by_ref[r] * kg for Kt, r, kg in zip(self.Kt, self.ref, self.kgrp)],
+        )
+        # segmentets indeks i den flade Iz-tabel
+        iz_base = [int(m) * _NREF * _NC * _NS for m in self.material]
+        iz_code = [
+            iz_base[g] + (r * _NC + c) * _NS + s
+            for g, r, c, s in zip(gid, self.ref, self.cores, size)
+        ]
+        iz_korr = array("d", [_IZ_FLAT[c] * d for c, d in zip(iz_code, derate)])
+        Iz_korr_min = _segment_mins(iz_korr, bounds)
+        min_derate = _segment_mins(derate, bounds)
+        worst_Iz_nod = array("d", [In / d for In, d in zip(self.In, min_derate)])
+        overload_ok = [In <= Iz for In, Iz in zip(self.In, Iz_korr_min)]
+
+        # --- Spændingsfald: ΔU = b·I·(q·Σ(L/S)·cosφ + λ·ΣL·sinφ) ---
+        L_total = _segment_sums(length, bounds)
+        L_over_S = _segment_sums(
+            array("d", [L / STANDARD_SIZES[s] for L, s in zip(length, size)]),
+            bounds,
+        )
+        mat_s = stik.material.label
+        stik_LS = Q_MATERIAL[mat_s] * stik.total_len / stik.sq
+        stik_L = LAMBDA_MATERIAL[mat_s] * stik.total_len
+        pct = 100.0 / U_v
+        du_grp_pct = array("d")
+        du_tot_pct = array("d")
+        for i in range(n_groups):
+            mat = str(_MATERIALS[self.material[i]])
+            cosphi = self.cos_load[i]
+            sinphi = math.sqrt(max(0.0, 1.0 - cosphi * cosphi))
+            bI = _B_FASE[self.phase[i]] * self.In[i]
+            du_grp = bI * (
+                Q_MATERIAL[mat] * L_over_S[i] * cosphi
+                + LAMBDA_MATERIAL[mat] * L_total[i] * sinphi
+            )
+            du_stik = bI * (stik_LS * cosphi + stik_L * sinphi)
+            du_grp_pct.append(du_grp * pct)
+            du_tot_pct.append((du_grp + du_stik) * pct)
+        du_ok = [du <= du_max for du, du_max in zip(du_tot_pct, self.du_max_pct)]
+
+        # --- Udkobling: Ik,min ≥ Imin_factor·In (realdel som i beregn_gruppe) ---
+        ik_ok = [
+            Ik.real >= f * In for Ik, f, In in zip(Ik_min, self.Imin_factor, self.In)
+        ]
+
+        return {
+            "name": list(self.names),
+            "L_total": L_total,
+            "Z_min": Z_min,
+            "Z_max": Z_max,
+            "Ik_min": Ik_min,
+            "Ik_max": Ik_max,
+            "du_grp_pct": du_grp_pct,
+            "du_tot_pct": du_tot_pct,
+            "worst_Iz_nod": worst_Iz_nod,
+            "Iz_korr_min": Iz_korr_min,
+            "overload_ok": overload_ok,
+            "du_ok": du_ok,
+            "ik_ok": ik_ok,
+        }
+
+
+def evaluate_project(groups, stik: StikContext, sizes=None) -> dict:
+    """Kort form: ProjectStore.from_groups(groups, sizes).evaluate(stik)."""
+    return ProjectStore.from_groups(groups, sizes).evaluate(stik)
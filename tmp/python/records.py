@@ -0,0 +1,391 @@
+"""
+Faste record-typer til beregningerne.
+
+Segmenter, gruppe-input, stik-input/-kontekst og resultater er frosne
+dataclasses med __slots__: ingen __dict__ pr. objekt, hurtig attribut-
+adgang i de indre løkker, og de kan hashes direkte (bruges af
+result_cache). Materiale, fasesystem og reference-metode er heltals-
+kodede enums; label giver teksten som tabellerne og GUI'en bruger
+("Cu", "3-faset", "D1" …), og str()/f-strings viser også teksten, så
+mellemregningerne ser ud som før.
+"""
+
+from dataclasses import dataclass, fields
+from enum import IntEnum
+from typing import Optional, Tuple
+
+
+# ---------------------------------------------------------------------------
+# Heltalskodede enums
+# ---------------------------------------------------------------------------
+
+
+class _Kode(IntEnum):
+    """Fælles base: label = tabel-/GUI-tekst."""
+
+    @property
+    def label(self) -> str:
+        return self.name
+
+    @classmethod
+    def parse(cls, value):
+        """Accepterer enum, kode (int) eller label (str)."""
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, str):
+            try:
+                return _LABEL_INDEX[cls][value]
+            except KeyError:
+                raise ValueError(f"Ukendt {cls.__name__}: {value!r}")
+        return cls(value)
+
+    def __str__(self) -> str:
+        return self.label
+
+    def __format__(self, spec: str) -> str:
+        return format(self.label, spec)
+
+
+class Material(_Kode):
+    Cu = 0
+    Al = 1
+
+
+class Phase(_Kode):
+    EN_FASET = 1
+    TRE_FASET = 3
+
+    @property
+    def label(self) -> str:
+        return f"{self.value}-faset"
+
+
+class RefMethod(_Kode):
+    A1 = 0
+    A2 = 1
+    B1 = 2
+    B2 = 3
+    C = 4
+    D1 = 5
+    D2 = 6
+    E = 7
+    F = 8
+    G = 9
+    B1_B2 = 10
+    E_F = 11
+    E_F_G = 12
+
+    @property
+    def label(self) -> str:
+        return self.name.replace("_", "/")
+
+    @property
+    def i_jord(self) -> bool:
+        return self in (RefMethod.D1, RefMethod.D2)
+
+
+_LABEL_INDEX = {
+    cls: {m.label: m for m in cls} for cls in (Material, Phase, RefMethod)
+}
+
+
+# ---------------------------------------------------------------------------
+# Input
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True, slots=True)
+class Segment:
+    """Ét segment – som SegmentFrame.get_data()."""
+
+    nr: int
+    ref_method: RefMethod
+    length: float
+    temp: float
+    cores: int
+    area: float
+    Kt: float
+    kgrp: float
+
+
+@dataclass(frozen=True, slots=True)
+class GroupInput:
+    """Øjebliksbillede af én gruppes input (kun segmenter med længde > 0)."""
+
+    name: str
+    In: float
+    phase: Phase
+    material: Material
+    cos_load: float
+    du_max_pct: float
+    auto_size: bool
+    fuse_manu: str
+    fuse_type: str
+    segments: Tuple[Segment, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class StikInput:
+    """Øjebliksbillede af stikledningens input fra hovedfanen."""
+
+    In: float
+    U_v: int
+    phase: Phase
+    material: Material
+    cos_load: float
+    Kj_jord: float
+    du_max_pct: float
+    fuse_manu: str
+    fuse_type: str
+    Ik_trafo: float
+    I_min_supply: float
+    cos_trafo: float
+    k_val: float
+    auto_size: bool
+    segments: Tuple[Segment, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class StikContext:
+    """De stikledningsdata som gruppeberegningen bruger."""
+
+    U_v: int
+    sq: float
+    material: Material
+    total_len: float
+    Z_w1_min: complex
+    Z_w1_max: complex
+    Ik_min_val: complex
+    I_min_supply: Optional[float]
+    In_source: Optional[float]
+    src_txt: Optional[str]
+    Ik_trafo: float
+    cos_trafo: float
+    Kj_jord: float
+
+
+# ---------------------------------------------------------------------------
+# Resultater
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True, slots=True)
+class StikResult:
+    In: float
+    U_v: int
+    phase: Phase
+    material: Material
+    cos_load: float
+    Kj_jord: float
+    I_min_supply: float
+    sq: float
+    total_len: float
+    best_Iz_nod: float
+    du: float
+    du_pct: float
+    Z_w1_min: complex
+    Z_w1_max: complex
+    Ik_min_val: complex
+    Ik_max_val: complex
+    Ik_for_fuse: float
+    t_trip: float
+    termisk_ok: bool
+    E_kabel: float
+    E_bryde: float
+
+    def context(self, Ik_trafo: float, cos_trafo: float, Kj_jord: float):
+        """Stik-kontekst til grupperne (trafo/Kj fra hovedfanens felter)."""
+        I_min_supply = self.I_min_supply
+        return StikContext(
+            U_v=self.U_v,
+            sq=self.sq,
+            material=self.material,
+            total_len=self.total_len,
+            Z_w1_min=self.Z_w1_min,
+            Z_w1_max=self.Z_w1_max,
+            Ik_min_val=self.Ik_min_val,
+            I_min_supply=I_min_supply,
+            In_source=I_min_supply / 5.0 if I_min_supply > 0 else self.In,
+            src_txt="I_min,forsyning/5",
+            Ik_trafo=Ik_trafo,
+            cos_trafo=cos_trafo,
+            Kj_jord=Kj_jord,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class GroupResult:
+    name: str
+    sq: float
+    Ik_min: complex
+    Ik_max: complex
+    du_grp: float
+    du_grp_pct: float
+    du_tot: float
+    du_tot_pct: float
+    termisk_ok: bool
+    fuse_type: str
+    mcb_curve: Optional[str]
+    t_trip: float
+    Imin_factor: float
+    worst_Iznod: float
+
+
+@dataclass(frozen=True, slots=True)
+class EarthFaultResult:
+    """Jordfejlsbeskyttelse for én gruppe (se earth_fault.py)."""
+
+    name: str
+    system: str
+    Zs: complex
+    Z_pe: complex
+    Ia: float
+    fuse_type: str
+    t_trip: float
+    t_krav: float
+    Ub: float
+    zs_ok: bool
+    rcd_krav: bool
+    rcd_type: str
+    begrundelse: str
+    advarsler: Tuple[str, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class ParallelDesign:
+    """n parallelle kabler med tværsnit sq (se parallel_cables.py)."""
+
+    n: int
+    sq: float
+    lengths: Tuple[float, ...]
+    I_branch: Tuple[complex, ...]
+    Iz_cable: float
+    du: float
+    du_pct: float
+    ubalance_pct: float
+
+
+@dataclass(frozen=True, slots=True)
+class DesignChoice:
+    """Billigste gyldige design for en gruppe (se design_search.py)."""
+
+    material: Material
+    ref_method: RefMethod
+    sq: float
+    cost: float
+    result: GroupResult
+
+
+@dataclass(frozen=True, slots=True)
+class DuBudgetPlan:
+    """Stikledning og grupper dimensioneret samlet (se du_budget.py)."""
+
+    stik_sq: float
+    group_sq: Tuple[float, ...]
+    cost: float
+    du_stik_pct: float
+    du_tot_pct: Tuple[float, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class LoadResult:
+    """Samlet belastning for en stigestreng/stikledning (se load_aggregation.py)."""
+
+    n: int
+    P_sum: float
+    P: float
+    I: float
+    cos: float
+
+
+# ---------------------------------------------------------------------------
+# Feltværdier fra GUI'en (fortryd/gentag i history.py)
+# ---------------------------------------------------------------------------
+#
+# Teksten som den står i felterne – også ufærdige tal og segmenter med
+# længde 0 – så et fortryd-trin sætter felterne tilbage præcis som før.
+# Input-records ovenfor kan ikke det: de kræver gyldige tal og gemmer
+# ref-metoden, ikke installationsnummeret.
+
+
+@dataclass(frozen=True, slots=True)
+class SegmentFelter:
+    """Ét SegmentFrame (install = indeks i calculations.INSTALL_METHODS)."""
+
+    install: int
+    length: str
+    temp: str
+    cores: str
+    area: str
+    n_samlet: str
+
+
+@dataclass(frozen=True, slots=True)
+class GruppeFelter:
+    """Én GroupFrame."""
+
+    name: str
+    In: str
+    phase: str
+    material: str
+    cos: str
+    fuse_manu: str
+    fuse_type: str
+    du_max: str
+    auto_size: bool
+    segments: Tuple[SegmentFelter, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class StikFelter:
+    """Fanen "Stikledning" (felterne i Main.py)."""
+
+    U_v: str
+    In: str
+    phase: str
+    material: str
+    cos_load: str
+    Kj_jord: str
+    du_max: str
+    auto_size: bool
+    fuse_manu: str
+    fuse_type: str
+    Ik_trafo: str
+    I_min_supply: str
+    cos_trafo: str
+    k_val: str
+    segments: Tuple[SegmentFelter, ...]
+
+
+# ---------------------------------------------------------------------------
+# dict <-> record (JSON-cache, eksport)
+# ---------------------------------------------------------------------------
+
+_ENUM_FIELDS = {"material": Material, "phase": Phase, "ref_method": RefMethod}
+
+
+def as_dict(rec) -> dict:
+    """Record → dict med enums som labels (segmenter som liste af dicts)."""
+    out = {}
+    for f in fields(rec):
+        v = getattr(rec, f.name)
+        if isinstance(v, _Kode):
+            v = v.label
+        elif f.name == "segments":
+            v = [as_dict(s) for s in v]
+        out[f.name] = v
+    return out
+
+
+def from_dict(cls, d: dict):
+    """dict → record; enums må angives som label eller kode."""
+    kw = {}
+    for f in fields(cls):
+        v = d[f.name]
+        enum_cls = _ENUM_FIELDS.get(f.name)
+        if enum_cls is not None and v is not None:
+            v = enum_cls.parse(v)
+        elif f.name == "segments":
+            v = tuple(from_dict(Segment, s) for s in v)
+        kw[f.name] = v
+    return cls(**kw)
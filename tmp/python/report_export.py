@@ -0,0 +1,463 @@
+"""
+Rapport-eksport af hele projektet (stikledning + alle grupper) til HTML og PDF.
+
+Rapporten bygges ud fra de strukturerede resultater (records) og sporet
+af mellemregningerne (calc_trace) – ikke fra tekstfeltet i GUI'en.
+
+Forløb (export_project):
+  1. stikledningen og alle grupper beregnes med mellemregninger
+     (via result_cache, så uændrede grupper ikke regnes igen)
+  2. grupperne renderes i bidder på en procespulje (HTML-afsnit og
+     tekstlinjer til PDF), når der er mange grupper – det er også her
+     mellemregningernes tekst dannes ud fra sporene
+  3. HTML og PDF skrives, og sporene gemmes som JSON til revision
+
+PDF'en skrives uden eksterne pakker: A4, Courier, WinAnsi (cp1252).
+Tegn der ikke findes i cp1252 (Δ, φ, Ω, ⇒ …) skrives som tekst.
+
+export_project() er blokerende og tænkt til at køre i en tråd, så GUI'en
+forbliver responsiv (se Main.py).
+"""
+
+import html
+import json
+import os
+import textwrap
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import codec
+from calc_trace import Trace
+from group_engine import format_current_with_angle
+from records import GroupInput, GroupResult, StikContext, StikInput, StikResult
+from result_cache import (
+    cached_beregn_alle_grupper,
+    cached_beregn_stikledning,
+    get_default_cache,
+)
+
+# Grupper pr. bid, og hvor mange grupper der skal til før en procespulje
+REPORT_CHUNK = 50
+REPORT_POOL_MIN = 200
+
+# PDF-layout (punkter)
+_PAGE_W, _PAGE_H = 595, 842
+_MARGIN = 36
+_FONT_SIZE = 7
+_LEADING = 9
+# Linjer pr. side i write_pdf (kan bruges til at starte en tabel på ny side)
+LINES_PER_PAGE = int((_PAGE_H - 2 * _MARGIN) / _LEADING)
+_CHARS_PER_LINE = int((_PAGE_W - 2 * _MARGIN) / (0.6 * _FONT_SIZE))
+
+_PDF_REPLACE = {
+    "Δ": "Delta",
+    "φ": "phi",
+    "λ": "lambda",
+    "Σ": "Sum",
+    "Ω": "Ohm",
+    "⇒": "=>",
+    "→": "->",
+    "≈": "~",
+    "≤": "<=",
+    "≥": ">=",
+    "√": "sqrt",
+}
+
+_CSS = """
+body { font-family: sans-serif; font-size: 10pt; margin: 2em; }
+h1 { font-size: 16pt; }
+h2 { font-size: 13pt; border-bottom: 1px solid #888; margin-top: 2em; }
+table { border-collapse: collapse; margin: 0.5em 0; }
+td, th { border: 1px solid #bbb; padding: 2px 6px; text-align: left; }
+th { background: #eee; }
+.fejl { color: #b00; font-weight: bold; }
+.ok { color: #070; }
+pre { font-size: 8pt; background: #f7f7f7; padding: 0.5em; white-space: pre-wrap; }
+section { page-break-before: always; }
+"""
+
+
+# ---------------------------------------------------------------------------
+# Hjælpere
+# ---------------------------------------------------------------------------
+
+
+def _fmt_area(sq) -> str:
+    return f"{sq:g} mm²"
+
+
+def _rows_html(rows) -> str:
+    return "".join(
+        f"<tr><th>{html.escape(k)}</th><td>{html.escape(str(v))}</td></tr>"
+        for k, v in rows
+    )
+
+
+def _rows_text(rows):
+    width = max((len(k) for k, _ in rows), default=0)
+    return [f"  {k.ljust(width)}  {v}" for k, v in rows]
+
+
+def _group_input_rows(grp: GroupInput):
+    rows = [
+        ("In", f"{grp.In:g} A"),
+        ("Fasesystem", grp.phase.label),
+        ("Materiale", grp.material.label),
+        ("cos φ", f"{grp.cos_load:.3f}"),
+        ("Maks ΔU_total", f"{grp.du_max_pct:.2f} %"),
+        ("Auto tværsnit", "JA" if grp.auto_size else "NEJ"),
+        ("Sikring", f"{grp.fuse_manu} {grp.fuse_type}"),
+    ]
+    for s in grp.segments:
+        rows.append(
+            (
+                f"Segment {s.nr}",
+                f"{s.ref_method.label}, L = {s.length:g} m, {s.cores} belastede, "
+                f"T = {s.temp:g} °C, Kt = {s.Kt:.2f}, kgrp = {s.kgrp:.2f}",
+            )
+        )
+    return rows
+
+
+def _group_result_rows(res: GroupResult):
+    sikring = res.fuse_type
+    if res.mcb_curve:
+        sikring += f" (kurve {res.mcb_curve})"
+    return [
+        ("Tværsnit", _fmt_area(res.sq)),
+        ("Ik,min", format_current_with_angle(res.Ik_min)),
+        ("Ik,max", format_current_with_angle(res.Ik_max)),
+        ("ΔU_gruppe", f"{res.du_grp:.2f} V ({res.du_grp_pct:.2f} %)"),
+        ("ΔU_total", f"{res.du_tot:.2f} V ({res.du_tot_pct:.2f} %)"),
+        ("Sikring", sikring),
+        ("t_trip", f"{res.t_trip:.3f} s"),
+        ("Termisk", "OK" if res.termisk_ok else "IKKE OK"),
+    ]
+
+
+def _stik_result_rows(res: StikResult):
+    return [
+        ("Tværsnit", _fmt_area(res.sq)),
+        ("Samlet længde", f"{res.total_len:.1f} m"),
+        ("Værste Iz,nød", f"{res.best_Iz_nod:.1f} A"),
+        ("ΔU", f"{res.du:.2f} V ({res.du_pct:.2f} %)"),
+        ("Ik,min", format_current_with_angle(res.Ik_min_val)),
+        ("Ik,max", format_current_with_angle(res.Ik_max_val)),
+        ("t_trip", f"{res.t_trip:.4f} s"),
+        ("Termisk", "OK" if res.termisk_ok else "IKKE OK"),
+    ]
+
+
+def _summary_row(grp: GroupInput, res, err):
+    if res is None:
+        return [grp.name, "-", "-", "-", "-", "-", f"FEJL: {err[1]}"]
+    ok = (
+        res.termisk_ok
+        and res.du_tot_pct <= grp.du_max_pct
+        and res.Ik_min.real >= res.Imin_factor * grp.In
+    )
+    status = "OK" if ok else "TJEK"
+    return [
+        res.name,
+        _fmt_area(res.sq),
+        format_current_with_angle(res.Ik_min),
+        format_current_with_angle(res.Ik_max),
+        f"{res.du_tot_pct:.2f} %",
+        res.fuse_type,
+        status,
+    ]
+
+
+_SUMMARY_HEAD = ["Gruppe", "Tværsnit", "Ik,min", "Ik,max", "ΔU_total", "Sikring",
+                 "Status"]
+
+
+# ---------------------------------------------------------------------------
+# Rendering af grupper (kører i bidder, evt. på procespuljen)
+# ---------------------------------------------------------------------------
+
+
+def _render_group(grp: GroupInput, res, err, trace: Trace):
+    """Ét gruppeafsnit som (html, tekstlinjer)."""
+    title = f"Gruppe {grp.name}"
+    parts = [f"<section><h2>{html.escape(title)}</h2>"]
+    text = ["", "=" * 60, title, "=" * 60, "Input:"]
+
+    rows = _group_input_rows(grp)
+    parts.append(f"<h3>Input</h3><table>{_rows_html(rows)}</table>")
+    text.extend(_rows_text(rows))
+
+    if res is None:
+        msg = f"{err[0]}: {err[1]}"
+        parts.append(f'<p class="fejl">{html.escape(msg)}</p>')
+        text.extend(["", f"FEJL – {msg}"])
+    else:
+        rows = _group_result_rows(res)
+        parts.append(f"<h3>Resultat</h3><table>{_rows_html(rows)}</table>")
+        text.extend(["", "Resultat:"])
+        text.extend(_rows_text(rows))
+
+    lines = trace.lines()
+    if lines:
+        parts.append(
+            "<h3>Mellemregninger</h3><pre>"
+            + html.escape("\n".join(lines))
+            + "</pre>"
+        )
+        text.extend(["", "Mellemregninger:"])
+        text.extend(lines)
+    parts.append("</section>")
+    return "".join(parts), text
+
+
+def _render_chunk(items):
+    """[(grp, res, err, spor), ...] -> ([html, ...], [tekstlinje, ...])."""
+    html_parts = []
+    text = []
+    for grp, res, err, trace in items:
+        h, t = _render_group(grp, res, err, trace)
+        html_parts.append(h)
+        text.extend(t)
+    return html_parts, text
+
+
+def render_groups(items, workers: int = None):
+    """Renderer alle gruppeafsnit; i bidder på en procespulje ved mange grupper."""
+    items = list(items)
+    chunks = [items[i:i + REPORT_CHUNK] for i in range(0, len(items), REPORT_CHUNK)]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(items) < REPORT_POOL_MIN:
+        rendered = map(_render_chunk, chunks)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rendered = list(pool.map(_render_chunk, chunks))
+
+    html_parts = []
+    text = []
+    for h, t in rendered:
+        html_parts.extend(h)
+        text.extend(t)
+    return html_parts, text
+
+
+# ---------------------------------------------------------------------------
+# Samlet rapport
+# ---------------------------------------------------------------------------
+
+
+def render_report(stik_inp: StikInput, stik_res: StikResult, stik_trace: Trace,
+                  items, title: str = "Kabelberegning", workers: int = None):
+    """
+    Hele rapporten. items = [(GroupInput, GroupResult | None,
+    (titel, besked) | None, calc_trace.Trace), ...].
+
+    Returnerer (html-tekst, tekstlinjer til PDF).
+    """
+    items = list(items)
+    stamp = time.strftime("%d-%m-%Y %H:%M")
+
+    summary = [_summary_row(grp, res, err) for grp, res, err, _ in items]
+    head = "".join(f"<th>{html.escape(h)}</th>" for h in _SUMMARY_HEAD)
+    body = "".join(
+        "<tr>" + "".join(f"<td>{html.escape(c)}</td>" for c in row) + "</tr>"
+        for row in summary
+    )
+
+    stik_rows = _stik_result_rows(stik_res)
+    stik_lines = stik_trace.lines()
+    group_html, group_text = render_groups(items, workers)
+
+    doc = [
+        "<!DOCTYPE html><html lang=\"da\"><head><meta charset=\"utf-8\">",
+        f"<title>{html.escape(title)}</title><style>{_CSS}</style></head><body>",
+        f"<h1>{html.escape(title)}</h1><p>Udskrevet {stamp}</p>",
+        "<h2>Oversigt – grupper</h2>",
+        f"<table><tr>{head}</tr>{body}</table>",
+        "<section><h2>Stikledning</h2>",
+        f"<h3>Resultat</h3><table>{_rows_html(stik_rows)}</table>",
+        "<h3>Mellemregninger</h3><pre>",
+        html.escape("\n".join(stik_lines)),
+        "</pre></section>",
+    ]
+    doc.extend(group_html)
+    doc.append("</body></html>")
+
+    widths = [
+        max(len(h), *(len(r[i]) for r in summary)) if summary else len(h)
+        for i, h in enumerate(_SUMMARY_HEAD)
+    ]
+    text = [title, f"Udskrevet {stamp}", "", "Oversigt – grupper:"]
+    text.append("  ".join(h.ljust(w) for h, w in zip(_SUMMARY_HEAD, widths)))
+    for row in summary:
+        text.append("  ".join(c.ljust(w) for c, w in zip(row, widths)))
+    text.extend(["", "=" * 60, "Stikledning", "=" * 60, "Resultat:"])
+    text.extend(_rows_text(stik_rows))
+    text.extend(["", "Mellemregninger:"])
+    text.extend(stik_lines)
+    text.extend(group_text)
+
+    return "".join(doc), text
+
+
+# ---------------------------------------------------------------------------
+# Minimal PDF-skriver (kun tekst)
+# ---------------------------------------------------------------------------
+
+
+def _pdf_text(line: str) -> bytes:
+    for a, b in _PDF_REPLACE.items():
+        line = line.replace(a, b)
+    raw = line.encode("cp1252", errors="replace")
+    return raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def _wrap(lines):
+    for line in lines:
+        if len(line) <= _CHARS_PER_LINE:
+            yield line
+        else:
+            yield from textwrap.wrap(
+                line, _CHARS_PER_LINE, subsequent_indent="    "
+            ) or [""]
+
+
+def write_pdf(path: str, lines, title: str = "Kabelberegning"):
+    """Skriver tekstlinjerne som en A4-PDF (Courier)."""
+    wrapped = list(_wrap(lines))
+    pages = [
+        wrapped[i:i + LINES_PER_PAGE]
+        for i in range(0, max(len(wrapped), 1), LINES_PER_PAGE)
+    ] or [[]]
+
+    objects = []  # objekt nr. = indeks + 1
+
+    def add(obj: bytes) -> int:
+        objects.append(obj)
+        return len(objects)
+
+    font_id = add(
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier "
+        b"/Encoding /WinAnsiEncoding >>"
+    )
+    pages_id = len(objects) + 1 + 2 * len(pages)  # reserveres til sidst
+    page_ids = []
+    for page_no, page in enumerate(pages, start=1):
+        y = _PAGE_H - _MARGIN - _FONT_SIZE
+        stream = [
+            b"BT",
+            f"/F1 {_FONT_SIZE} Tf {_LEADING} TL {_MARGIN} {y} Td".encode("ascii"),
+        ]
+        for line in page:
+            stream.append(b"(" + _pdf_text(line) + b") '")
+        stream.append(b"ET")
+        footer = f"{title} – side {page_no}/{len(pages)}"
+        stream.append(
+            f"BT /F1 {_FONT_SIZE} Tf {_MARGIN} {_MARGIN / 2} Td".encode("ascii")
+            + b" (" + _pdf_text(footer) + b") Tj ET"
+        )
+        data = b"\n".join(stream)
+        content_id = add(
+            b"<< /Length " + str(len(data)).encode("ascii") + b" >>\nstream\n"
+            + data + b"\nendstream"
+        )
+        page_ids.append(
+            add(
+                f"<< /Type /Page /Parent {pages_id} 0 R "
+                f"/MediaBox [0 0 {_PAGE_W} {_PAGE_H}] "
+                f"/Resources << /Font << /F1 {font_id} 0 R >> >> "
+                f"/Contents {content_id} 0 R >>".encode("ascii")
+            )
+        )
+    kids = " ".join(f"{i} 0 R" for i in page_ids)
+    add(f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode("ascii"))
+    catalog_id = add(f"<< /Type /Catalog /Pages {pages_id} 0 R >>".encode("ascii"))
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for no, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{no} 0 obj\n".encode("ascii") + obj + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("ascii")
+    for off in offsets:
+        out += f"{off:010d} 00000 n \n".encode("ascii")
+    out += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root {catalog_id} 0 R >>\n"
+        f"startxref\n{xref}\n%%EOF\n"
+    ).encode("ascii")
+
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+# ---------------------------------------------------------------------------
+# Eksport
+# ---------------------------------------------------------------------------
+
+
+def trace_document(stik_inp: StikInput, stik_trace: Trace, items) -> dict:
+    """Input og spor for stikledning og alle grupper som JSON-venligt dict."""
+    return {
+        "stikledning": {
+            "input": codec.to_jsonable(stik_inp),
+            "spor": stik_trace.to_jsonable(),
+        },
+        "grupper": [
+            {
+                "navn": grp.name,
+                "input": codec.to_jsonable(grp),
+                "fejl": list(err) if err is not None else None,
+                "spor": trace.to_jsonable(),
+            }
+            for grp, _, err, trace in items
+        ],
+    }
+
+
+def export_project(html_path: str, pdf_path: str, stik_inp: StikInput,
+                   stik: StikContext, groups, title: str = "Kabelberegning",
+                   workers: int = None, json_path: str = None) -> dict:
+    """
+    Beregner og skriver hele rapporten (og evt. sporene som JSON). Rejser
+    BeregningsFejl hvis stikledningen ikke kan beregnes; fejl i enkelte
+    grupper kommer med i rapporten.
+
+    Returnerer {"groups", "fejl", "html", "pdf", "json", "sekunder"}.
+    """
+    t0 = time.perf_counter()
+    cache = get_default_cache()
+    groups = list(groups)
+
+    stik_trace = Trace()
+    stik_res = cached_beregn_stikledning(cache, stik_inp, trace=stik_trace)
+    results = cached_beregn_alle_grupper(cache, groups, stik, workers)
+    items = [
+        (grp, res, err, trace) for grp, (res, err, trace) in zip(groups, results)
+    ]
+
+    html_text, text = render_report(
+        stik_inp, stik_res, stik_trace, items, title, workers
+    )
+    if html_path:
+        with open(html_path, "w", encoding="utf-8") as f:
+            f.write(html_text)
+    if pdf_path:
+        write_pdf(pdf_path, text, title)
+    if json_path:
+        # json.dumps uden indrykning bruger den hurtige C-encoder
+        with open(json_path, "w", encoding="utf-8") as f:
+            f.write(
+                json.dumps(
+                    trace_document(stik_inp, stik_trace, items), ensure_ascii=False
+                )
+            )
+
+    return {
+        "groups": len(items),
+        "fejl": sum(1 for _, res, _, _ in items if res is None),
+        "html": html_path,
+        "pdf": pdf_path,
+        "json": json_path,
+        "sekunder": time.perf_counter() - t0,
+    }
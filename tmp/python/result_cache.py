@@ -0,0 +1,339 @@
+"""
+Vedvarende resultat-cache for gruppe- og stikledningsberegninger.
+
+Resultater gemmes i en lokal SQLite-fil under en indholdsadresseret nøgle:
+
+    sha256( normaliseret input  +  fingeraftryk af de tabeldata
+            som netop denne beregning slår op i )
+
+Fingeraftrykket dækker kun de udsnit af Tabel og fuse_curves.FUSE_DB som
+beregningen bruger (Iz-rækker for de anvendte ref-metoder/ledere, NKT-data
+for materialet, den valgte sikringstype …). Rettes en tabelværdi, får
+præcis de berørte beregninger en ny nøgle, mens resten stadig rammer
+cachen. Gamle poster fjernes med prune().
+
+Mellemregningerne gemmes sammen med resultatet som struktureret spor
+(calc_trace), så Mellemregninger-fanen ser ens ud uanset om resultatet kom
+fra cachen – teksten dannes først når den vises.
+"""
+
+import hashlib
+import os
+from functools import lru_cache
+import sqlite3
+import threading
+import time
+
+import codec
+from calc_trace import Trace
+from calculations import STANDARD_SIZES, Q_MATERIAL, LAMBDA_MATERIAL
+from fuse_curves import FUSE_DB
+from group_engine import beregn_gruppe, beregn_alle_grupper
+from records import (
+    GroupInput,
+    GroupResult,
+    StikContext,
+    StikInput,
+    StikResult,
+    from_dict,
+)
+from stik_engine import beregn_stikledning
+from Tabel import IZ_TABLE, IZ_TABLE_AL, NKT_R, NKT_XL
+
+# Tælles op når formlerne i group_engine/stik_engine eller sporformatet ændres
+ENGINE_VERSION = 2
+
+DEFAULT_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "cache", "resultater.sqlite"
+)
+
+
+# ---------------------------------------------------------------------------
+# Fingeraftryk af tabeludsnit
+# ---------------------------------------------------------------------------
+
+_slice_hashes = {}
+
+
+def _slice_hash(name: str, getter):
+    """sha256 af ét tabeludsnit – beregnes én gang pr. proces."""
+    h = _slice_hashes.get(name)
+    if h is None:
+        try:
+            data = getter()
+        except KeyError:
+            data = None
+        h = hashlib.sha256(codec.dumps(data).encode("utf-8")).hexdigest()
+        _slice_hashes[name] = h
+    return h
+
+
+def _iz_dep(material, ref, cores):
+    table = IZ_TABLE if material == "Cu" else IZ_TABLE_AL
+    return _slice_hash(
+        f"iz|{material}|{ref}|{cores}",
+        lambda: {str(k): v for k, v in table[ref][cores].items()},
+    )
+
+
+def _nkt_dep(material):
+    return _slice_hash(
+        f"nkt|{material}",
+        lambda: {"R": NKT_R[material], "XL": NKT_XL[material]},
+    )
+
+
+def _du_dep(material):
+    return _slice_hash(
+        f"du|{material}",
+        lambda: [Q_MATERIAL[material], LAMBDA_MATERIAL[material]],
+    )
+
+
+def _fuse_dep(manu, fuse_type):
+    return _slice_hash(
+        f"fuse|{manu}|{fuse_type}",
+        lambda: FUSE_DB[(manu, fuse_type)],
+    )
+
+
+def _sizes_dep():
+    return _slice_hash("sizes", lambda: STANDARD_SIZES)
+
+
+def _fuse_types_used(fuse_type):
+    if fuse_type == "MCB (auto B/C)":
+        return ("MCB B", "MCB C")
+    return (fuse_type,)
+
+
+# ---------------------------------------------------------------------------
+# Nøgler
+# ---------------------------------------------------------------------------
+
+
+def _key(kind: str, payload) -> str:
+    raw = codec.dumps({"kind": kind, "v": ENGINE_VERSION, "p": payload})
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# Records kan hashes, så en gentaget nøgleberegning for samme input (fx
+# "Beregn alle grupper" uden ændringer) springer serialisering og sha256 over.
+@lru_cache(maxsize=4096)
+def group_key(grp: GroupInput, stik: StikContext) -> str:
+    """Cache-nøgle for én gruppe mod en given stik-kontekst."""
+    mat = grp.material.label
+    segs = []
+    deps = {
+        _nkt_dep(mat), _du_dep(mat), _du_dep(stik.material.label), _sizes_dep()
+    }
+    for s in grp.segments:
+        seg = {
+            "nr": s.nr,
+            "ref_method": s.ref_method,
+            "length": s.length,
+            "cores": s.cores,
+            "Kt": s.Kt,
+            "kgrp": s.kgrp,
+        }
+        # Ved auto-tværsnit bruges segmentets tværsnit ikke
+        if not grp.auto_size:
+            seg["area"] = s.area
+        segs.append(seg)
+        deps.add(_iz_dep(mat, s.ref_method.label, s.cores))
+    for ft in _fuse_types_used(grp.fuse_type):
+        deps.add(_fuse_dep(grp.fuse_manu, ft))
+
+    grp_fields = codec.to_jsonable(grp)
+    del grp_fields["segments"]
+    payload = {
+        "grp": grp_fields,
+        "segments": segs,
+        "stik": stik,
+        "deps": sorted(deps),
+    }
+    return _key("gruppe", payload)
+
+
+@lru_cache(maxsize=256)
+def stik_key(inp: StikInput) -> str:
+    """Cache-nøgle for stikledningen."""
+    mat = inp.material.label
+    deps = {_nkt_dep(mat), _du_dep(mat), _sizes_dep()}
+    deps.add(_fuse_dep(inp.fuse_manu, inp.fuse_type))
+    for s in inp.segments:
+        deps.add(_iz_dep(mat, s.ref_method.label, s.cores))
+    payload = {"inp": inp, "deps": sorted(deps)}
+    return _key("stik", payload)
+
+
+# ---------------------------------------------------------------------------
+# SQLite-lager
+# ---------------------------------------------------------------------------
+
+
+class ResultCache:
+    """Nøgle → (resultat, spor) i en SQLite-fil."""
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY,"
+            " kind TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " log TEXT NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, cls):
+        """(record af typen cls, calc_trace.Trace) eller None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, log FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+        return from_dict(cls, codec.loads(row[0])), Trace.loads(row[1])
+
+    def put(self, key: str, kind: str, value, trace: Trace, commit=True):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, kind, value, log, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, kind, codec.dumps(value), trace.dumps(), time.time()),
+            )
+            if commit:
+                self._conn.commit()
+
+    def commit(self):
+        with self._lock:
+            self._conn.commit()
+
+    def prune(self, older_than_days: float = 90.0) -> int:
+        """Sletter poster der ikke er brugt i older_than_days dage."""
+        limit = time.time() - older_than_days * 86400.0
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM results WHERE last_used < ?", (limit,)
+            )
+            self._conn.commit()
+            return cur.rowcount
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+
+_default_cache = None
+
+
+def get_default_cache():
+    """Fælles cache for GUI'en; None hvis filen ikke kan åbnes."""
+    global _default_cache
+    if _default_cache is None:
+        try:
+            _default_cache = ResultCache()
+        except (sqlite3.Error, OSError):
+            return None
+    return _default_cache
+
+
+# ---------------------------------------------------------------------------
+# Cachede beregninger
+# ---------------------------------------------------------------------------
+
+
+def cached_beregn_gruppe(cache, grp: GroupInput, stik: StikContext,
+                         log=None) -> GroupResult:
+    """Som group_engine.beregn_gruppe, men slår først op i cachen."""
+    if cache is None or stik is None:
+        return beregn_gruppe(grp, stik, log)
+    key = group_key(grp, stik)
+    hit = cache.get(key, GroupResult)
+    if hit is not None:
+        res, trace = hit
+        if log is not None:
+            trace.replay(log)
+        return res
+
+    trace = Trace()
+    res = beregn_gruppe(grp, stik, log, trace)
+    cache.put(key, "gruppe", res, trace)
+    return res
+
+
+def cached_beregn_stikledning(cache, inp: StikInput, log=None,
+                              trace: Trace = None) -> StikResult:
+    """
+    Som stik_engine.beregn_stikledning, men slår først op i cachen.
+    Angives trace, får den sporet tilføjet (også ved cache-hit).
+    """
+    if cache is None:
+        return beregn_stikledning(inp, log, trace)
+    key = stik_key(inp)
+    hit = cache.get(key, StikResult)
+    if hit is not None:
+        res, hit_trace = hit
+        if log is not None:
+            hit_trace.replay(log)
+        if trace is not None:
+            trace.entries.extend(hit_trace.entries)
+        return res
+
+    new_trace = Trace()
+    try:
+        res = beregn_stikledning(inp, log, new_trace)
+    finally:
+        if trace is not None:
+            trace.entries.extend(new_trace.entries)
+    cache.put(key, "stik", res, new_trace)
+    return res
+
+
+def cached_beregn_alle_grupper(cache, groups, stik: StikContext,
+                               workers: int = None):
+    """
+    Som group_engine.beregn_alle_grupper: cache-hits tages direkte, kun
+    resten beregnes (evt. på procespuljen) og gemmes bagefter.
+    """
+    groups = list(groups)
+    if cache is None or stik is None:
+        return beregn_alle_grupper(groups, stik, workers)
+
+    out = [None] * len(groups)
+    keys = [group_key(g, stik) for g in groups]
+    missing = []
+    for i, key in enumerate(keys):
+        hit = cache.get(key, GroupResult)
+        if hit is None:
+            missing.append(i)
+        else:
+            out[i] = (hit[0], None, hit[1])
+
+    if missing:
+        computed = beregn_alle_grupper([groups[i] for i in missing], stik, workers)
+        for i, (res, err, trace) in zip(missing, computed):
+            out[i] = (res, err, trace)
+            if err is None:
+                cache.put(keys[i], "gruppe", res, trace, commit=False)
+        cache.commit()
+    return out
@@ -0,0 +1,356 @@
+"""
+Fanen "Oversigt": alle gruppers resultater i én sorterbar tabel.
+
+Resultaterne står ellers kun i labels i hver GroupFrame, så man skal
+rulle gennem alle grupper for at finde dem der fejler. Her vises én
+række pr. gruppe (tværsnit, ΔU_total, Ik,min og margin, termisk og
+status) i en ttk.Treeview.
+
+Opdateringer er inkrementelle: opdater() gemmer kun rækken, og alle
+ændringer fra samme runde i event-loopet skrives til Treeview'en samlet
+(after_idle) – én item()/insert() pr. ændret gruppe. Sortering og filter
+regnes i Python på de gemte sorteringsnøgler, og den nye rækkefølge
+sættes med ét kald til Treeview.set_children(), så også 10.000 rækker
+sorteres/filtreres uden mærkbar ventetid. Rækker der filtreres fra,
+frakobles blot (de slettes ikke).
+
+OversigtsModel indeholder data, sortering og filter og kræver ikke tkinter.
+"""
+
+import re
+import tkinter as tk
+from operator import itemgetter
+from tkinter import ttk
+
+# (id, overskrift, bredde, justering)
+KOLONNER = (
+    ("gruppe", "Gruppe", 90, "w"),
+    ("In", "In [A]", 60, "e"),
+    ("sq", "Tværsnit [mm²]", 90, "e"),
+    ("du", "ΔU_total [%]", 90, "e"),
+    ("du_max", "Maks [%]", 70, "e"),
+    ("ikmin", "Ik,min [A]", 90, "e"),
+    ("margin", "Ik,min / krav", 90, "e"),
+    ("termisk", "Termisk", 70, "center"),
+    ("status", "Status", 200, "w"),
+)
+_KOLONNE_IDX = {kol[0]: i for i, kol in enumerate(KOLONNER)}
+
+
+def _naturlig(navn: str):
+    """Sorteringsnøgle så W2 kommer før W10."""
+    return tuple(
+        (0, int(d), "") if d else (1, 0, t.lower())
+        for d, t in re.findall(r"(\d+)|(\D+)", navn)
+    )
+
+
+def _fmt_sq(sq) -> str:
+    return f"{sq:g}"
+
+
+def _imin_krav(grp, res) -> float:
+    """Imin_factor·In – kravet til Ik,min (som i group_engines udkoblingskontrol)."""
+    return res.Imin_factor * grp.In
+
+
+# ---------------------------------------------------------------------------
+# Model (uden tkinter)
+# ---------------------------------------------------------------------------
+
+
+class _Raekke:
+    """Én gruppes række: visningstekster, sorteringsnøgler og status."""
+
+    __slots__ = ("vaerdier", "noegler", "tjek", "fejl", "soeg")
+
+    def __init__(self, vaerdier, noegler, tjek: bool, fejl: bool):
+        self.vaerdier = vaerdier
+        self.noegler = noegler
+        self.tjek = tjek
+        self.fejl = fejl
+        self.soeg = vaerdier[0].lower()
+
+
+def byg_raekke(grp, res, err=None) -> _Raekke:
+    """
+    Række for en gruppe. res=None betyder at beregningen fejlede; err er
+    så (titel, besked) som fra group_engine._beregn_en.
+    """
+    navn = res.name if res is not None else grp.name
+    if res is None:
+        besked = err[1] if err else "ikke beregnet"
+        besked = besked.splitlines()[0] if besked else ""
+        vaerdier = (navn, f"{grp.In:g}", "-", "-", f"{grp.du_max_pct:.2f}", "-", "-",
+                    "-", f"FEJL: {besked}")
+        noegler = (_naturlig(navn), grp.In, None, None, grp.du_max_pct, None, None,
+                   None, (2, besked))
+        return _Raekke(vaerdier, noegler, True, True)
+
+    # realdelen, som group_engine sammenligner med Imin_factor·In
+    Ik = res.Ik_min.real
+    krav = _imin_krav(grp, res)
+    margin = Ik / krav if krav > 0 else float("inf")
+
+    aarsager = []
+    if res.du_tot_pct > grp.du_max_pct:
+        aarsager.append("ΔU")
+    if margin < 1.0:
+        aarsager.append("Ik,min")
+    if not res.termisk_ok:
+        aarsager.append("termisk")
+    status = "TJEK: " + ", ".join(aarsager) if aarsager else "OK"
+
+    vaerdier = (
+        navn,
+        f"{grp.In:g}",
+        _fmt_sq(res.sq),
+        f"{res.du_tot_pct:.2f}",
+        f"{grp.du_max_pct:.2f}",
+        f"{Ik:.1f}",
+        f"{margin:.2f}",
+        "OK" if res.termisk_ok else "IKKE OK",
+        status,
+    )
+    noegler = (
+        _naturlig(navn), grp.In, res.sq, res.du_tot_pct, grp.du_max_pct, Ik, margin,
+        res.termisk_ok, (1 if aarsager else 0, status),
+    )
+    return _Raekke(vaerdier, noegler, bool(aarsager), False)
+
+
+class OversigtsModel:
+    """
+    Rækker pr. nøgle (fx GroupFrame-objektet) i indsættelsesrækkefølge,
+    plus aktuel sortering og filter. raekkefoelge() giver de synlige
+    nøgler i visningsrækkefølge.
+    """
+
+    def __init__(self):
+        self.raekker = {}  # nøgle -> _Raekke (dict bevarer rækkefølgen)
+        self.sort_kolonne = None
+        self.sort_omvendt = False
+        self.filter_tekst = ""
+        self.kun_tjek = False
+
+    def saet(self, noegle, raekke: _Raekke):
+        self.raekker[noegle] = raekke
+
+    def fjern(self, noegle):
+        self.raekker.pop(noegle, None)
+
+    def sorter_efter(self, kolonne: str):
+        """Klik på overskrift: samme kolonne vender rækkefølgen."""
+        if self.sort_kolonne == kolonne:
+            self.sort_omvendt = not self.sort_omvendt
+        else:
+            self.sort_kolonne = kolonne
+            self.sort_omvendt = False
+
+    def _synlig(self, r: _Raekke) -> bool:
+        if self.kun_tjek and not r.tjek:
+            return False
+        return not self.filter_tekst or self.filter_tekst in r.soeg
+
+    def raekkefoelge(self):
+        tekst = self.filter_tekst = self.filter_tekst.strip().lower()
+        if tekst or self.kun_tjek:
+            items = [(k, r) for k, r in self.raekker.items() if self._synlig(r)]
+        else:
+            items = list(self.raekker.items())
+        if self.sort_kolonne is None:
+            return [k for k, _ in items]
+
+        i = _KOLONNE_IDX[self.sort_kolonne]
+        # rækker uden værdi (fejlede beregninger) står altid sidst
+        med = [(r.noegler[i], k) for k, r in items if r.noegler[i] is not None]
+        uden = [k for k, r in items if r.noegler[i] is None]
+        # sort() er stabil (også med reverse), så lige værdier beholder
+        # gruppernes rækkefølge
+        med.sort(key=itemgetter(0), reverse=self.sort_omvendt)
+        return [k for _, k in med] + uden
+
+    def antal(self):
+        """(grupper i alt, heraf til tjek, heraf fejlede)."""
+        tjek = fejl = 0
+        for r in self.raekker.values():
+            tjek += r.tjek
+            fejl += r.fejl
+        return len(self.raekker), tjek, fejl
+
+
+# ---------------------------------------------------------------------------
+# Widget
+# ---------------------------------------------------------------------------
+
+
+class ResultatOversigt(ttk.Frame):
+    """
+    Treeview med alle gruppers resultater.
+
+    opdater(noegle, grp, res, err) / fjern(noegle) kan kaldes så tit man
+    vil; Treeview'en opdateres én gang pr. runde i event-loopet.
+    vis_gruppe(noegle) kaldes ved dobbeltklik på en række.
+    """
+
+    def __init__(self, master, vis_gruppe=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.model = OversigtsModel()
+        self.vis_gruppe = vis_gruppe
+        self._iid = {}  # nøgle -> Treeview-iid
+        self._noegle = {}  # iid -> nøgle
+        self._naeste_iid = 0
+        self._ventende = {}  # nøgle -> _Raekke | None (= fjern)
+        self._flush_id = None
+
+        # --------------------------------------------------------
+        # Filter-linje
+        # --------------------------------------------------------
+        top = ttk.Frame(self)
+        top.pack(side="top", fill="x", pady=(0, 5))
+
+        ttk.Label(top, text="Søg gruppe:").pack(side="left")
+        self.filter_var = tk.StringVar()
+        e_filter = ttk.Entry(top, textvariable=self.filter_var, width=20)
+        e_filter.pack(side="left", padx=(2, 10))
+        self.filter_var.trace_add("write", self._filter_aendret)
+
+        self.kun_tjek_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            top,
+            text="Kun grupper der skal tjekkes",
+            variable=self.kun_tjek_var,
+            command=self._filter_aendret,
+        ).pack(side="left")
+
+        self.lbl_antal = ttk.Label(top, text="")
+        self.lbl_antal.pack(side="right")
+
+        # --------------------------------------------------------
+        # Tabel
+        # --------------------------------------------------------
+        body = ttk.Frame(self)
+        body.pack(side="top", fill="both", expand=True)
+
+        self.tree = ttk.Treeview(
+            body, columns=[k[0] for k in KOLONNER], show="headings",
+            selectmode="browse",
+        )
+        for kol, tekst, bredde, just in KOLONNER:
+            self.tree.heading(kol, text=tekst,
+                              command=lambda k=kol: self._sorter(k))
+            self.tree.column(kol, width=bredde, anchor=just, stretch=(kol == "status"))
+        self.tree.tag_configure("tjek", foreground="#b36b00")
+        self.tree.tag_configure("fejl", foreground="#c00000")
+
+        sb = ttk.Scrollbar(body, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=sb.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        sb.pack(side="right", fill="y")
+
+        self.tree.bind("<Double-1>", self._dobbeltklik)
+        self._opdater_antal()
+
+    # ------------------------------------------------------------------
+    # Offentlige kald
+    # ------------------------------------------------------------------
+    def opdater(self, noegle, grp, res, err=None):
+        """Ny/ændret række for gruppen (vises ved næste flush)."""
+        self._ventende[noegle] = byg_raekke(grp, res, err)
+        self._planlaeg()
+
+    def fjern(self, noegle):
+        self._ventende[noegle] = None
+        self._planlaeg()
+
+    def ryd(self):
+        for noegle in list(self.model.raekker):
+            self._ventende[noegle] = None
+        self._planlaeg()
+
+    # ------------------------------------------------------------------
+    # Inkrementel opdatering
+    # ------------------------------------------------------------------
+    def _planlaeg(self):
+        if self._flush_id is None:
+            self._flush_id = self.after_idle(self._flush)
+
+    def _flush(self):
+        self._flush_id = None
+        ventende, self._ventende = self._ventende, {}
+        if not ventende:
+            return
+
+        ny_orden = False
+        for noegle, raekke in ventende.items():
+            iid = self._iid.get(noegle)
+            if raekke is None:
+                self.model.fjern(noegle)
+                if iid is not None:
+                    self.tree.delete(iid)
+                    del self._iid[noegle]
+                    del self._noegle[iid]
+                continue
+
+            gammel = self.model.raekker.get(noegle)
+            self.model.saet(noegle, raekke)
+            tags = ("fejl",) if raekke.fejl else ("tjek",) if raekke.tjek else ()
+            if iid is None:
+                self._naeste_iid += 1
+                iid = f"r{self._naeste_iid}"
+                self._iid[noegle] = iid
+                self._noegle[iid] = noegle
+                self.tree.insert("", "end", iid=iid, values=raekke.vaerdier, tags=tags)
+                ny_orden = True
+            else:
+                self.tree.item(iid, values=raekke.vaerdier, tags=tags)
+                if gammel is None or self._flytter(gammel, raekke):
+                    ny_orden = True
+
+        if ny_orden:
+            self._vis_orden()
+        self._opdater_antal()
+
+    def _flytter(self, gammel: _Raekke, ny: _Raekke) -> bool:
+        """Kan ændringen flytte rækken (sortering) eller skjule/vise den (filter)?"""
+        m = self.model
+        if m.sort_kolonne is not None:
+            i = _KOLONNE_IDX[m.sort_kolonne]
+            if gammel.noegler[i] != ny.noegler[i]:
+                return True
+        if m.kun_tjek and gammel.tjek != ny.tjek:
+            return True
+        return bool(m.filter_tekst) and gammel.soeg != ny.soeg
+
+    def _vis_orden(self):
+        """Sortering + filter i ét kald (frafiltrerede rækker frakobles)."""
+        self.tree.set_children("", *[self._iid[k] for k in self.model.raekkefoelge()])
+
+    def _opdater_antal(self):
+        i_alt, tjek, fejl = self.model.antal()
+        vist = len(self.tree.get_children(""))
+        tekst = f"{i_alt} grupper – {tjek} til tjek ({fejl} fejlede)"
+        if vist != i_alt:
+            tekst += f" – {vist} vist"
+        self.lbl_antal.config(text=tekst)
+
+    # ------------------------------------------------------------------
+    # Sortering, filter og dobbeltklik
+    # ------------------------------------------------------------------
+    def _sorter(self, kolonne: str):
+        self.model.sorter_efter(kolonne)
+        pil = " ▼" if self.model.sort_omvendt else " ▲"
+        for kol, tekst, _, _ in KOLONNER:
+            self.tree.heading(kol, text=tekst + (pil if kol == kolonne else ""))
+        self._vis_orden()
+
+    def _filter_aendret(self, *_args):
+        self.model.filter_tekst = self.filter_var.get()
+        self.model.kun_tjek = bool(self.kun_tjek_var.get())
+        self._vis_orden()
+        self._opdater_antal()
+
+    def _dobbeltklik(self, event):
+        iid = self.tree.identify_row(event.y)
+        if iid and self.vis_gruppe is not None:
+            self.vis_gruppe(self._noegle[iid])
@@ -4,11 +4,15 @@ from tkinter import ttk
 
 from calculations import (
     STANDARD_SIZES,
+    ENV_BY_INSTALL_NR,
     lookup_Kt,
+    lookup_kgrp,
     INSTALL_METHODS,
     INSTALL_TEXTS,
 )
-from Tabel import INSTALLATIONSMETODER, KGRP, KGRP_ROW
+from group_engine import BeregningsFejl
+from records import RefMethod, Segment, SegmentFelter
+from Tabel import INSTALLATIONSMETODER, KGRP_ROW
 
 
 class SegmentFrame(ttk.Frame):
@@ -48,6 +52,9 @@ class SegmentFrame(ttk.Frame):
         self.Kt_value = 1.0
         self.kgrp_value = 1.0
 
+        # kaldes når brugeren ændrer et felt (live-beregning i gruppen)
+        self._change_callbacks = []
+
         self._build_widgets()
 
     # ------------------------------------------------------------------
@@ -162,6 +169,16 @@ class SegmentFrame(ttk.Frame):
         # Start med første installationsmetode
         self.on_install_change(None)
 
+        # Ændringer i felterne opdaterer Kt/kgrp og giver besked videre
+        for var in (
+            self.length_var,
+            self.temp_var,
+            self.cores_var,
+            self.area_var,
+            self.n_samlet_var,
+        ):
+            var.trace_add("write", self._on_var_write)
+
     # ------------------------------------------------------------------
     # Håndtering af installationsmetode
     # ------------------------------------------------------------------
@@ -204,6 +221,21 @@ class SegmentFrame(ttk.Frame):
 
         # Opdater Kt ud fra installationsmetode + temperatur
         self.update_Kt()
+        for callback in self._change_callbacks:
+            callback()
+
+    # ------------------------------------------------------------------
+    # Ændringer i felterne
+    # ------------------------------------------------------------------
+    def add_change_callback(self, callback) -> None:
+        """callback() kaldes hver gang et af segmentets felter ændres."""
+        self._change_callbacks.append(callback)
+
+    def _on_var_write(self, *_args) -> None:
+        # Temperatur/ks påvirker Kt og kgrp, som get_data() læser
+        self.update_Kt()
+        for callback in self._change_callbacks:
+            callback()
 
     # ------------------------------------------------------------------
     # Håndtering af belastede ledere (cores)
@@ -239,12 +271,8 @@ class SegmentFrame(ttk.Frame):
         except ValueError:
             temp = 30.0
 
-        # Miljø (luft / jord) slåes op i INSTALLATIONSMETODER via installationsnummer
-        env = "luft"
-        if self.install_nr is not None:
-            inst_data = INSTALLATIONSMETODER.get(self.install_nr, {})
-            if isinstance(inst_data, dict):
-                env = inst_data.get("miljo", "luft")
+        # Miljø (luft / jord) slåes op via installationsnummer
+        env = ENV_BY_INSTALL_NR.get(self.install_nr, "luft")
 
         # Kt fra tabel – afhænger af miljø + temperatur
         try:
@@ -260,16 +288,8 @@ class SegmentFrame(ttk.Frame):
         except ValueError:
             n_samlet = 1
 
-        ref = self.ref_method or "C"
-        kgrp_table = KGRP.get(ref, {})
-        faktor = 1.0
-        if isinstance(kgrp_table, dict) and n_samlet >= 1:
-            # brug nærmeste lavere n i tabellen
-            ns = sorted(kgrp_table.keys())
-            candidates = [n for n in ns if n <= n_samlet]
-            if candidates:
-                faktor = kgrp_table[max(candidates)]
-        self.kgrp_value = faktor
+        # nærmeste lavere n i tabellen (forudberegnet i calculations)
+        self.kgrp_value = lookup_kgrp(self.ref_method, n_samlet)
 
         if n_samlet <= 1:
             txt = "1.00 (ingen samlet)"
@@ -281,21 +301,28 @@ class SegmentFrame(ttk.Frame):
     # ------------------------------------------------------------------
     # Data til beregning (udlæses af Main / group_calc)
     # ------------------------------------------------------------------
-    def get_data(self) -> dict:
+    def get_data(self) -> Segment:
         """
-        Returnerer en dict med alle nødvendige data til beregninger.
-
-        {
-            "nr": segmentnummer (1,2,...),
-            "ref_method": installationsreference (fx "C", "D1", ...),
-            "length": længde i meter (float),
-            "temp": temp. i °C (float),
-            "cores": belastede ledere (int),
-            "area": valgt tværsnit (mm², float),
-            "Kt": Kt-faktor (float),
-            "kgrp": samlefaktor (float),
-        }
+        Returnerer et records.Segment med alle nødvendige data til beregninger:
+
+            nr          segmentnummer (1,2,...)
+            ref_method  installationsreference (RefMethod, fx C, D1, ...)
+            length      længde i meter
+            temp        temp. i °C
+            cores       belastede ledere
+            area        valgt tværsnit (mm²)
+            Kt          Kt-faktor
+            kgrp        samlefaktor
+
+        Ugyldige tal giver ValueError; mangler installationsmetoden, rejses
+        BeregningsFejl.
         """
+        if not self.ref_method:
+            raise BeregningsFejl(
+                "Fejl i segmentdata",
+                f"Segment {self.number}: Vælg en installationsmetode.",
+            )
+
         try:
             length = float(self.length_var.get().replace(",", "."))
         except ValueError:
@@ -318,13 +345,37 @@ class SegmentFrame(ttk.Frame):
         except ValueError:
             raise ValueError(f"Segment {self.number}: Ugyldigt tværsnit.")
 
-        return {
-            "nr": self.number,
-            "ref_method": self.ref_method,
-            "length": length,
-            "temp": temp,
-            "cores": cores,
-            "area": area,
-            "Kt": self.Kt_value,
-            "kgrp": self.kgrp_value,
-        }
+        return Segment(
+            nr=self.number,
+            ref_method=RefMethod.parse(self.ref_method),
+            length=length,
+            temp=temp,
+            cores=cores,
+            area=area,
+            Kt=self.Kt_value,
+            kgrp=self.kgrp_value,
+        )
+
+    # ------------------------------------------------------------------
+    # Feltværdier (fortryd/gentag)
+    # ------------------------------------------------------------------
+    def felter(self) -> SegmentFelter:
+        """Felterne som de står, så saet_felter() kan sætte dem tilbage."""
+        return SegmentFelter(
+            install=self.install_combo.current(),
+            length=self.length_var.get(),
+            temp=self.temp_var.get(),
+            cores=self.cores_var.get(),
+            area=self.area_var.get(),
+            n_samlet=self.n_samlet_var.get(),
+        )
+
+    def saet_felter(self, f: SegmentFelter) -> None:
+        if self.install_combo.current() != f.install:
+            self.install_combo.current(f.install)
+            self.on_install_change()
+        self.length_var.set(f.length)
+        self.temp_var.set(f.temp)
+        self.cores_var.set(f.cores)
+        self.area_var.set(f.area)
+        self.n_samlet_var.set(f.n_samlet)
@@ -0,0 +1,335 @@
+"""
+Transportuafhængigt API til beregningerne.
+
+Bruges af http_service (HTTP/JSON), stdio_worker (NDJSON over stdin/stdout)
+og daemon (NDJSON over en Unix-socket).
+En forespørgsel er (metode, params); params og svar er JSON-venlige dicts.
+Records angives som dicts i records.as_dict-format (enums som tekst, fx
+"Cu", "3-faset", "D1"), komplekse tal som {"__complex__": [re, im]} – se
+codec.
+
+Metoder:
+
+  gruppe       {"gruppe": GroupInput, "stik": StikContext}
+  grupper      {"grupper": [GroupInput, ...], "stik": StikContext}
+  stikledning  {"stikledning": StikInput}
+  projekt      {"stikledning": StikInput, "grupper": [GroupInput, ...]}
+               – grupperne regnes mod stikledningens resultat med trafo-
+               og Kj-data fra StikInput (som i hovedfanen)
+  jordfejl     {"grupper": [GroupInput, ...], "stik": StikContext,
+                "system": "TN"|"TT", "Ra": Ω, "U0": V, "kredse": {navn: [type, placering]}}
+               – se earth_fault; svarer med resultaterne og rcd_grupper
+  parallel     {"stikledning": StikInput, "n_max": 4, "laengder": [m, ...],
+                "X_mutual": Ω/km} – se parallel_cables; svarer med alle
+               gyldige designs og stikledningen regnet for det billigste
+  billigst     {"gruppe": GroupInput, "stik": StikContext, "priser": {...},
+                "materialer": [...], "metoder": [...], "n_samlet": n | [n, ...]}
+               – se design_search
+  iz           {"materiale", "ref", "ledere", "tvaersnit"}
+  sikring      {"fabrikat", "type", "In", "Ik"}
+  status       {}
+
+Alle beregningsmetoder tager også "spor": true (mellemregningerne som
+calc_trace-JSON) og "tekst": true (mellemregningerne som tekstlinjer).
+
+Et beregnet element svarer med {"resultat": ..., "fejl": null} eller
+{"resultat": null, "fejl": {"titel": ..., "besked": ...}}. Forkert input
+rejser ApiFejl (HTTP 400).
+"""
+
+from calc_trace import Trace
+import codec
+import design_search
+import earth_fault
+import parallel_cables
+from calculations import fuse_trip_time_explain, lookup_iz_xlpe
+from fuse_curves import get_fuse_data
+from group_engine import BeregningsFejl, beregn_alle_grupper, beregn_gruppe
+from records import GroupInput, StikContext, StikInput, from_dict
+from result_cache import ENGINE_VERSION
+from stik_engine import beregn_stikledning
+
+
+class ApiFejl(Exception):
+    """Ugyldig forespørgsel (ukendt metode, manglende eller forkerte felter)."""
+
+
+# ---------------------------------------------------------------------------
+# Hjælpere
+# ---------------------------------------------------------------------------
+
+
+def _record(cls, data, felt: str):
+    if not isinstance(data, dict):
+        raise ApiFejl(f"'{felt}' skal være et objekt.")
+    try:
+        return from_dict(cls, data)
+    except KeyError as exc:
+        raise ApiFejl(f"'{felt}' mangler feltet {exc.args[0]!r}.")
+    except (TypeError, ValueError) as exc:
+        raise ApiFejl(f"'{felt}' er ugyldigt: {exc}")
+
+
+def _param(params, felt: str):
+    try:
+        return params[felt]
+    except KeyError:
+        raise ApiFejl(f"Mangler '{felt}'.")
+
+
+def _svar(res, err, trace: Trace, params) -> dict:
+    out = {
+        "resultat": codec.to_jsonable(res) if res is not None else None,
+        "fejl": {"titel": err[0], "besked": err[1]} if err is not None else None,
+    }
+    if params.get("spor"):
+        out["spor"] = trace.to_jsonable()
+    if params.get("tekst"):
+        out["tekst"] = trace.lines()
+    return out
+
+
+def _vil_have_spor(params) -> bool:
+    return bool(params.get("spor") or params.get("tekst"))
+
+
+def _beregn(func, rec, params):
+    """Kører én beregning og samler fejl op som i group_engine._beregn_en."""
+    trace = Trace()
+    try:
+        res = func(rec, trace if _vil_have_spor(params) else None)
+        return res, _svar(res, None, trace, params)
+    except BeregningsFejl as exc:
+        return None, _svar(None, (exc.titel, exc.besked), trace, params)
+    except Exception as exc:  # som _beregn_en: uventet fejl i beregningen
+        err = ("Beregning – fejl", f"{type(exc).__name__}: {exc}")
+        return None, _svar(None, err, trace, params)
+
+
+def _grupper(groups, stik, params):
+    groups = [
+        _record(GroupInput, g, f"grupper[{i}]") for i, g in enumerate(groups)
+    ]
+    # Ingen procespulje her – transporten fordeler selv forespørgslerne
+    results = beregn_alle_grupper(
+        groups, stik, workers=1, with_log=_vil_have_spor(params)
+    )
+    return [_svar(res, err, trace, params) for res, err, trace in results]
+
+
+# ---------------------------------------------------------------------------
+# Metoder
+# ---------------------------------------------------------------------------
+
+
+def _m_gruppe(params):
+    grp = _record(GroupInput, _param(params, "gruppe"), "gruppe")
+    stik = _record(StikContext, _param(params, "stik"), "stik")
+    _, svar = _beregn(
+        lambda g, tr: beregn_gruppe(g, stik, trace=tr), grp, params
+    )
+    return svar
+
+
+def _m_grupper(params):
+    groups = _param(params, "grupper")
+    if not isinstance(groups, list):
+        raise ApiFejl("'grupper' skal være en liste.")
+    stik = _record(StikContext, _param(params, "stik"), "stik")
+    return {"grupper": _grupper(groups, stik, params)}
+
+
+def _m_stikledning(params):
+    inp = _record(StikInput, _param(params, "stikledning"), "stikledning")
+    _, svar = _beregn(
+        lambda i, tr: beregn_stikledning(i, trace=tr), inp, params
+    )
+    return svar
+
+
+def _m_projekt(params):
+    inp = _record(StikInput, _param(params, "stikledning"), "stikledning")
+    groups = _param(params, "grupper")
+    if not isinstance(groups, list):
+        raise ApiFejl("'grupper' skal være en liste.")
+    res, stik_svar = _beregn(
+        lambda i, tr: beregn_stikledning(i, trace=tr), inp, params
+    )
+    if res is None:
+        return {"stikledning": stik_svar, "grupper": None}
+    stik = res.context(inp.Ik_trafo, inp.cos_trafo, inp.Kj_jord)
+    return {
+        "stikledning": stik_svar,
+        "stik": codec.to_jsonable(stik),
+        "grupper": _grupper(groups, stik, params),
+    }
+
+
+def _m_jordfejl(params):
+    groups = _param(params, "grupper")
+    if not isinstance(groups, list):
+        raise ApiFejl("'grupper' skal være en liste.")
+    groups = [
+        _record(GroupInput, g, f"grupper[{i}]") for i, g in enumerate(groups)
+    ]
+    stik = _record(StikContext, _param(params, "stik"), "stik")
+    try:
+        results = earth_fault.beregn_jordfejl(
+            groups,
+            stik,
+            system=str(params.get("system", "TN")),
+            Ra=float(params.get("Ra", 0.0)),
+            U0=float(params.get("U0", earth_fault.U0_DEFAULT)),
+            kredse=params.get("kredse"),
+        )
+    except (TypeError, ValueError) as exc:
+        raise ApiFejl(f"Ugyldig jordfejlsforespørgsel: {exc}")
+    return {
+        "resultater": codec.to_jsonable(results),
+        "rcd_grupper": earth_fault.rcd_grupper(results),
+    }
+
+
+def _m_parallel(params):
+    inp = _record(StikInput, _param(params, "stikledning"), "stikledning")
+    try:
+        n_max = int(params.get("n_max", parallel_cables.N_MAX_DEFAULT))
+        lengths = params.get("laengder")
+        if lengths is not None:
+            lengths = [float(L) for L in lengths]
+        X_mutual = float(params.get("X_mutual", 0.0))
+    except (TypeError, ValueError) as exc:
+        raise ApiFejl(f"Ugyldig parallel-forespørgsel: {exc}")
+    try:
+        designs = parallel_cables.dimensioner(inp, n_max, lengths, X_mutual)
+        res, advarsler = parallel_cables.beregn_parallel_stikledning(
+            inp, designs[0], X_mutual
+        )
+    except BeregningsFejl as exc:
+        return {
+            "designs": [],
+            "resultat": None,
+            "fejl": {"titel": exc.titel, "besked": exc.besked},
+        }
+    stik = parallel_cables.parallel_context(
+        res, designs[0], inp.Ik_trafo, inp.cos_trafo, inp.Kj_jord
+    )
+    return {
+        "designs": codec.to_jsonable(designs),
+        "resultat": codec.to_jsonable(res),
+        "stik": codec.to_jsonable(stik),
+        "advarsler": advarsler,
+        "fejl": None,
+    }
+
+
+def _m_billigst(params):
+    grp = _record(GroupInput, _param(params, "gruppe"), "gruppe")
+    stik = _record(StikContext, _param(params, "stik"), "stik")
+    costs = params.get("priser")
+    if costs is not None:
+        try:
+            costs = {
+                "kabel": {
+                    m: {float(S): float(p) for S, p in row.items()}
+                    for m, row in costs["kabel"].items()
+                },
+                "montage": {r: float(p) for r, p in costs["montage"].items()},
+            }
+        except (KeyError, AttributeError, TypeError, ValueError) as exc:
+            raise ApiFejl(f"Ugyldig pristabel: {exc}")
+    try:
+        best, stats = design_search.find_cheapest(
+            grp,
+            stik,
+            costs,
+            params.get("materialer", design_search.MATERIALS),
+            params.get("metoder"),
+            params.get("n_samlet"),
+        )
+    except BeregningsFejl as exc:
+        return {"design": None, "fejl": {"titel": exc.titel, "besked": exc.besked}}
+    except (KeyError, ValueError) as exc:
+        raise ApiFejl(f"Ukendt materiale eller metode: {exc}")
+    return {
+        "design": codec.to_jsonable(best) if best is not None else None,
+        "statistik": stats,
+        "fejl": None,
+    }
+
+
+def _m_iz(params):
+    try:
+        iz = lookup_iz_xlpe(
+            str(_param(params, "materiale")),
+            str(_param(params, "ref")),
+            int(_param(params, "ledere")),
+            float(_param(params, "tvaersnit")),
+        )
+    except (KeyError, TypeError, ValueError) as exc:
+        raise ApiFejl(f"Ugyldigt Iz-opslag: {exc}")
+    return {"Iz": iz}
+
+
+def _m_sikring(params):
+    try:
+        curve, In_curve, Imin_factor = get_fuse_data(
+            str(_param(params, "fabrikat")),
+            str(_param(params, "type")),
+            float(_param(params, "In")),
+        )
+        Ik = float(_param(params, "Ik"))
+    except (KeyError, TypeError, ValueError) as exc:
+        raise ApiFejl(f"Ukendt sikring: {exc}")
+    t, tekst = fuse_trip_time_explain(In_curve, Ik, curve)
+    return {"t": t, "In_kurve": In_curve, "Imin_factor": Imin_factor, "tekst": tekst}
+
+
+def _m_status(params):
+    return {"engine_version": ENGINE_VERSION, "metoder": sorted(METHODS)}
+
+
+METHODS = {
+    "gruppe": _m_gruppe,
+    "grupper": _m_grupper,
+    "stikledning": _m_stikledning,
+    "projekt": _m_projekt,
+    "jordfejl": _m_jordfejl,
+    "parallel": _m_parallel,
+    "billigst": _m_billigst,
+    "iz": _m_iz,
+    "sikring": _m_sikring,
+    "status": _m_status,
+}
+
+
+def handle(method: str, params: dict) -> dict:
+    """Udfører én forespørgsel. Rejser ApiFejl ved ugyldig forespørgsel."""
+    func = METHODS.get(method)
+    if func is None:
+        raise ApiFejl(f"Ukendt metode: {method!r}")
+    if not isinstance(params, dict):
+        raise ApiFejl("Forespørgslen skal være et JSON-objekt.")
+    return func(params)
+
+
+def handle_json(method: str, body: str):
+    """
+    JSON-tekst ind, (status, JSON-tekst) ud – hele arbejdet inkl. parsing
+    sker her, så det kan lægges ud på en procespulje.
+    status er 200, 400 (ApiFejl/ugyldig JSON) eller 500 (uventet fejl).
+    """
+    try:
+        params = codec.loads(body) if body.strip() else {}
+    except ValueError as exc:
+        return 400, fejl_json("Forespørgsel", f"Ugyldig JSON: {exc}")
+    try:
+        return 200, codec.dumps(handle(method, params))
+    except ApiFejl as exc:
+        return 400, fejl_json("Forespørgsel", str(exc))
+    except Exception as exc:  # uventet fejl må ikke vælte serveren
+        return 500, fejl_json("Serverfejl", f"{type(exc).__name__}: {exc}")
+
+
+def fejl_json(titel: str, besked: str) -> str:
+    return codec.dumps({"fejl": {"titel": titel, "besked": besked}})
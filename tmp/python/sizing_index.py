@@ -0,0 +1,211 @@
+"""
+Omvendt Iz-indeks: mindste tværsnit for en krævet strøm – og tabeller
+over det til udskrift.
+
+Auto-tværsnit (group_engine, stik_engine, du_budget) spørger for hvert
+segment: hvilket er det mindste tværsnit med Iz·Kt·Kj·kgrp ≥ In? For
+hver (materiale, ref-metode, ledere) ligger Iz over STANDARD_SIZES i
+calculations.IZ_COMPILED; her gemmes det løbende maksimum af den kolonne,
+så svaret er én bisect:
+
+    første S med Iz(S) ≥ Iz,nød  =  første S med max(Iz(S' ≤ S)) ≥ Iz,nød
+
+(gælder også hvis en tabel ikke er monoton). Auto-tværsnit starter så
+ved det største af segmenternes mindste tværsnit i stedet for ved det
+mindste kandidattværsnit; de almindelige kontroller kører stadig for
+hvert afprøvet tværsnit. Med mellemregninger slået til gennemløbes alle
+kandidater som før, så loggen er uændret.
+
+Indekset kan skrives som tabeller (In → mindste tværsnit pr.
+ref-metode ved en given samlet korrektionsfaktor Kt·Kj·kgrp):
+
+    python sizing_index.py [ud.pdf|ud.csv] [korrektionsfaktor]
+"""
+
+import csv
+from array import array
+from bisect import bisect_left
+
+from calculations import IZ_COMPILED, STANDARD_SIZES, kj_for_segment
+from fuse_curves import FUSE_DB
+
+# Relativ margin på Iz,nød, så afrunding i In/(Kt·Kj·kgrp) aldrig springer
+# et tværsnit over som den nøjagtige kontrol (In ≤ Iz·Kt·Kj·kgrp) godkender
+_TOL = 1e-9
+
+
+def _build_index():
+    """(materiale, ref, ledere) -> løbende maksimum af Iz over STANDARD_SIZES."""
+    index = {}
+    for key, row in IZ_COMPILED.items():
+        running = 0.0
+        out = array("d", bytes(8 * len(row)))
+        for i, iz in enumerate(row):
+            if iz == iz and iz > running:  # NaN (ingen data) tæller som 0
+                running = iz
+            out[i] = running
+        index[key] = out
+    return index
+
+
+IZ_INDEX = _build_index()
+
+
+def min_size_index(material: str, ref: str, cores: int, Iz_nod: float) -> int:
+    """
+    Indeks i STANDARD_SIZES for det mindste tværsnit med Iz ≥ Iz_nod
+    (len(STANDARD_SIZES) hvis intet, 0 hvis der ikke er data – så
+    kaldet selv afgør det ved opslag).
+    """
+    col = IZ_INDEX.get(("Cu" if material == "Cu" else "Al", ref, cores))
+    if col is None:
+        return 0
+    return bisect_left(col, Iz_nod * (1.0 - _TOL))
+
+
+def min_size(material: str, ref: str, cores: int, Iz_nod: float):
+    """Mindste standardtværsnit med Iz ≥ Iz_nod, eller None."""
+    col = IZ_INDEX.get(("Cu" if material == "Cu" else "Al", ref, cores))
+    if col is None:
+        return None
+    i = bisect_left(col, Iz_nod * (1.0 - _TOL))
+    return STANDARD_SIZES[i] if i < len(STANDARD_SIZES) else None
+
+
+def start_index(candidate_sizes, material: str, segments, In: float,
+                Kj_jord: float, potens: int = 1) -> int:
+    """
+    Første indeks i candidate_sizes der kan klare Iz i alle segmenter
+    (mindre tværsnit fejler med sikkerhed). len(candidate_sizes) hvis
+    intet standardtværsnit kan.
+
+    potens: kravet er Iz ≥ In / (Kt·Kj·kgrp)^potens. group_engine og
+    du_budget bruger 1 (In ≤ Iz·k); stik_engine sammenligner Iz·k med
+    In/k og bruger derfor 2.
+    """
+    i_max = 0
+    for s in segments:
+        ref = s.ref_method.label
+        derate = s.Kt * kj_for_segment(ref, Kj_jord) * s.kgrp
+        if derate <= 0:
+            continue
+        i = min_size_index(material, ref, s.cores, In / derate ** potens)
+        if i >= len(STANDARD_SIZES):
+            return len(candidate_sizes)
+        if i > i_max:
+            i_max = i
+    return bisect_left(candidate_sizes, STANDARD_SIZES[i_max])
+
+
+# ---------------------------------------------------------------------------
+# Tabeller til udskrift
+# ---------------------------------------------------------------------------
+
+
+def default_currents(max_In: float = 400.0):
+    """Alle sikringsstørrelser i FUSE_DB op til max_In."""
+    sizes = set()
+    for data in FUSE_DB.values():
+        sizes.update(data["curves"])
+    return sorted(float(In) for In in sizes if In <= max_In)
+
+
+def chart(material: str, cores: int, derating: float = 1.0, currents=None,
+          refs=None) -> dict:
+    """
+    In → mindste tværsnit pr. ref-metode ved korrektionsfaktoren derating
+    (= Kt·Kj·kgrp), dvs. Iz,nød = In / derating.
+
+    Returnerer {"material", "cores", "derating", "refs", "rows"}, hvor
+    rows er dicts {"In", "Iz_nod", ref: tværsnit | None, ...}.
+    """
+    mat = "Cu" if material == "Cu" else "Al"
+    if refs is None:
+        refs = [ref for (m, ref, c) in IZ_INDEX if m == mat and c == cores]
+    if currents is None:
+        currents = default_currents()
+    rows = []
+    for In in currents:
+        Iz_nod = In / derating
+        row = {"In": In, "Iz_nod": Iz_nod}
+        for ref in refs:
+            row[ref] = min_size(mat, ref, cores, Iz_nod)
+        rows.append(row)
+    return {"material": mat, "cores": cores, "derating": derating,
+            "refs": list(refs), "rows": rows}
+
+
+def _fmt_sq(sq) -> str:
+    if sq is None:
+        return "–"
+    return f"{sq:g}"
+
+
+def chart_lines(ch: dict):
+    """Tabellen som tekstlinjer (fast bredde, til PDF/skærm)."""
+    refs = ch["refs"]
+    lines = [
+        f"Mindste tværsnit [mm²] – {ch['material']}, {ch['cores']} belastede "
+        f"ledere, Kt·Kj·kgrp = {ch['derating']:.2f}",
+        "",
+        f"{'In [A]':>7} {'Iz,nød':>8}  " + " ".join(f"{r:>6}" for r in refs),
+        "-" * (18 + 7 * len(refs)),
+    ]
+    for row in ch["rows"]:
+        if all(row[r] is None for r in refs):
+            continue
+        lines.append(
+            f"{row['In']:>7g} {row['Iz_nod']:>8.1f}  "
+            + " ".join(f"{_fmt_sq(row[r]):>6}" for r in refs)
+        )
+    lines.append("")
+    lines.append("– : intet standardtværsnit har Iz ≥ Iz,nød for metoden.")
+    return lines
+
+
+def write_chart_csv(charts, path: str):
+    """Tabellerne som CSV (semikolon-separeret, én række pr. In og metode)."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(["material", "cores", "derating", "In", "Iz_nod",
+                         "ref_method", "sq"])
+        for ch in charts:
+            for row in ch["rows"]:
+                for ref in ch["refs"]:
+                    writer.writerow([
+                        ch["material"], ch["cores"], ch["derating"], row["In"],
+                        round(row["Iz_nod"], 3), ref,
+                        "" if row[ref] is None else row[ref],
+                    ])
+
+
+def write_chart_pdf(charts, path: str):
+    """Tabellerne som A4-PDF (én tabel pr. side) via report_export.write_pdf."""
+    from report_export import LINES_PER_PAGE, write_pdf
+
+    lines = []
+    for ch in charts:
+        page = chart_lines(ch)
+        lines.extend(page)
+        # fyld siden ud, så næste tabel starter øverst
+        rest = (-len(lines)) % LINES_PER_PAGE
+        lines.extend([""] * rest)
+    write_pdf(path, lines, title="Dimensioneringstabeller")
+
+
+def standard_charts(derating: float = 1.0):
+    """Cu/Al × 2/3 belastede ledere."""
+    return [chart(m, c, derating) for m in ("Cu", "Al") for c in (2, 3)]
+
+
+if __name__ == "__main__":
+    import sys
+
+    out = sys.argv[1] if len(sys.argv) > 1 else "dimensionering.pdf"
+    derating = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    charts = standard_charts(derating)
+    if out.lower().endswith(".csv"):
+        write_chart_csv(charts, out)
+    else:
+        write_chart_pdf(charts, out)
+    print(f"{len(charts)} tabeller skrevet til {out}")
@@ -0,0 +1,119 @@
+"""
+Langlivet beregnings-worker over stdin/stdout (newline-delimited JSON).
+
+    python stdio_worker.py [tråde]
+
+Til værktøjer der vil bruge beregningerne uden netværksport og uden at
+betale opstarten (import af Tabel, opbygning af INSTALL_METHODS osv.) for
+hver beregning.
+
+Protokol – én JSON-værdi pr. linje, UTF-8:
+
+  ind:  {"id": 17, "metode": "gruppe", "params": {...}}
+  ud:   {"id": 17, "ok": true, "svar": {...}}
+        {"id": 17, "ok": false, "fejl": {"titel": ..., "besked": ...}}
+
+Metoder og params er de samme som i service_api (gruppe, grupper,
+stikledning, projekt, jordfejl, parallel, billigst, iz, sikring,
+status). id kan være tal eller tekst og sendes uændret tilbage.
+
+Forespørgsler kan sendes i en lind strøm uden at vente på svar
+(pipelining). De behandles på en trådpulje, og svarene skrives så snart
+de er færdige – altså ikke nødvendigvis i samme rækkefølge som de blev
+sendt; brug id til at parre dem.
+
+Når workeren er klar, skrives {"id": null, "ok": true, "svar": {"klar":
+true, ...}}. Ved EOF på stdin færdiggøres de igangværende forespørgsler,
+og processen afslutter.
+"""
+
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import codec
+import service_api
+
+DEFAULT_THREADS = 4
+
+
+class StdioWorker:
+    """Læser forespørgsler fra en binær strøm og skriver svar til en anden."""
+
+    def __init__(self, inp, out, threads: int = DEFAULT_THREADS, pool=None):
+        self.inp = inp
+        self.out = out
+        # en delt pulje (fx fra daemon) lukkes ikke af workeren
+        self._own_pool = pool is None
+        if pool is None:
+            pool = ThreadPoolExecutor(
+                max_workers=max(1, threads), thread_name_prefix="stdio"
+            )
+        self.pool = pool
+        self._pending = set()
+        self._write_lock = threading.Lock()
+
+    def _write(self, obj):
+        data = (codec.dumps(obj) + "\n").encode("utf-8")
+        with self._write_lock:
+            self.out.write(data)
+            self.out.flush()
+
+    def _fejl(self, req_id, titel: str, besked: str):
+        self._write(
+            {"id": req_id, "ok": False, "fejl": {"titel": titel, "besked": besked}}
+        )
+
+    def _handle(self, method: str, params):
+        return service_api.handle(method, params)
+
+    def _run_one(self, req_id, method: str, params):
+        try:
+            svar = self._handle(method, params)
+        except service_api.ApiFejl as exc:
+            self._fejl(req_id, "Forespørgsel", str(exc))
+            return
+        except Exception as exc:  # uventet fejl må ikke stoppe workeren
+            self._fejl(req_id, "Serverfejl", f"{type(exc).__name__}: {exc}")
+            return
+        self._write({"id": req_id, "ok": True, "svar": svar})
+
+    def _submit(self, line: bytes):
+        try:
+            req = codec.loads(line.decode("utf-8"))
+        except (UnicodeDecodeError, ValueError) as exc:
+            self._fejl(None, "Forespørgsel", f"Ugyldig JSON: {exc}")
+            return
+        if not isinstance(req, dict):
+            self._fejl(None, "Forespørgsel", "Hver linje skal være et JSON-objekt.")
+            return
+        req_id = req.get("id")
+        method = req.get("metode")
+        if not isinstance(method, str):
+            self._fejl(req_id, "Forespørgsel", "Mangler 'metode'.")
+            return
+        fut = self.pool.submit(self._run_one, req_id, method, req.get("params", {}))
+        self._pending.add(fut)
+        fut.add_done_callback(self._pending.discard)
+
+    def run(self, hilsen: bool = True):
+        if hilsen:
+            status = service_api.handle("status", {})
+            self._write({"id": None, "ok": True, "svar": dict(status, klar=True)})
+        try:
+            for line in iter(self.inp.readline, b""):
+                if line.strip():
+                    self._submit(line)
+        finally:
+            if self._own_pool:
+                self.pool.shutdown(wait=True)
+            else:
+                wait(list(self._pending))
+
+
+def main(threads: int = DEFAULT_THREADS):
+    StdioWorker(sys.stdin.buffer, sys.stdout.buffer, threads).run()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_THREADS)
@@ -0,0 +1,351 @@
+"""
+Stikledningsberegning uden GUI.
+
+beregn_stikledning() indeholder beregningen fra beregn_stik() i Main.py,
+men arbejder på et øjebliksbillede af input (records.StikInput) i stedet
+for widgets. Fejl rejses som BeregningsFejl ligesom i group_engine, og
+mellemregningerne registreres som et spor (calc_trace) på samme måde.
+"""
+
+import math
+import cmath
+
+import calc_trace
+from calc_trace import Trace, no_trace
+from calculations import (
+    STANDARD_SIZES,
+    lookup_iz_xlpe,
+    cable_impedance_NKT,
+    ik_min_stik,
+    ik_max_stik,
+    thermal_ok,
+    voltage_drop_ds,
+    fuse_trip_time_explain,
+)
+from fuse_curves import get_fuse_data
+from group_engine import BeregningsFejl
+from records import StikInput, StikResult
+from sizing_index import start_index
+
+# Cu 1-faset: de tværsnit der bruges til stikledninger
+_SIZES_1FASET_CU = [2.5, 4.0, 6.0, 10.0, 16.0, 25.0, 35.0]
+
+
+def stik_candidate_sizes(material: str, phase: str):
+    """
+    Kandidattværsnit for auto-tværsnit af stikledningen (stigende).
+    Listen deles – kopiér den før den ændres.
+    """
+    if phase == "1-faset" and material == "Cu":
+        return _SIZES_1FASET_CU
+    return STANDARD_SIZES
+
+
+# ---------------------------------------------------------------------------
+# Tekster til mellemregningerne (se calc_trace)
+# ---------------------------------------------------------------------------
+
+
+def _tekst_ik(Z_w1_min, Z_w1_max, Ik_min_val, Ik_max_val):
+    return (
+        f"  Z_w1,min = {Z_w1_min.real:.5f} + j{Z_w1_min.imag:.5f} Ω (R_faktor=1,5)\n"
+        f"  Z_w1,max = {Z_w1_max.real:.5f} + j{Z_w1_max.imag:.5f} Ω (R_faktor=1,0)\n"
+        f"  Ik,min = {abs(Ik_min_val):.1f} A "
+        f"(vinkel {math.degrees(cmath.phase(complex(Ik_min_val))):.1f}°)\n"
+        f"  Ik,max = {abs(Ik_max_val):.1f} A "
+        f"(vinkel {math.degrees(cmath.phase(complex(Ik_max_val))):.1f}°)\n"
+    )
+
+
+calc_trace.register({
+    "stik.start": (
+        "=== Overordnede input – stikledning ===\n"
+        "In = {0:.2f} A\n"
+        "U_n = {1} V, fasesystem = {2}\n"
+        "Materiale = {3} (XLPE)\n"
+        "cos φ (last) = {4:.3f}\n"
+        "Kj jord (felt) = {5:.3f}\n"
+        "Maks. spændingsfald (stik) = {6:.2f} %\n"
+        "Automatisk tværsnit = {7}\n"
+        "Ik_min,forsyning = {8:.1f} A; Ik_trafo = {9:.1f} A, cos φ trafo = {10:.3f}\n"
+        "k (k²S², XLPE auto) = {11:.1f}\n"
+    ),
+    "stik.seg_start": "=== Segmentdata (stikledning) ===",
+    "stik.seg": (
+        "Segment {0}: L = {1:.1f} m, Ref-metode = {2}, Belastede ledere = {3}, "
+        "T_omg = {4} °C, s = {5} mm²"
+    ),
+    "stik.seg_sum": "Samlet længde stikledning = {0:.1f} m\n",
+    "stik.auto_start": "=== Auto tværsnit (Iz + ΔU_total) – stikledning ===",
+    "stik.auto_S": "Afprøver tværsnit S = {0:.1f} mm²:",
+    "stik.auto_mangler_iz": (
+        "  [ADVARSEL] Mangler Iz-data for {0}, ref {1}, {2} belastede, S={3:.1f} mm²."
+    ),
+    "stik.auto_seg": (
+        "  Segment {0}: Iz,tabel={1:.1f} A, Kt={2:.3f}, Kj={3:.3f}, kgrp={4:.3f} "
+        "⇒ Iz,korr={5:.1f} A, Iz,nød={6:.1f} A"
+    ),
+    "stik.auto_seg_ikke_ok": "    ⇒ Overbelastningsbeskyttelse IKKE OK i dette segment!",
+    "stik.auto_du": "  ΔU_stik for S = {0:.1f} mm²: {1:.2f} V ({2:.2f} %)",
+    "stik.auto_du_over": (
+        "    ⇒ Spændingsfaldet ({0:.2f} %) overskrider grænsen på {1:.2f} %."
+    ),
+    "stik.auto_du_ok": "    ⇒ Spændingsfaldet er OK ift. grænsen på {0:.2f} %.",
+    "stik.auto_ok": "⇒ Tværsnit S = {0:.1f} mm² er OK for alle segmenter.",
+    "stik.auto_ikke_ok": "⇒ Tværsnit S = {0:.1f} mm² er IKKE OK – prøver større.\n",
+    "stik.auto_valgt": "Valgt tværsnit for stikledning: {0:.1f} mm²\n",
+    "stik.manuel": (
+        "Auto tværsnit er slået FRA.\n"
+        "Bruger tværsnit fra første segment: S = {0:.1f} mm²\n"
+    ),
+    "stik.du_start": "=== Spændingsfald – stikledning ===",
+    "stik.du": "ΔU_stik = {0:.2f} V ({1:.2f} %) for S = {2:.1f} mm², L = {3:.1f} m",
+    "stik.du_ok": "⇒ Spændingsfaldet er inden for grænsen på {0:.2f} %.\n",
+    "stik.du_over": "⇒ Spændingsfaldet overskrider grænsen på {0:.2f} %!\n",
+    "stik.ik_start": "=== Kortslutningsstrømme – Ik,min og Ik,max ===",
+    "stik.ik": _tekst_ik,
+    "stik.termisk_start": "=== Termisk – k²·S² vs I²·t (stikledning) ===",
+    "stik.termisk": (
+        "  Ik,min for termisk check = {0:.1f} A\n"
+        "  t (fra sikringskurve) ≈ {1:.4f} s\n"
+        "  E_kabel = k²·S² = {2:.1f} A²·s\n"
+        "  E_bryde = I²·t = {3:.1f} A²·s\n"
+        "  Termisk OK? {4}\n"
+        "  Detaljer fra sikringskurve:\n"
+        "{5}\n"
+    ),
+})
+
+
+def beregn_stikledning(inp: StikInput, log=None, trace: Trace = None) -> StikResult:
+    """
+    Beregner stikledningen. Grupperne bruger resultatet via
+    StikResult.context().
+
+    Mellemregningerne registreres i trace hvis angivet; log(linje)
+    modtager dem som tekst (som beregn_gruppe).
+    """
+    if log is not None and trace is None:
+        trace = Trace()
+    if trace is None:
+        return _beregn_stikledning(inp, no_trace)
+
+    start = len(trace)
+    try:
+        return _beregn_stikledning(inp, trace.add)
+    finally:
+        if log is not None:
+            trace.replay(log, start)
+
+
+def _beregn_stikledning(inp: StikInput, t) -> StikResult:
+    In = inp.In
+    U_v = inp.U_v
+    phase = inp.phase.label
+    material = inp.material.label
+    cos_load = inp.cos_load
+    Kj_jord = inp.Kj_jord
+    du_max_pct = inp.du_max_pct
+    fuse_manu = inp.fuse_manu
+    fuse_type = inp.fuse_type
+    Ik_trafo = inp.Ik_trafo
+    I_min_supply = inp.I_min_supply
+    cos_trafo = inp.cos_trafo
+    k_val = inp.k_val
+    auto_size = inp.auto_size
+
+    t(
+        "stik.start", In, U_v, phase, material, cos_load, Kj_jord, du_max_pct,
+        "JA" if auto_size else "NEJ", I_min_supply, Ik_trafo, cos_trafo, k_val,
+    )
+
+    # Segment-data
+    segments = inp.segments
+    if not segments:
+        raise BeregningsFejl(
+            "Fejl", "Der skal være mindst ét segment i stikledningen."
+        )
+    total_len = sum(seg.length for seg in segments)
+
+    t("stik.seg_start")
+    for idx, seg in enumerate(segments, start=1):
+        t(
+            "stik.seg", idx, seg.length, seg.ref_method.label, seg.cores,
+            seg.temp, seg.area,
+        )
+    t("stik.seg_sum", total_len)
+
+    # Overbelastning / Iz
+    best_Iz_nod = 0.0
+    candidate_sizes = stik_candidate_sizes(material, phase)
+
+    sq = None
+    if auto_size:
+        t("stik.auto_start")
+        if t is no_trace:
+            # som i group_engine: Iz-indekset udelukker de mindste tværsnit
+            # (kontrollen nedenfor er Iz_korr ≥ Iz_nod, dvs. Iz ≥ In/k²)
+            candidate_sizes = candidate_sizes[
+                start_index(candidate_sizes, material, segments, In, Kj_jord, 2):
+            ]
+        for S in candidate_sizes:
+            ok_all = True
+            worst_Iz_nod_S = 0.0
+            t("stik.auto_S", S)
+
+            for idx, seg in enumerate(segments, start=1):
+                ref = seg.ref_method.label
+                n_belastede = seg.cores
+                Kt_seg = seg.Kt
+                kgrp_seg = seg.kgrp
+
+                Iz_tab = lookup_iz_xlpe(material, ref, n_belastede, S)
+                if Iz_tab is None:
+                    t("stik.auto_mangler_iz", material, ref, n_belastede, S)
+                    ok_all = False
+                    break
+
+                env_seg = "jord" if ref in ("D1", "D2") else "luft"
+                if ref == "D2":
+                    Kj_seg = 1.5
+                else:
+                    Kj_seg = Kj_jord if env_seg == "jord" else 1.0
+
+                Iz_korr = Iz_tab * Kt_seg * Kj_seg * kgrp_seg
+                Iz_nod = In / (Kt_seg * Kj_seg * kgrp_seg)
+
+                t(
+                    "stik.auto_seg", idx, Iz_tab, Kt_seg, Kj_seg, kgrp_seg, Iz_korr,
+                    Iz_nod,
+                )
+
+                if Iz_korr < Iz_nod:
+                    t("stik.auto_seg_ikke_ok")
+                    ok_all = False
+                    break
+
+                if Iz_nod > worst_Iz_nod_S:
+                    worst_Iz_nod_S = Iz_nod
+
+            if ok_all:
+                try:
+                    du_S, du_pct_S = voltage_drop_ds(
+                        U_v, In, material, S, total_len, phase, cos_load
+                    )
+                except KeyError:
+                    raise BeregningsFejl(
+                        "Kabeldata",
+                        "Der mangler kabeldata (R/X) for det valgte "
+                        "tværsnit/materiale.",
+                    )
+                t("stik.auto_du", S, du_S, du_pct_S)
+                if du_pct_S > du_max_pct:
+                    t("stik.auto_du_over", du_pct_S, du_max_pct)
+                    ok_all = False
+                else:
+                    t("stik.auto_du_ok", du_max_pct)
+
+            if ok_all:
+                t("stik.auto_ok", S)
+                sq = S
+                best_Iz_nod = worst_Iz_nod_S
+                break
+            else:
+                t("stik.auto_ikke_ok", S)
+
+        if sq is None:
+            raise BeregningsFejl(
+                "Overbelastning",
+                "Kunne ikke finde et tværsnit, der opfylder Iz- og ΔU-betingelserne.",
+            )
+
+        t("stik.auto_valgt", sq)
+    else:
+        sq = segments[0].area
+        t("stik.manuel", sq)
+
+    # Spændingsfald – DS-formel
+    t("stik.du_start")
+    try:
+        du, du_pct = voltage_drop_ds(U_v, In, material, sq, total_len, phase, cos_load)
+    except KeyError:
+        raise BeregningsFejl(
+            "Kabeldata",
+            "Der mangler kabeldata (R/X) for det valgte tværsnit/materiale.",
+        )
+
+    t("stik.du", du, du_pct, sq, total_len)
+    if du_pct <= du_max_pct:
+        t("stik.du_ok", du_max_pct)
+    else:
+        t("stik.du_over", du_max_pct)
+
+    # Kortslutningsstrømme
+    t("stik.ik_start")
+    try:
+        Z_w1_min = cable_impedance_NKT(
+            L_m=total_len, material=material, sq=sq, phase=phase, R_factor=1.5
+        )
+        Z_w1_max = cable_impedance_NKT(
+            L_m=total_len, material=material, sq=sq, phase=phase, R_factor=1.0
+        )
+    except KeyError:
+        raise BeregningsFejl(
+            "Kabeldata",
+            "Der mangler kabeldata (R/X) for det valgte tværsnit/materiale.",
+        )
+
+    Ik_min_val = ik_min_stik(U_v, I_min_supply, Z_w1_min)
+    Ik_max_val, Z_total_max = ik_max_stik(
+        U_v=U_v,
+        Ik_trafo=Ik_trafo,
+        cos_trafo=cos_trafo,
+        Z_kabel_max=Z_w1_max,
+    )
+
+    t("stik.ik", Z_w1_min, Z_w1_max, Ik_min_val, Ik_max_val)
+
+    # Termisk kontrol
+    t("stik.termisk_start")
+    Ik_for_fuse = abs(Ik_min_val)
+
+    try:
+        curve_points, In_curve, Imin_factor = get_fuse_data(fuse_manu, fuse_type, In)
+    except KeyError:
+        raise BeregningsFejl(
+            "Sikring",
+            "Kunne ikke finde sikringsdata for den valgte type.",
+        )
+
+    t_trip, fuse_text = fuse_trip_time_explain(In_curve, Ik_for_fuse, curve_points)
+
+    termisk_ok, E_kabel, E_bryde = thermal_ok(k_val, sq, Ik_for_fuse, t_trip)
+
+    t(
+        "stik.termisk", Ik_for_fuse, t_trip, E_kabel, E_bryde,
+        "JA" if termisk_ok else "NEJ", fuse_text,
+    )
+
+    return StikResult(
+        In=In,
+        U_v=U_v,
+        phase=inp.phase,
+        material=inp.material,
+        cos_load=cos_load,
+        Kj_jord=Kj_jord,
+        I_min_supply=I_min_supply,
+        sq=sq,
+        total_len=total_len,
+        best_Iz_nod=best_Iz_nod,
+        du=du,
+        du_pct=du_pct,
+        Z_w1_min=Z_w1_min,
+        Z_w1_max=Z_w1_max,
+        Ik_min_val=Ik_min_val,
+        Ik_max_val=Ik_max_val,
+        Ik_for_fuse=Ik_for_fuse,
+        t_trip=t_trip,
+        termisk_ok=termisk_ok,
+        E_kabel=E_kabel,
+        E_bryde=E_bryde,
+    )
@@ -0,0 +1,275 @@
+"""
+Parametriske sweeps (følsomhedsanalyser) for én gruppe.
+
+Gruppen beskrives af et fast design (materiale, fasesystem, reference-metode,
+stikledningsdata, sikring …), og der sweepes over et N-dimensionelt gitter af
+
+    T_amb, ks, In, cosphi, length, Ik_trafo
+
+For hvert gitterpunkt findes det mindste tværsnit der opfylder Iz og
+ΔU_total, samt ΔU_total, Ik,min, Ik,min-margin og Ik,max. Ik,min og
+marginen regnes på realdelen, som group_engines kontrol mod Imin_factor·In.
+
+Alt der kun afhænger af én akse (Kt pr. temperatur, kgrp pr. ks, Iz og
+impedans pr. tværsnit, ΔU-faktor pr. cosφ, Z_trafo pr. Ik_trafo) slås op
+én gang med de almindelige funktioner fra calculations.py. Selve gitteret
+gennemløbes derefter med ren aritmetik, så en million punkter tager få
+sekunder.
+"""
+
+import math
+from array import array
+from bisect import bisect_left
+
+from calculations import (
+    lookup_Kt,
+    lookup_kgrp,
+    lookup_iz_xlpe,
+    cable_impedance_NKT,
+    ik_max_stik,
+    kj_for_segment,
+    voltage_drop_ds,
+)
+from fuse_curves import FUSE_DB
+from group_engine import group_candidate_sizes
+
+# Aksernes rækkefølge i resultatet (C-orden: sidste akse varierer hurtigst)
+AXES = ("T_amb", "ks", "In", "cosphi", "length", "Ik_trafo")
+
+RESULT_FIELDS = ("sq", "du_tot_pct", "Ik_min", "Ik_margin", "Ik_max")
+
+DEFAULT_DESIGN = {
+    "U_v": 230,
+    "material": "Cu",
+    "phase": "3-faset",
+    "ref_method": "C",
+    "env": None,  # udledes af ref-metoden hvis None
+    "cores": 3,
+    "Kj_jord": 1.0,
+    "du_max_pct": 5.0,
+    "fuse_manu": "Standard",
+    "fuse_type": "Diazed gG",
+    "cos_trafo": 0.3,
+    # Stikledning (som stik_data i Main.py). Z_stik_* = None: regnes ud fra
+    # S_stik/L_stik som i stik_engine (R×1,5 for Ik,min, R×1,0 for Ik,max)
+    "mat_stik": "Cu",
+    "S_stik": 10.0,
+    "L_stik": 20.0,
+    "Z_stik_min": None,
+    "Z_stik_max": None,
+    "I_min_supply": 175.0,
+}
+
+
+# ---------------------------------------------------------------------------
+# Hjælpere
+# ---------------------------------------------------------------------------
+
+
+def grid_shape(grid: dict):
+    """Gitterets form i AXES-rækkefølge."""
+    return tuple(len(grid[a]) for a in AXES)
+
+
+# ---------------------------------------------------------------------------
+# Sweep
+# ---------------------------------------------------------------------------
+
+
+def _prepare(design: dict, grid: dict):
+    """Slår alle akse-afhængige størrelser op én gang."""
+    d = dict(DEFAULT_DESIGN)
+    d.update(design)
+
+    U_v = d["U_v"]
+    mat = d["material"]
+    phase = d["phase"]
+    ref = d["ref_method"]
+    env = d["env"] or ("jord" if ref in ("D1", "D2") else "luft")
+
+    # Tværsnit med både Iz- og R/X-data
+    sizes, iz_tab, z_min_m, z_max_m = [], [], [], []
+    for S in group_candidate_sizes(mat, phase):
+        iz = lookup_iz_xlpe(mat, ref, d["cores"], S)
+        if iz is None:
+            continue
+        try:
+            zmin = cable_impedance_NKT(1.0, mat, S, phase, R_factor=1.5)
+            zmax = cable_impedance_NKT(1.0, mat, S, phase, R_factor=1.0)
+        except KeyError:
+            continue
+        sizes.append(S)
+        iz_tab.append(iz)
+        z_min_m.append(zmin)
+        z_max_m.append(zmax)
+
+    # Iz er monoton i tværsnittet – løbende maksimum gør bisect sikker
+    iz_sorted = []
+    running = 0.0
+    for iz in iz_tab:
+        running = max(running, iz)
+        iz_sorted.append(running)
+
+    # ΔU [V] pr. (A·m) for hvert tværsnit og cosφ
+    du_k = []
+    du_k_stik = []
+    for cos in grid["cosphi"]:
+        du_k.append(
+            [voltage_drop_ds(U_v, 1.0, mat, S, 1.0, phase, cos)[0] for S in sizes]
+        )
+        du_k_stik.append(
+            voltage_drop_ds(
+                U_v, 1.0, d["mat_stik"], d["S_stik"], 1.0, phase, cos
+            )[0]
+        )
+
+    Z_trafo = [
+        ik_max_stik(U_v, Ik_trafo, d["cos_trafo"], 0j)[1]
+        for Ik_trafo in grid["Ik_trafo"]
+    ]
+
+    Imin_factor = FUSE_DB[(d["fuse_manu"], d["fuse_type"])].get("Imin_factor", 5.0)
+
+    return {
+        "d": d,
+        "sizes": sizes,
+        "iz_sorted": iz_sorted,
+        "z_min_m": z_min_m,
+        "z_max_m": z_max_m,
+        "du_k": du_k,
+        "du_k_stik": du_k_stik,
+        "Z_trafo": Z_trafo,
+        "Kt": [lookup_Kt(env, T) for T in grid["T_amb"]],
+        "kgrp": [lookup_kgrp(ref, int(n)) for n in grid["ks"]],
+        "Kj": kj_for_segment(ref, d["Kj_jord"]),
+        "Imin_factor": Imin_factor,
+    }
+
+
+def run_sweep(design: dict, grid: dict) -> dict:
+    """
+    Kører sweepet.
+
+    design: overskrivninger af DEFAULT_DESIGN
+    grid:   dict med en liste af værdier for hver akse i AXES
+
+    Returnerer {"axes", "shape", <felt>: array('d')} hvor hvert felt i
+    RESULT_FIELDS er et fladt array i C-orden. Punkter uden gyldigt
+    tværsnit får NaN.
+    """
+    p = _prepare(design, grid)
+    d = p["d"]
+    U_v = d["U_v"]
+    du_lim = d["du_max_pct"] / 100.0 * U_v
+    L_stik = d["L_stik"]
+    Z_sup_min = U_v / d["I_min_supply"]
+    Z_stik_min = d["Z_stik_min"]
+    if Z_stik_min is None:
+        Z_stik_min = cable_impedance_NKT(
+            L_stik, d["mat_stik"], d["S_stik"], d["phase"], R_factor=1.5
+        )
+    Z_stik_max = d["Z_stik_max"]
+    if Z_stik_max is None:
+        Z_stik_max = cable_impedance_NKT(
+            L_stik, d["mat_stik"], d["S_stik"], d["phase"], R_factor=1.0
+        )
+
+    sizes = p["sizes"]
+    n_sizes = len(sizes)
+    iz_sorted = p["iz_sorted"]
+    z_min_m = p["z_min_m"]
+    z_max_m = p["z_max_m"]
+    Z_trafo = p["Z_trafo"]
+    Imin_factor = p["Imin_factor"]
+    Kj = p["Kj"]
+
+    lengths = list(grid["length"])
+    In_values = list(grid["In"])
+    nan = math.nan
+
+    out = {f: array("d") for f in RESULT_FIELDS}
+    out_sq = out["sq"]
+    out_du = out["du_tot_pct"]
+    out_ikmin = out["Ik_min"]
+    out_margin = out["Ik_margin"]
+    out_ikmax = out["Ik_max"]
+    n_trafo = len(Z_trafo)
+    nan_block = [nan] * n_trafo
+
+    for Kt in p["Kt"]:
+        for kgrp in p["kgrp"]:
+            derate = Kt * Kj * kgrp
+            for In in In_values:
+                # Mindste tværsnit der opfylder Iz,korr ≥ In
+                i0 = bisect_left(iz_sorted, In / derate) if derate > 0 else n_sizes
+                Ik_req = Imin_factor * In
+                for ci in range(len(p["du_k_stik"])):
+                    du_k = p["du_k"][ci]
+                    du_stik = In * L_stik * p["du_k_stik"][ci]
+                    for L in lengths:
+                        # Første tværsnit fra i0 der også holder ΔU_total
+                        i = i0
+                        while i < n_sizes and In * L * du_k[i] + du_stik > du_lim:
+                            i += 1
+                        if i >= n_sizes:
+                            out_sq.extend(nan_block)
+                            out_du.extend(nan_block)
+                            out_ikmin.extend(nan_block)
+                            out_margin.extend(nan_block)
+                            out_ikmax.extend(nan_block)
+                            continue
+
+                        du_pct = (In * L * du_k[i] + du_stik) / U_v * 100.0
+                        Ik_min = (
+                            U_v / (Z_sup_min + 2 * (Z_stik_min + L * z_min_m[i]))
+                        ).real
+                        Z_kabel_max = Z_stik_max + L * z_max_m[i]
+                        S = sizes[i]
+                        margin = Ik_min / Ik_req
+                        for Z_t in Z_trafo:
+                            out_sq.append(S)
+                            out_du.append(du_pct)
+                            out_ikmin.append(Ik_min)
+                            out_margin.append(margin)
+                            out_ikmax.append(abs(U_v / (Z_t + Z_kabel_max)))
+
+    out["axes"] = {a: list(grid[a]) for a in AXES}
+    out["shape"] = grid_shape(grid)
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Udtræk til heatmaps
+# ---------------------------------------------------------------------------
+
+
+def flat_index(shape, idx):
+    """Fladt indeks (C-orden) for et tuple af akse-indekser."""
+    flat = 0
+    for n, i in zip(shape, idx):
+        flat = flat * n + i
+    return flat
+
+
+def slice_2d(result: dict, field: str, y_axis: str, x_axis: str, **fixed):
+    """
+    Udtrækker et 2D-udsnit (liste af rækker) til et heatmap.
+
+    fixed angiver indeks for de øvrige akser, fx slice_2d(r, "sq",
+    "length", "In", T_amb=2). Ikke-angivne akser får indeks 0.
+    """
+    shape = result["shape"]
+    values = result[field]
+    base = [fixed.get(a, 0) for a in AXES]
+    yi = AXES.index(y_axis)
+    xi = AXES.index(x_axis)
+
+    rows = []
+    for y in range(shape[yi]):
+        row = []
+        for x in range(shape[xi]):
+            base[yi] = y
+            base[xi] = x
+            row.append(values[flat_index(shape, base)])
+        rows.append(row)
+    return rows
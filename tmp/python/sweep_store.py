@@ -0,0 +1,465 @@
+"""
+Sweeps og Monte Carlo der skrives direkte til disk (.npy + manifest).
+
+run_sweep og run_monte_carlo holder hele resultatet i hukommelsen. Til
+studier med 10^8 punkter deles inputtet her i bidder; hver bid regnes med
+de almindelige funktioner (sweep.run_sweep på et del-gitter,
+monte_carlo.run_chunk) og skrives straks på sin plads i én .npy-fil pr.
+felt. Hukommelsen er derfor bestemt af bidstørrelsen, ikke af studiet.
+
+Mappen indeholder
+
+    manifest.json   parametre, form, dtype, bidstørrelse og færdige bidder
+    <felt>.npy      ét fladt/N-dimensionelt array pr. resultatfelt
+
+.npy-filerne er almindelige NumPy-filer (version 1.0, C-orden), så de kan
+åbnes med numpy.load(..., mmap_mode="r") hvor NumPy findes; aabn() giver
+memoryviews over en mmap uden NumPy. dtype "f4" halverer pladsen.
+
+En bid markeres først som færdig i manifestet, når dens data er skrevet
+og fsync'et. Afbrydes kørslen, fortsætter et nyt kald med samme mappe og
+parametre fra de manglende bidder; andre parametre giver StudieFejl.
+
+Sweep-bidderne er blokke af det C-ordnede gitter: de første akser ligger
+fast, og resten (højst chunk_points punkter) regnes samlet, så hver blok
+er et sammenhængende stykke af filerne. Monte Carlo bruger monte_carlos
+egne hjælpere til case, bidder/seeds og opsummering, så resultaterne er
+de samme som fra run_monte_carlo.
+"""
+
+import ast
+import math
+import mmap
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+import codec
+import monte_carlo
+import sweep
+
+MANIFEST = "manifest.json"
+VERSION = 1
+
+DTYPES = {"f8": ("d", "<f8"), "f4": ("f", "<f4")}
+
+# Standard antal punkter pr. sweep-blok
+DEFAULT_CHUNK_POINTS = 1_000_000
+
+# Antal bokse i histogrammet til percentilerne (to gennemløb af filen)
+_HIST_BINS = 1 << 16
+
+MC_FIELDS = ("Ik_min",)
+
+
+class StudieFejl(ValueError):
+    """Mappen indeholder en anden studie, eller filerne passer ikke til manifestet."""
+
+
+# ---------------------------------------------------------------------------
+# .npy-filer
+# ---------------------------------------------------------------------------
+
+
+def _npy_header(descr: str, shape) -> bytes:
+    shape_txt = ", ".join(map(str, shape)) + ("," if len(shape) == 1 else "")
+    d = f"{{'descr': '{descr}', 'fortran_order': False, 'shape': ({shape_txt}), }}"
+    # magic(6) + version(2) + længde(2) + dict + polstring + \n, delelig med 64
+    pad = 64 - (10 + len(d) + 1) % 64
+    if pad == 64:
+        pad = 0
+    d = d + " " * pad + "\n"
+    return b"\x93NUMPY\x01\x00" + len(d).to_bytes(2, "little") + d.encode("latin-1")
+
+
+def _read_npy_header(f):
+    """(descr, shape, offset til data)."""
+    magic = f.read(10)
+    if magic[:6] != b"\x93NUMPY" or magic[6:8] != b"\x01\x00":
+        raise StudieFejl("Ikke en .npy-fil (version 1.0).")
+    n = int.from_bytes(magic[8:10], "little")
+    d = ast.literal_eval(f.read(n).decode("latin-1"))
+    return d["descr"], tuple(d["shape"]), 10 + n
+
+
+def _create_npy(path: str, descr: str, shape):
+    """Opretter filen i fuld størrelse (sparse) med header."""
+    head = _npy_header(descr, shape)
+    n = math.prod(shape)
+    with open(path, "wb") as f:
+        f.write(head)
+        f.truncate(len(head) + n * int(descr[-1]))
+
+
+class _Skriver:
+    """Skriver bidder på deres plads i én .npy-fil."""
+
+    def __init__(self, path: str, typecode: str):
+        self.f = open(path, "r+b")
+        _, _, self.offset = _read_npy_header(self.f)
+        self.typecode = typecode
+        self.itemsize = array(typecode).itemsize
+
+    def write(self, start: int, values):
+        if not isinstance(values, array) or values.typecode != self.typecode:
+            values = array(self.typecode, values)
+        self.f.seek(self.offset + start * self.itemsize)
+        self.f.write(memoryview(values).cast("B"))
+
+    def sync(self):
+        self.f.flush()
+        os.fsync(self.f.fileno())
+
+    def close(self):
+        self.f.close()
+
+
+# ---------------------------------------------------------------------------
+# Manifest
+# ---------------------------------------------------------------------------
+
+
+def _write_manifest(mappe: str, manifest: dict):
+    tmp = os.path.join(mappe, MANIFEST + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(codec.dumps(manifest))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(mappe, MANIFEST))
+
+
+def laes_manifest(mappe: str) -> dict:
+    with open(os.path.join(mappe, MANIFEST), encoding="utf-8") as f:
+        return codec.loads(f.read())
+
+
+def _start(mappe: str, art: str, params: dict, fields, shape, dtype: str,
+           chunk_size: int, n_chunks: int) -> dict:
+    """Nyt manifest, eller det eksisterende hvis det er samme studie."""
+    if dtype not in DTYPES:
+        raise StudieFejl(f"Ukendt dtype: {dtype!r} (brug 'f8' eller 'f4').")
+    os.makedirs(mappe, exist_ok=True)
+    ny = {
+        "version": VERSION,
+        "art": art,
+        "params": params,
+        "shape": list(shape),
+        "fields": {f: f + ".npy" for f in fields},
+        "dtype": dtype,
+        "chunk_size": chunk_size,
+        "n_chunks": n_chunks,
+    }
+    if os.path.exists(os.path.join(mappe, MANIFEST)):
+        gammel = laes_manifest(mappe)
+        done = gammel.pop("done", [])
+        stats = gammel.pop("stats", {})
+        if codec.dumps(gammel) != codec.dumps(codec.loads(codec.dumps(ny))):
+            raise StudieFejl(
+                f"{mappe} indeholder en anden studie (andre parametre, dtype "
+                "eller bidstørrelse)."
+            )
+        gammel.update(done=done, stats=stats)
+        return gammel
+
+    descr = DTYPES[dtype][1]
+    for f in fields:
+        _create_npy(os.path.join(mappe, f + ".npy"), descr, shape)
+    ny["done"] = []
+    ny["stats"] = {}
+    _write_manifest(mappe, ny)
+    return ny
+
+
+def _run_chunks(mappe: str, manifest: dict, tasks, func, workers, store):
+    """
+    Kører de manglende bidder og skriver dem. tasks(bid) giver
+    argumenterne til func; store(skrivere, bid, resultat) skriver én bid og
+    returnerer dens statistik (eller None).
+    """
+    typecode = DTYPES[manifest["dtype"]][0]
+    writers = {
+        name: _Skriver(os.path.join(mappe, fil), typecode)
+        for name, fil in manifest["fields"].items()
+    }
+    done = set(manifest["done"])
+    todo = [i for i in range(manifest["n_chunks"]) if i not in done]
+
+    def finish(i, result):
+        stat = store(writers, i, result)
+        for w in writers.values():
+            w.sync()
+        done.add(i)
+        manifest["done"] = sorted(done)
+        if stat is not None:
+            manifest["stats"][str(i)] = stat
+        _write_manifest(mappe, manifest)
+
+    try:
+        if workers is not None and workers > 1 and len(todo) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # højst 2·workers bidder undervejs – holder hukommelsen fast
+                window = 2 * workers
+                pending = {}
+                it = iter(todo)
+                for i in it:
+                    pending[i] = pool.submit(func, *tasks(i))
+                    if len(pending) >= window:
+                        break
+                while pending:
+                    i = min(pending)
+                    finish(i, pending.pop(i).result())
+                    nxt = next(it, None)
+                    if nxt is not None:
+                        pending[nxt] = pool.submit(func, *tasks(nxt))
+        else:
+            for i in todo:
+                finish(i, func(*tasks(i)))
+    finally:
+        for w in writers.values():
+            w.close()
+    return manifest
+
+
+# ---------------------------------------------------------------------------
+# Sweep
+# ---------------------------------------------------------------------------
+
+
+def _blocks(shape, chunk_points: int):
+    """(antal faste førsteakser, punkter pr. blok)."""
+    k = 0
+    while k < len(shape) - 1 and math.prod(shape[k:]) > chunk_points:
+        k += 1
+    return k, math.prod(shape[k:])
+
+
+def _sub_grid(grid: dict, shape, k: int, block: int) -> dict:
+    """Del-gitteret for blok nr. block (de første k akser ligger fast)."""
+    sub = {a: list(grid[a]) for a in sweep.AXES}
+    idx = []
+    for n in reversed(shape[:k]):
+        idx.append(block % n)
+        block //= n
+    for a, i in zip(sweep.AXES[:k], reversed(idx)):
+        sub[a] = [grid[a][i]]
+    return sub
+
+
+def _sweep_block(design: dict, sub_grid: dict):
+    r = sweep.run_sweep(design, sub_grid)
+    return {f: r[f] for f in sweep.RESULT_FIELDS}
+
+
+def run_sweep_to_disk(design: dict, grid: dict, mappe: str,
+                      chunk_points: int = DEFAULT_CHUNK_POINTS, dtype: str = "f8",
+                      workers: int = None) -> dict:
+    """
+    Som sweep.run_sweep, men resultatet skrives til mappe/<felt>.npy i
+    blokke af højst chunk_points punkter. Returnerer manifestet.
+    """
+    grid = {a: list(grid[a]) for a in sweep.AXES}
+    shape = sweep.grid_shape(grid)
+    k, block_points = _blocks(shape, chunk_points)
+    n_blocks = math.prod(shape[:k])
+    manifest = _start(
+        mappe, "sweep", {"design": design, "grid": grid}, sweep.RESULT_FIELDS,
+        shape, dtype, block_points, n_blocks,
+    )
+
+    def tasks(i):
+        return design, _sub_grid(grid, shape, k, i)
+
+    def store(writers, i, result):
+        for name, w in writers.items():
+            w.write(i * block_points, result[name])
+
+    return _run_chunks(mappe, manifest, tasks, _sweep_block, workers, store)
+
+
+# ---------------------------------------------------------------------------
+# Monte Carlo
+# ---------------------------------------------------------------------------
+
+
+def run_monte_carlo_to_disk(case: dict = None, n_samples: int = 10_000,
+                            seed: int = 0, mappe: str = None, dtype: str = "f8",
+                            workers: int = None) -> dict:
+    """
+    Som monte_carlo.run_monte_carlo, men hver samples Ik,min skrives til
+    mappe/Ik_min.npy, og fejltællingerne gemmes pr. bid i manifestet.
+    Opsummeringen fås med mc_summary(mappe). Returnerer manifestet.
+    """
+    c = monte_carlo.merge_case(case)
+    size = monte_carlo.CHUNK_SIZE
+    chunks = monte_carlo.chunk_plan(n_samples, seed)
+    manifest = _start(
+        mappe, "monte_carlo", {"case": c, "n_samples": n_samples, "seed": seed},
+        MC_FIELDS, (n_samples,), dtype, size, len(chunks),
+    )
+
+    def tasks(i):
+        return (c,) + chunks[i]
+
+    def store(writers, i, result):
+        ik_values, fail_ik, fail_du, fail_iz = result
+        writers["Ik_min"].write(i * size, ik_values)
+        return [fail_ik, fail_du, fail_iz, min(ik_values), max(ik_values)]
+
+    return _run_chunks(mappe, manifest, tasks, monte_carlo.run_chunk, workers, store)
+
+
+def _percentiles_from_file(values, n: int, lo: float, hi: float, chunk: int):
+    """
+    Lineært interpolerede percentiler (som monte_carlo._percentile) uden at
+    sortere alt: histogram i første gennemløb, de få værdier i de relevante
+    bokse i andet.
+    """
+    ranks = {}
+    for p in monte_carlo.PERCENTILES:
+        pos = (n - 1) * p / 100.0
+        r_lo = int(math.floor(pos))
+        ranks[p] = (r_lo, min(r_lo + 1, n - 1), pos - r_lo)
+    if hi <= lo:
+        return {p: lo for p in ranks}
+
+    scale = _HIST_BINS / (hi - lo)
+    last = _HIST_BINS - 1
+
+    def box(v):
+        # f4-værdier kan ligge en anelse uden for [lo, hi] fra f8-statistikken
+        b = int((v - lo) * scale)
+        return last if b > last else (0 if b < 0 else b)
+
+    counts = [0] * _HIST_BINS
+    for start in range(0, n, chunk):
+        for v in values[start:start + chunk]:
+            counts[box(v)] += 1
+
+    cum = []
+    total = 0
+    for c in counts:
+        cum.append(total)
+        total += c
+    wanted = {}  # boks -> rang for første værdi i boksen
+    for r_lo, r_hi, _ in ranks.values():
+        for r in (r_lo, r_hi):
+            b = _find_box(cum, counts, r)
+            wanted[b] = cum[b]
+
+    inside = {b: [] for b in wanted}
+    for start in range(0, n, chunk):
+        for v in values[start:start + chunk]:
+            lst = inside.get(box(v))
+            if lst is not None:
+                lst.append(v)
+    for lst in inside.values():
+        lst.sort()
+
+    def at(r):
+        b = _find_box(cum, counts, r)
+        return inside[b][r - cum[b]]
+
+    out = {}
+    for p, (r_lo, r_hi, frac) in ranks.items():
+        a = at(r_lo)
+        out[p] = a + frac * (at(r_hi) - a)
+    return out
+
+
+def _find_box(cum, counts, r):
+    lo, hi = 0, len(cum) - 1
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if cum[mid] <= r:
+            lo = mid
+        else:
+            hi = mid - 1
+    while counts[lo] == 0:
+        lo -= 1
+    return lo
+
+
+def mc_summary(mappe: str) -> dict:
+    """
+    Opsummering som run_monte_carlo returnerer, læst fra disk. Rejser
+    StudieFejl hvis ikke alle bidder er færdige.
+    """
+    m = laes_manifest(mappe)
+    if m["art"] != "monte_carlo":
+        raise StudieFejl(f"{mappe} er ikke en Monte Carlo-studie.")
+    if len(m["done"]) != m["n_chunks"]:
+        raise StudieFejl(
+            f"Studien er ikke færdig ({len(m['done'])}/{m['n_chunks']} bidder)."
+        )
+    c = m["params"]["case"]
+    n_samples = m["params"]["n_samples"]
+    stats = [m["stats"][str(i)] for i in range(m["n_chunks"])]
+    fail_ik = sum(s[0] for s in stats)
+    fail_du = sum(s[1] for s in stats)
+    fail_iz = sum(s[2] for s in stats)
+    lo = min((s[3] for s in stats), default=math.nan)
+    hi = max((s[4] for s in stats), default=math.nan)
+
+    study = aabn(mappe)
+    try:
+        if n_samples:
+            pct = _percentiles_from_file(
+                study["Ik_min"], n_samples, lo, hi, m["chunk_size"]
+            )
+        else:
+            pct = {p: math.nan for p in monte_carlo.PERCENTILES}
+    finally:
+        study.close()
+
+    return monte_carlo.summary(c, n_samples, pct, fail_ik, fail_du, fail_iz)
+
+
+# ---------------------------------------------------------------------------
+# Læsning
+# ---------------------------------------------------------------------------
+
+
+class Studie(dict):
+    """
+    Manifestets felter plus ét memoryview (fladt, C-orden) pr. resultat-
+    felt over en mmap af .npy-filen. Bruges som resultatet fra run_sweep
+    (fx sweep.slice_2d(studie, "sq", "length", "In")). close() frigiver
+    filerne.
+    """
+
+    def close(self):
+        for name in self["manifest"]["fields"]:
+            self[name].release()
+        for mm in self._maps:
+            mm.close()
+
+
+def aabn(mappe: str) -> Studie:
+    m = laes_manifest(mappe)
+    typecode = DTYPES[m["dtype"]][0]
+    st = Studie(manifest=m, shape=tuple(m["shape"]))
+    if m["art"] == "sweep":
+        st["axes"] = m["params"]["grid"]
+    st._maps = []
+    for name, fil in m["fields"].items():
+        with open(os.path.join(mappe, fil), "rb") as f:
+            descr, shape, offset = _read_npy_header(f)
+            if descr != DTYPES[m["dtype"]][1] or list(shape) != m["shape"]:
+                raise StudieFejl(f"{fil} passer ikke til manifestet.")
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        st._maps.append(mm)
+        st[name] = memoryview(mm)[offset:].cast(typecode)
+    return st
+
+
+def status(mappe: str) -> str:
+    """Kort statuslinje ("sweep: 37/100 bidder, f4")."""
+    m = laes_manifest(mappe)
+    return f"{m['art']}: {len(m['done'])}/{m['n_chunks']} bidder, {m['dtype']}"
+
+
+if __name__ == "__main__":
+    import sys
+
+    for d in sys.argv[1:]:
+        print(f"{d}: {status(d)}")